@@ -0,0 +1,600 @@
+"""
+Measure the throughput of all the twelve tools of this folder end to
+end, from the API calls to the output files and plots, against the
+local mock API server (see mock_wos_api) at several dataset sizes.
+
+Every tool runs in its own process, in a scratch copy of its folder,
+so that nothing is written into the repository and the response caches
+start empty. For each tool and size, the benchmark reports the wall
+time, the API requests per second, the peak RSS, the CPU time per
+record, and how the wall time of the main thread splits between
+fetching the data, parsing it (everything not in the other phases),
+building the dataframes, writing the files and plotting.
+
+The results are appended to the JSON history file, results/
+end_to_end_history.json by default, which is not tracked by git, and
+compared to the previous run of the same tool and size, so that the
+regressions are visible.
+
+Run it from this folder, e.g.:
+python end_to_end.py --sizes 1000 10000 --tools fractional cited
+The MOCK_* environment variables are passed to the mock server.
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import requests
+
+PYTHON_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MOCK_SERVER = os.path.join(PYTHON_FOLDER, 'mock_wos_api', 'app.py')
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'results', 'end_to_end_history.json')
+
+SIZES = (1000, 10000, 100000)
+PORT = 5099
+PHASES = ('fetch', 'parse', 'dataframe', 'write', 'plot')
+# Slowdown of the wall time flagged as a regression
+REGRESSION_THRESHOLD = 0.1
+
+# The folder of each tool and the code running its pipeline for the
+# given number of records, with 'n' in the namespace; the lazy plots of
+# the tabbed apps are all built, as the pipelines did before
+TOOLS = {
+    'fractional': (
+        'fractional_counting_flask',
+        "from data_processing import run_button\n"
+        "run_button('key', f'OG=Clarivate RECORDS={n}', ['Clarivate'])"
+    ),
+    'cited': (
+        'cited_data_analytics',
+        "from data_processing import run_button\n"
+        "_, plots = run_button('key', f'TS=citation RECORDS={n}')\n"
+        "list(plots)"
+    ),
+    'self_citation': (
+        'self_citation_explorer',
+        "from data_processing import run_button\n"
+        "run_button('key', f'AU=Garfield RECORDS={n}')"
+    ),
+    'societal': (
+        'societal_impact_analytics',
+        "from data_processing import run_button_wos\n"
+        "_, plots = run_button_wos(f'TS=policy RECORDS={n}')\n"
+        "list(plots)"
+    ),
+    'technological': (
+        'technological_impact_analytics',
+        "from data_processing import run_button_wos\n"
+        "_, plots = run_button_wos(f'TS=patent RECORDS={n}')\n"
+        "list(plots)"
+    ),
+    'grants': (
+        'wos_grants_index_analytics_flask',
+        "from data_processing import run_button\n"
+        "_, plots = run_button('key', f'TS=climate RECORDS={n}')\n"
+        "list(plots)"
+    ),
+    'vosviewer': (
+        'wos_to_vosviewer_exporter_flask',
+        "from data_processing import run_button\n"
+        "run_button('key', f'TS=network RECORDS={n}', 'on')"
+    ),
+    'researcher': (
+        'researcher_api_excel_converter',
+        "from data_processing import main\n"
+        "main(f'OG=Clarivate RECORDS={n}', {'full_profiles': True, "
+        "'documents': False, 'peer_reviews': False})"
+    ),
+    'cities': (
+        'cities_collaborations_analysis',
+        "run_script('main.py', {}, 'main_function', f'TS=city RECORDS={n}')"
+    ),
+    'citation_report': (
+        'citation_report_for_larger_datasets',
+        "run_script('main.py', "
+        "{'SEARCH_QUERY': f'OG=The World Bank RECORDS={n}'})"
+    ),
+    'h_index': (
+        'researcherid-based_h-index_excluding_self-citations',
+        "run_script('main.py', "
+        "{'SEARCH_QUERY': f'AI=A-5224-2009 RECORDS={n}'})"
+    ),
+    'author_ids': (
+        'retrieve_author_ids',
+        "run_script('main.py', {'ADDTL_PARAMS': f'RECORDS={n}'})"
+    ),
+}
+
+
+class PhaseTimer:
+    """Charge the wall time of the main thread to the phases of the
+    pipeline. Only the outermost timed call counts, e.g. the dataframes
+    built inside a plotting function are charged to plotting. The API
+    requests are counted in all the threads."""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.active = None
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def timed(self, function, phase):
+        """Wrap the function to charge its calls to the phase.
+
+        :param function: function.
+        :param phase: str.
+        :return: function.
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if (self.active is not None
+                    or threading.current_thread() is not
+                    threading.main_thread()):
+                return function(*args, **kwargs)
+            self.active = phase
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[phase] += time.perf_counter() - started
+                self.active = None
+        return wrapper
+
+    def patch(self, owner, name, phase):
+        """Replace the attribute of a module or class with its timed
+        version.
+
+        :param owner: module or class.
+        :param name: str.
+        :param phase: str.
+        """
+        attribute = owner.__dict__.get(name) if isinstance(owner, type) \
+            else None
+        if isinstance(attribute, (classmethod, staticmethod)):
+            setattr(owner, name, staticmethod(
+                self.timed(getattr(owner, name), phase)
+            ))
+        else:
+            setattr(owner, name, self.timed(getattr(owner, name), phase))
+
+    def patch_module(self, module, phase):
+        """Time all the functions defined in the module.
+
+        :param module: module.
+        :param phase: str.
+        """
+        for name, value in list(vars(module).items()):
+            if (isinstance(value, types.FunctionType)
+                    and value.__module__ == module.__name__):
+                self.patch(module, name, phase)
+
+    def count_requests(self, send):
+        """Wrap requests.Session.send to count the requests and the
+        bytes received.
+
+        :param send: function.
+        :return: function.
+        """
+        @functools.wraps(send)
+        def wrapper(*args, **kwargs):
+            response = send(*args, **kwargs)
+            with self.lock:
+                self.requests += 1
+                self.bytes += len(response.content)
+            return response
+        return wrapper
+
+    def timed_pages(self, fetch_pages):
+        """Wrap api_client.fetch_pages to charge the main thread waiting
+        for the pages to the fetch phase.
+
+        :param fetch_pages: function.
+        :return: function.
+        """
+        @functools.wraps(fetch_pages)
+        def wrapper(*args, **kwargs):
+            pages = fetch_pages(*args, **kwargs)
+            while True:
+                try:
+                    page = self.timed(next, 'fetch')(pages)
+                except StopIteration:
+                    return
+                yield page
+        return wrapper
+
+
+def instrument(timer):
+    """Time the library calls of the phases.
+
+    :param timer: PhaseTimer.
+    """
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io
+    import plotly.offline
+    from plotly.basedatatypes import BaseFigure
+
+    requests.Session.send = timer.count_requests(requests.Session.send)
+    timer.patch(requests.Session, 'request', 'fetch')
+
+    for name in ('__init__', 'from_dict', 'from_records', 'merge',
+                 'pivot_table'):
+        timer.patch(pd.DataFrame, name, 'dataframe')
+    for name in ('concat', 'merge', 'pivot_table', 'json_normalize'):
+        timer.patch(pd, name, 'dataframe')
+
+    for name in ('to_excel', 'to_csv', 'to_parquet', 'to_feather'):
+        if hasattr(pd.DataFrame, name):
+            timer.patch(pd.DataFrame, name, 'write')
+    timer.patch(pd.ExcelWriter, 'close', 'write')
+
+    for name in px.__all__:
+        if isinstance(getattr(px, name), types.FunctionType):
+            timer.patch(px, name, 'plot')
+    timer.patch(go.Figure, '__init__', 'plot')
+    timer.patch(plotly.offline, 'plot', 'plot')
+    for name in ('to_html', 'write_html', 'to_json'):
+        timer.patch(plotly.io, name, 'plot')
+        timer.patch(BaseFigure, name, 'plot')
+    # Render the figures instead of opening them in the browser
+    BaseFigure.show = timer.timed(
+        lambda figure, *args, **kwargs: figure.to_html(), 'plot'
+    )
+
+
+def instrument_app(timer):
+    """Time the API operations and the visualizations of a Flask app,
+    before its data_processing module imports them.
+
+    :param timer: PhaseTimer.
+    """
+    import api_client
+    import api_operations
+    api_client.fetch_pages = timer.timed_pages(api_client.fetch_pages)
+    timer.patch_module(api_operations, 'fetch')
+    try:
+        import visualizations
+    except ImportError:
+        return
+    timer.patch_module(visualizations, 'plot')
+    try:
+        import lazy_plots
+    except ImportError:
+        return
+    # Build the plots in the timed thread instead of the background one
+    lazy_plots.LazyPlots.warm_up = lambda self: None
+
+
+class Widget:
+    """A stand-in for the tkinter widgets of the cities app, holding
+    the values entered by the user."""
+
+    def __init__(self, value=''):
+        self.value = value
+        self.options = {'text': ''}
+
+    def get(self, *args):
+        return self.value
+
+    def config(self, *args, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def update_idletasks(self):
+        pass
+
+    def __getitem__(self, key):
+        return self.options.get(key, '')
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+
+def headless_app(search_query):
+    """Build the stand-in of the cities app window with the search
+    query entered.
+
+    :param search_query: str.
+    :return: types.SimpleNamespace.
+    """
+    return types.SimpleNamespace(
+        apikey_window=Widget('key'),
+        search_query_window=Widget(search_query),
+        our_org_window=Widget('Clarivate'),
+        exclude_collaborations=Widget(0),
+        **{name: Widget() for name in (
+            'search_button', 'progress_bar', 'progress_label', 'style',
+            'root', 'apikey_bottom_label', 'search_query_bottom_label',
+            'our_org_bottom_label'
+        )}
+    )
+
+
+def run_script(filename, constants, entry_point=None, search_query=None):
+    """Run a single-file script with its constants replaced, e.g. its
+    search query. The GUI window of the cities app is replaced with a
+    stand-in, and its main function is called directly.
+
+    :param filename: str.
+    :param constants: dict.
+    :param entry_point: str or None, the function to call.
+    :param search_query: str or None, entered into the GUI stand-in.
+    """
+    with open(filename, encoding='utf-8') as reading:
+        lines = reading.read().split('\n')
+    for i, line in enumerate(lines):
+        name = line.split(' = ')[0]
+        if name in constants:
+            lines[i] = f'{name} = {constants[name]!r}'
+        elif line == 'app = App()':
+            lines[i] = 'app = HEADLESS_APP'
+    namespace = {'__name__': '__main__', '__file__': filename,
+                 'HEADLESS_APP': headless_app(search_query)}
+    exec(compile('\n'.join(lines), filename, 'exec'), namespace)
+    if entry_point:
+        namespace[entry_point]()
+
+
+def prepare(tool_folder, scratch):
+    """Copy the tool into the scratch folder, with the API key files,
+    the output folders and the local data files it needs.
+
+    :param tool_folder: str.
+    :param scratch: str.
+    :return: str, the path of the copy.
+    """
+    copy = os.path.join(scratch, tool_folder)
+    shutil.copytree(
+        os.path.join(PYTHON_FOLDER, tool_folder),
+        copy,
+        ignore=shutil.ignore_patterns('cache', 'downloads', 'screenshots',
+                                      '__pycache__', 'apikey*.py')
+    )
+    for filename in ('apikeys.py', 'apikey.py'):
+        with open(os.path.join(copy, filename), 'w') as writing:
+            writing.write("EXPANDED_APIKEY = RESEARCHER_APIKEY = "
+                          "STARTER_APIKEY = APIKEY = 'key'\n")
+    for folder in ('woscc', 'pci', 'dii', 'trends'):
+        os.makedirs(os.path.join(copy, 'downloads', folder), exist_ok=True)
+
+    # The exchange rates must be fresh not to be requested from the
+    # currency converter API
+    currencies = os.path.join(copy, 'currencies.csv')
+    if os.path.exists(currencies):
+        with open(currencies, encoding='utf-8') as reading:
+            lines = reading.read().split('\n')
+        lines[0] = f'Updated,{datetime.date.today():%m/%d/%Y}'
+        with open(currencies, 'w', encoding='utf-8') as writing:
+            writing.write('\n'.join(lines))
+
+    # The SimpleMaps world cities database is not shipped with the
+    # cities app, so a small one with the cities of the mock is used
+    if tool_folder == 'cities_collaborations_analysis' and not \
+            os.path.exists(os.path.join(copy, 'worldcities.csv')):
+        sys.path.insert(0, os.path.dirname(MOCK_SERVER))
+        import fixtures
+        with open(os.path.join(copy, 'worldcities.csv'), 'w',
+                  encoding='utf-8') as writing:
+            writing.write('city_ascii,admin_name,country,lat,lng\n')
+            for i, (_, city, _, country) in enumerate(fixtures.ORGANIZATIONS):
+                writing.write(f'{city},,{country},{i * 5},{i * 10}\n')
+    return copy
+
+
+def worker(tool, records, result_file):
+    """Run the pipeline of the tool in this process and save the
+    measurements.
+
+    :param tool: str.
+    :param records: int.
+    :param result_file: str.
+    """
+    tool_folder, code = TOOLS[tool]
+    sys.path.insert(0, os.getcwd())
+    timer = PhaseTimer()
+    instrument(timer)
+    if os.path.exists('api_operations.py'):
+        instrument_app(timer)
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    exec(code, {'n': records, 'run_script': run_script})
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    timer.seconds['parse'] = max(
+        wall - sum(s for p, s in timer.seconds.items() if p != 'parse'), 0
+    )
+    with open(result_file, 'w', encoding='utf-8') as writing:
+        json.dump({
+            'tool': tool,
+            'records': records,
+            'wall_seconds': round(wall, 3),
+            'requests': timer.requests,
+            'requests_per_second': round(timer.requests / wall, 1),
+            'megabytes_received': round(timer.bytes / 1024 ** 2, 1),
+            'peak_rss_mb': round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+            ),
+            'cpu_ms_per_record': round(cpu * 1000 / records, 3),
+            'phases': {p: round(s, 3) for p, s in timer.seconds.items()}
+        }, writing)
+
+
+def run_tool(tool, records, port):
+    """Run the tool in a separate process against the mock server.
+
+    :param tool: str.
+    :param records: int.
+    :param port: int.
+    :return: dict.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        copy = prepare(TOOLS[tool][0], scratch)
+        result_file = os.path.join(scratch, 'result.json')
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', tool,
+             str(records), result_file],
+            cwd=copy,
+            env=dict(os.environ, CLARIVATE_API_URL=f'http://127.0.0.1:{port}'),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if process.returncode != 0:
+            return {'tool': tool, 'records': records,
+                    'error': process.stderr.strip().split('\n')[-1]}
+        with open(result_file, encoding='utf-8') as reading:
+            return json.load(reading)
+
+
+def start_mock_server(port):
+    """Launch the mock API server and wait until it responds.
+
+    :param port: int.
+    :return: subprocess.Popen.
+    """
+    server = subprocess.Popen(
+        [sys.executable, MOCK_SERVER, str(port)],
+        cwd=os.path.dirname(MOCK_SERVER),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/wos', timeout=1)
+            return server
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('The mock API server did not start')
+
+
+def load_history(history_file):
+    """Load the earlier benchmark runs.
+
+    :param history_file: str.
+    :return: list[dict].
+    """
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file, encoding='utf-8') as reading:
+        return json.load(reading)
+
+
+def previous_result(history, tool, records):
+    """Find the latest successful result of the tool at the same size.
+
+    :param history: list[dict].
+    :param tool: str.
+    :param records: int.
+    :return: dict or None.
+    """
+    for run in reversed(history):
+        for result in run['results']:
+            if (result['tool'], result['records']) == (tool, records) \
+                    and 'error' not in result:
+                return result
+    return None
+
+
+def git_commit():
+    """Return the current commit of the repository, if any.
+
+    :return: str or None.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PYTHON_FOLDER,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(result, previous):
+    """Print a line of the results table.
+
+    :param result: dict.
+    :param previous: dict or None.
+    """
+    if 'error' in result:
+        print(f'{result["tool"]:<16}{result["records"]:>8}  '
+              f'failed: {result["error"]}')
+        return
+    phases = ' '.join(f'{result["phases"][p]:>13.1f}' for p in PHASES)
+    change = ''
+    if previous:
+        ratio = result['wall_seconds'] / previous['wall_seconds'] - 1
+        change = f'{ratio:>+8.0%}'
+        if ratio > REGRESSION_THRESHOLD:
+            change += ' REGRESSION'
+    print(f'{result["tool"]:<16}{result["records"]:>8}'
+          f'{result["wall_seconds"]:>9.1f}{result["requests_per_second"]:>8.1f}'
+          f'{result["peak_rss_mb"]:>8.0f}{result["cpu_ms_per_record"]:>9.2f} '
+          f'{phases}{change}')
+
+
+def main():
+    """Run the benchmark for the selected tools and sizes, print the
+    results and append them to the history."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tools', nargs='+', choices=TOOLS,
+                        default=list(TOOLS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--history', default=HISTORY_FILE,
+                        help='the JSON history file of the results')
+    parser.add_argument('--worker', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        tool, records, result_file = args.worker
+        worker(tool, int(records), result_file)
+        return
+
+    history = load_history(args.history)
+    run = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'mock_settings': {k: v for k, v in os.environ.items()
+                          if k.startswith('MOCK_')},
+        'results': []
+    }
+    print(f'{"Tool":<16}{"Records":>8}{"Wall, s":>9}{"Req/s":>8}'
+          f'{"RSS, MB":>8}{"CPU ms/r":>9} '
+          + ' '.join(f'{p + ", s":>13}' for p in PHASES) + '  vs previous')
+    server = start_mock_server(args.port)
+    try:
+        for records in args.sizes:
+            for tool in args.tools:
+                result = run_tool(tool, records, args.port)
+                report(result, previous_result(history, tool, records))
+                run['results'].append(result)
+    finally:
+        server.terminate()
+        history.append(run)
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)),
+                    exist_ok=True)
+        with open(args.history, 'w', encoding='utf-8') as writing:
+            json.dump(history, writing, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Measure the speed of the fractional counting of the records, see
+flatten_records and count_fractions in
+fractional_counting_flask/data_processing.py, on hyper-authored
+records, where every author is affiliated with a few of the addresses
+and every address lists its authors, as in the records of the large
+collaborations.
+
+The records are flattened once, and counted for one and for several
+organizations. The time per record should grow linearly with the number
+of authors.
+
+Run it from this folder: python fractional_counting.py [authors ...]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'fractional_counting_flask'))
+
+from data_processing import count_fractions, flatten_records  # noqa: E402
+
+AUTHORS = [100, 1000, 3000]
+RECORDS = 100
+REPEATS = 5
+# The authors per address, and the addresses per author
+AUTHORS_PER_ADDRESS = 5
+ADDRESSES_PER_AUTHOR = 3
+ORGANIZATIONS = [f'University {n}' for n in range(50)]
+OUR_ORGS = ORGANIZATIONS[:10]
+
+
+def hyper_authored_record(number, authors, rng):
+    """Generate a record with the fields read by the fractional counting,
+    with the given number of authors.
+
+    :param number: int.
+    :param authors: int.
+    :param rng: random.Random.
+    :return: dict.
+    """
+    addresses = max(2, authors // AUTHORS_PER_ADDRESS)
+    author_addresses = [
+        sorted(rng.sample(range(1, addresses + 1),
+                          min(addresses, ADDRESSES_PER_AUTHOR)))
+        for _ in range(authors)
+    ]
+    address_authors = {n: [] for n in range(1, addresses + 1)}
+    for seq_no, numbers in enumerate(author_addresses, start=1):
+        for n in numbers:
+            address_authors[n].append(seq_no)
+    names = [
+        {'seq_no': seq_no, 'role': 'author',
+         'addr_no': ' '.join(map(str, numbers))}
+        for seq_no, numbers in enumerate(author_addresses, start=1)
+    ]
+    address_names = []
+    for n in range(1, addresses + 1):
+        organization = rng.choice(ORGANIZATIONS)
+        listed_names = [{'seq_no': seq_no, 'role': 'author'}
+                        for seq_no in address_authors[n]]
+        address = {'address_spec': {
+            'addr_no': n,
+            'organizations': {'count': 2, 'organization': [
+                {'pref': 'N', 'content': organization.upper()},
+                {'pref': 'Y', 'content': organization}
+            ]}
+        }}
+        if listed_names:
+            address['names'] = {
+                'count': len(listed_names),
+                'name': (listed_names[0] if len(listed_names) == 1
+                         else listed_names)
+            }
+        address_names.append(address)
+    return {
+        'UID': f'WOS:{number:015}',
+        'static_data': {
+            'summary': {
+                'pub_info': {'pubyear': 2020},
+                'names': {'count': authors, 'name': names[0]
+                          if authors == 1 else names}
+            },
+            'fullrecord_metadata': {
+                'addresses': {'count': addresses,
+                              'address_name': address_names}
+            }
+        }
+    }
+
+
+def measure(function, *args):
+    """Call the function REPEATS times, return the median time.
+
+    :param function: function.
+    :param args: its arguments.
+    :return: float.
+    """
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(authors_counts):
+    """Run the benchmark and print the results.
+
+    :param authors_counts: list[int].
+    """
+    rng = random.Random(0)
+    print(f'{"Authors":>10}{"Stage":>20}{"ms/record":>12}{"us/author":>12}')
+    for authors in authors_counts:
+        records = [hyper_authored_record(n, authors, rng)
+                   for n in range(RECORDS)]
+        documents, links = flatten_records(records)
+        stages = {
+            'flatten': (flatten_records, records),
+            'count, 1 org': (count_fractions, documents, links, OUR_ORGS[:1]),
+            f'count, {len(OUR_ORGS)} orgs': (count_fractions, documents,
+                                            links, OUR_ORGS)
+        }
+        for stage, (function, *args) in stages.items():
+            seconds = measure(function, *args) / RECORDS
+            print(f'{authors:>10}{stage:>20}{seconds * 1000:>12.2f}'
+                  f'{seconds / authors * 10 ** 6:>12.2f}')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or AUTHORS)
@@ -0,0 +1,187 @@
+"""
+Compare the speed of decoding the pages of Web of Science Expanded API
+records with the current path (requests' response.json(), i.e. the
+standard library json module) and the decoders of the shared API
+client: orjson, and msgspec limited to the record fields selected by
+viewField.
+
+The recorded pages are taken from the response caches of the apps (see
+response_cache.py), or from the .json files in the folder passed as
+the first command line argument. If there are none, synthetic pages
+with hyper-authored records are generated instead.
+
+Run it from this folder: python json_decoding.py [pages_folder]
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'fractional_counting_flask'))
+
+import requests  # noqa: E402
+import api_client  # noqa: E402
+
+# The fields read by the fractional counting parser
+VIEW_FIELD = 'pub_info names addresses'
+REPEATS = 5
+SYNTHETIC_PAGES = 5
+SYNTHETIC_AUTHORS = 500
+
+
+def load_recorded_pages(folder=None):
+    """Load the recorded pages of records, either from the folder or
+    from the response caches of all the apps.
+
+    :param folder: str or None.
+    :return: list[bytes].
+    """
+    if folder:
+        pages = []
+        for filename in sorted(glob.glob(os.path.join(folder, '*.json'))):
+            with open(filename, 'rb') as reading:
+                pages.append(reading.read())
+        return pages
+    pages = []
+    caches = os.path.join(os.path.dirname(__file__), '..', '*', 'cache',
+                          'responses.sqlite3')
+    for cache in glob.glob(caches):
+        connection = sqlite3.connect(cache)
+        for (body,) in connection.execute('SELECT body FROM responses'):
+            page = zlib.decompress(body)
+            if b'"REC"' in page:
+                pages.append(page)
+        connection.close()
+    return pages
+
+
+def synthetic_page(authors):
+    """Generate a page of 100 records, each with the given number of
+    authors and addresses, and some sections never read by the apps.
+
+    :param authors: int.
+    :return: bytes.
+    """
+    records = []
+    for i in range(100):
+        records.append({
+            'UID': f'WOS:{i:015}',
+            'static_data': {
+                'summary': {
+                    'pub_info': {'pubyear': 2020, 'vol': 1, 'issue': 2},
+                    'titles': {'title': [
+                        {'type': 'source', 'content': 'JOURNAL'},
+                        {'type': 'item', 'content': 'A title ' * 10}
+                    ]},
+                    'names': {'count': authors, 'name': [
+                        {'seq_no': n, 'role': 'author', 'addr_no': n,
+                         'full_name': f'Author, {n}',
+                         'display_name': f'Author, {n}'}
+                        for n in range(1, authors + 1)
+                    ]}
+                },
+                'fullrecord_metadata': {
+                    'addresses': {'count': authors, 'address_name': [
+                        {'address_spec': {
+                            'addr_no': n,
+                            'full_address': f'Univ {n}, City, Country',
+                            'organizations': {'organization': [
+                                {'pref': 'Y', 'content': f'Univ {n}'}
+                            ]}
+                        }}
+                        for n in range(1, authors + 1)
+                    ]},
+                    'abstracts': {'abstract': {'abstract_text': {
+                        'p': 'An abstract sentence. ' * 50
+                    }}},
+                    'refs': {'ref': [
+                        {'uid': f'WOS:{n:015}', 'year': 2000}
+                        for n in range(50)
+                    ]}
+                }
+            },
+            'dynamic_data': {
+                'citation_related': {'tc_list': {'silo_tc': [
+                    {'coll_id': 'WOS', 'local_count': i}
+                ]}}
+            }
+        })
+    return json.dumps({
+        'QueryResult': {'QueryID': 1, 'RecordsFound': 100},
+        'Data': {'Records': {'records': {'REC': records}}}
+    }).encode('utf-8')
+
+
+def as_response(page):
+    """Wrap the page into a response, as returned by the API.
+
+    :param page: bytes.
+    :return: requests.Response.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = page
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+def measure(decoder, pages):
+    """Decode all the pages REPEATS times, return the median time.
+
+    :param decoder: function accepting a requests.Response.
+    :param pages: list[requests.Response].
+    :return: float.
+    """
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        for page in pages:
+            decoder(page)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(folder=None):
+    """Run the benchmark and print the results.
+
+    :param folder: str or None.
+    """
+    pages = load_recorded_pages(folder)
+    if pages:
+        print(f'Recorded pages: {len(pages)}')
+    else:
+        pages = [synthetic_page(SYNTHETIC_AUTHORS)] * SYNTHETIC_PAGES
+        print(f'No recorded pages found, using {len(pages)} synthetic '
+              f'pages with {SYNTHETIC_AUTHORS} authors per record')
+    megabytes = sum(len(page) for page in pages) / 1024 ** 2
+    responses = [as_response(page) for page in pages]
+
+    decoders = {'response.json()': lambda response: response.json()}
+    if api_client.orjson is not None:
+        decoders['orjson'] = api_client.decode
+    else:
+        print('orjson is not installed')
+    if api_client.msgspec is not None:
+        decoders[f'msgspec, viewField={VIEW_FIELD}'] = (
+            lambda response: api_client.decode(response, VIEW_FIELD)
+        )
+    else:
+        print('msgspec is not installed')
+
+    baseline = None
+    print(f'{"Decoder":<50}{"Seconds":>10}{"MB/s":>10}{"Speedup":>10}')
+    for name, decoder in decoders.items():
+        seconds = measure(decoder, responses)
+        baseline = baseline or seconds
+        print(f'{name:<50}{seconds:>10.3f}{megabytes / seconds:>10.1f}'
+              f'{baseline / seconds:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
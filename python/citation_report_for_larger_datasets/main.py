@@ -19,11 +19,13 @@ Finally, launch the script. The script will retrieve the documents metadata usin
 process the data, and print the answers in the Run window / terminal / console.
 """
 
+import os
 import requests
 from apikey import STARTER_APIKEY
 
 # Search query for which to calculate the citation report
 SEARCH_QUERY = 'OG=The World Bank'
+API_URL = os.environ.get('CLARIVATE_API_URL', 'https://api.clarivate.com')
 
 
 def retrieve_key_fields(document):
@@ -49,7 +51,7 @@ records = []
 
 # Initial API request to get the first 50 records and check how many API requests in total will be required to
 # retrieve all the data
-initial_request = requests.get(f'https://api.clarivate.com/apis/wos-starter/v1/documents?q={SEARCH_QUERY}'
+initial_request = requests.get(f'{API_URL}/apis/wos-starter/v1/documents?q={SEARCH_QUERY}'
                                f'&limit=50&page=1&db=WOS',
                                headers={'X-ApiKey': STARTER_APIKEY})
 initial_json = initial_request.json()
@@ -63,7 +65,7 @@ for wos_document in initial_json['hits']:
 # If the number of required API requests is more than 1, subsequent API requests are being sent
 if requests_required > 1:
     for i in range(1, requests_required):
-        subsequent_request = requests.get(f'https://api.clarivate.com/apis/wos-starter/v1/documents?q={SEARCH_QUERY}'
+        subsequent_request = requests.get(f'{API_URL}/apis/wos-starter/v1/documents?q={SEARCH_QUERY}'
                                           f'&limit=50&page={i+1}&db=WOS',
                                           headers={'X-ApiKey': STARTER_APIKEY})
         subsequent_json = subsequent_request.json()
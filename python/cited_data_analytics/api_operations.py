@@ -3,9 +3,8 @@ Retrieve data from Web of Science Core Collection with Web of Science
 Expanded API.
 """
 
-import urllib.parse
-import requests
-import time
+import api_client
+from api_client import EXPANDED_API_URL
 
 
 def validate_search_query(apikey, query):
@@ -16,43 +15,36 @@ def validate_search_query(apikey, query):
     :param query: str.
     :return: int.
     """
-    test_request = requests.get(
-        url=f'https://api.clarivate.com/api/wos/?databaseId=WOS&usrQuery='
-            f'{urllib.parse.quote(query)}&count=0&firstRecord=1',
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-    if test_request.status_code == 200:
-        test_json = test_request.json()
-        return test_request.status_code, test_json['QueryResult']['RecordsFound']
-    return test_request.status_code, test_request.json()['message'].split(':')[-1]
+    query_session = search_wos(apikey, query)
+    if query_session.status_code == 200:
+        return query_session.status_code, query_session.records_found
+    return query_session.status_code, query_session.message
 
 
-def base_record_ids_request(apikey, query_id, first_record):
-    """Retrieve the list of base Web of Science document records
-    through Web of Science Expanded API.
+def search_wos(apikey, query):
+    """Run the search query on the server side once, or reuse the recent
+    run of the same search query, e.g. by its validation, to get the
+    number of the records found and the query ID.
 
     :param apikey: str.
-    :param query_id: int.
-    :param first_record: int.
-    :return: dict.
+    :param query: str.
+    :return: api_client.QuerySession.
     """
-    params = {
-        'count': 100,
-        'firstRecord': first_record
-    }
-
-    response = requests.get(
-        url=f'https://api.clarivate.com/api/wos/recordids/{query_id}',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
+    return api_client.open_query(
+        apikey,
+        {'databaseId': 'WOS', 'usrQuery': query}
     )
 
-    if response.status_code == 500:
-        return base_record_ids_request(apikey, query_id, first_record)
 
-    return response
+def base_record_ids_request(query_session, first_record):
+    """Retrieve the list of base Web of Science document records
+    through Web of Science Expanded API.
+
+    :param query_session: api_client.QuerySession.
+    :param first_record: int.
+    :return: list.
+    """
+    return query_session.record_ids(first_record)
 
 
 def cited_references_request(apikey, ut, first_record=1):
@@ -71,15 +63,12 @@ def cited_references_request(apikey, ut, first_record=1):
         'firstRecord': first_record
     }
 
-    response = requests.get(
-        url='https://api.clarivate.com/api/wos/references',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
+    response = api_client.get(
+        f'{EXPANDED_API_URL}/references',
+        apikey,
+        params
     )
-
-    if response.headers['x-req-reqpersec-remaining'] == 0:
-        time.sleep(.2)
+    response.raise_for_status()
 
     return response
 
@@ -99,13 +88,6 @@ def fullrecord_request(apikey, uts):
         'firstRecord': 1,
         'viewField': 'publishers'
     }
-    response = requests.get(
-        url='https://api.clarivate.com/api/wos/',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-    if response.status_code == 500:
-        return fullrecord_request(apikey, uts)
-
+    response = api_client.get(EXPANDED_API_URL, apikey, params)
+    response.raise_for_status()
     return response
@@ -5,14 +5,16 @@ and parsing the required metadata fields.
 """
 
 from datetime import date
+import checkpoints
 import state
-import urllib.parse
-import requests
 import pandas as pd
+import requests
+from api_client import decode, fetch_pages, retry_budget, start_job
 from api_operations import (
     base_record_ids_request,
     cited_references_request,
-    fullrecord_request
+    fullrecord_request,
+    search_wos
 )
 from visualizations import visualize_data
 
@@ -26,6 +28,8 @@ def run_button(apikey, search_query):
     :return: str, tuple.
     """
 
+    start_job()
+
     # Retrieve base document IDs
     base_record_ids = get_base_records_ids(apikey, search_query)
 
@@ -50,8 +54,10 @@ def run_button(apikey, search_query):
 
     plots = visualize_data(df, search_query)
 
-    state.progress = 0
-    state.current_task = ""
+    state.update(0, "")
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return f'{safe_search_query} - {date.today()}.csv', plots
 
@@ -60,69 +66,91 @@ def get_base_records_ids(apikey: str, search_query: str) -> list[str]:
     """Manage API calls and parsing to get the list of base record ids.
 
     """
-    state.progress = 0
-    state.current_task = "Retrieving Base Records IDs"
+    state.update(0, "Retrieving Base Records IDs")
     ids_list = []
-    initial_json = requests.get(
-        url=f'https://api.clarivate.com/api/wos/?databaseId=WOS&usrQuery='
-            f'{urllib.parse.quote(search_query)}&count=0&firstRecord=1',
-        headers={'X-Apikey': apikey},
-        timeout=16
-    ).json()
-    query_id = initial_json['QueryResult']['QueryID']
-    total_results = initial_json['QueryResult']['RecordsFound']
+    query_session = search_wos(apikey, search_query)
+    total_results = query_session.records_found
     requests_required = ((total_results - 1) // 100) + 1
     max_requests = min(requests_required, 1000)
-    for i in range(max_requests):
-        first_record = int(f'{i}01')
-        ids_request = base_record_ids_request(
-            apikey,
-            query_id,
-            first_record
-        )
-        ids_json = ids_request.json()
+    ids_requests = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: base_record_ids_request(
+                query_session, first_record
+            ),
+            'base record ids',
+            query_session.params, query_session.records_found
+        ),
+        [int(f'{i}01') for i in range(max_requests)]
+    )
+    for i, ids_json in enumerate(ids_requests):
         ids_list.extend(ids_json)
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     return ids_list
 
 
 def get_cited_references(apikey, ids):
     """Manage API calls and parsing to get the list of cited references.
+    The references of several documents are retrieved concurrently, and
+    added to the list in the order of the documents.
 
     :param apikey: str.
     :param ids: list[str].
     :return: list[dict].
     """
-    state.progress = 0
-    state.current_task = "Retrieving Cited References"
+    state.update(0, "Retrieving Cited References")
     cited_refs = []
-    for i, document in enumerate(ids):
-        initial_cited_refs_response = cited_references_request(apikey, document)
+    document_refs = fetch_pages(
+        checkpoints.resumable(
+            lambda document: get_document_references(apikey, document),
+            'cited references',
+            ids
+        ),
+        ids
+    )
+    for i, refs in enumerate(document_refs):
+        cited_refs.extend(refs)
+        state.update((i + 1) / len(ids) * 100)
+
+    return cited_refs
+
+
+def get_document_references(apikey, document):
+    """Retrieve all the pages of the cited references of the document.
+
+    :param apikey: str.
+    :param document: str.
+    :return: list[dict].
+    """
+    cited_refs = []
+    try:
+        initial_cited_refs_json = decode(
+            cited_references_request(apikey, document)
+        )
+    except requests.HTTPError as error:
         # Worst (but rare) case of receiving an internal server error
-        if initial_cited_refs_response.status_code == 500:
-            initial_cited_refs_json = {
-                "Data": [],
-                "QueryResult": {"RecordsFound": 0}
-            }
-        else:
-            initial_cited_refs_json = initial_cited_refs_response.json()
-        for cited_ref in initial_cited_refs_json['Data']:
-            cited_refs.append(cited_ref)
-        total_results = initial_cited_refs_json['QueryResult']['RecordsFound']
-        requests_required = ((total_results - 1) // 100) + 1
-
-        if requests_required > 1:
-            for j in range(1, requests_required):
-                first_record = int(f'{j}01')
-                subsequent_cited_refs_response = cited_references_request(
-                    apikey,
-                    document,
-                    first_record
-                )
-                subsequent_cited_refs_json = subsequent_cited_refs_response.json()
-                cited_refs.extend(subsequent_cited_refs_json['Data'])
-        state.progress = (i + 1) / len(ids) * 100
+        if error.response.status_code != 500:
+            raise
+        initial_cited_refs_json = {
+            "Data": [],
+            "QueryResult": {"RecordsFound": 0}
+        }
+    for cited_ref in initial_cited_refs_json['Data']:
+        cited_refs.append(cited_ref)
+    total_results = initial_cited_refs_json['QueryResult']['RecordsFound']
+    requests_required = ((total_results - 1) // 100) + 1
+
+    if requests_required > 1:
+        subsequent_cited_refs = fetch_pages(
+            lambda first_record: decode(cited_references_request(
+                apikey,
+                document,
+                first_record
+            ))['Data'],
+            [int(f'{j}01') for j in range(1, requests_required)]
+        )
+        for cited_refs_page in subsequent_cited_refs:
+            cited_refs.extend(cited_refs_page)
 
     return cited_refs
 
@@ -135,22 +163,38 @@ def enrich_with_wos_metadata(apikey, refs_list):
     :param refs_list: list[str].
     :return: list[dict].
     """
-    state.progress = 0
-    state.current_task = "Enriching cited references metadata"
+    state.update(0, "Enriching cited references metadata")
     ut_list = [ref['UID'] for ref in refs_list if 'WOS' in ref['UID']]
     requests_required = ((len(ut_list) - 1) // 100) + 1
     addtl_fields_list = []
-    for i in range(requests_required):
-        ut_batch = ' '.join(ut_list[i*100:i*100+100])
-        wos_record_response = fullrecord_request(apikey, ut_batch)
-        wos_record_json = wos_record_response.json()
-        for record in wos_record_json['Data']['Records']['records']['REC']:
-            addtl_fields_list.append(parse_metadata(record))
-        state.progress = (i + 1) / requests_required * 100
+    batches = fetch_pages(
+        checkpoints.resumable(
+            lambda ut_batch: get_wos_metadata(apikey, ut_batch),
+            'wos metadata', ut_list
+        ),
+        [' '.join(ut_list[i*100:i*100+100]) for i in range(requests_required)]
+    )
+    for i, batch in enumerate(batches):
+        addtl_fields_list.extend(batch)
+        state.update((i + 1) / requests_required * 100)
 
     return addtl_fields_list
 
 
+def get_wos_metadata(apikey, ut_batch):
+    """Retrieve and parse the full record metadata of a batch of
+    records.
+
+    :param apikey: str.
+    :param ut_batch: str, the UTs separated by spaces.
+    :return: list[dict].
+    """
+    wos_record_response = fullrecord_request(apikey, ut_batch)
+    wos_record_json = decode(wos_record_response)
+    return [parse_metadata(record) for record
+            in wos_record_json['Data']['Records']['records']['REC']]
+
+
 def parse_metadata(record):
     """Parse JSON for required metadata fields.
 
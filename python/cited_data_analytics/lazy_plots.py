@@ -0,0 +1,159 @@
+"""
+Build the plots of the visualization tabs on demand.
+
+The visualizations return a LazyPlots sequence instead of a tuple of
+rendered plots: the first plot is built at once to be shown, and the
+others when they are first accessed or by a background thread in the
+meantime. The plots are always built in their order, as some of the
+visualizations prepare the columns of the shared dataframes for the
+next ones.
+
+The plots of the recent output files are memoized by the file path and
+modification time, or the time their tables were stored, so that the
+results of a job and the later loads of its file reuse the plots already
+built. The pages address the plots by their output file, so that each
+user switches the tabs of their own results.
+"""
+
+from collections import OrderedDict
+import os
+import threading
+
+from werkzeug.security import safe_join
+
+try:
+    import result_store
+except ImportError:
+    result_store = None
+
+# How many output files keep their plots in memory
+MEMO_SIZE = 8
+DOWNLOADS_DIR = 'downloads'
+
+memo = OrderedDict()
+memo_lock = threading.Lock()
+
+
+class LazyPlots:
+    """A sequence of plots built on demand, in their order."""
+
+    def __init__(self, builders=()):
+        """Build the first plot, and the others in the background.
+
+        :param builders: iterable of functions without arguments, each
+            returning a plot.
+        """
+        self.condition = threading.Condition()
+        self.building = False
+        self.builders = list(builders)
+        self.plots = []
+        if self.builders:
+            self.build(0)
+            self.warm_up()
+
+    def build(self, index):
+        """Build the plots up to the index, one at a time, so that a tab
+        requested while the others are built in the background waits
+        only for the plots up to its own.
+
+        :param index: int.
+        """
+        while True:
+            with self.condition:
+                while self.building and len(self.plots) <= index:
+                    self.condition.wait()
+                if len(self.plots) > index or \
+                        len(self.plots) >= len(self.builders):
+                    return
+                self.building = True
+                builder = self.builders[len(self.plots)]
+            try:
+                self.plots.append(builder())
+            finally:
+                with self.condition:
+                    self.building = False
+                    self.condition.notify_all()
+
+    def warm_up(self):
+        """Build the remaining plots in a background thread."""
+        if len(self.plots) < len(self.builders):
+            threading.Thread(target=self.build, args=(len(self) - 1,),
+                             daemon=True).start()
+
+    def __len__(self):
+        return len(self.builders)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError('plot index out of range')
+        index %= len(self)
+        self.build(index)
+        return self.plots[index]
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+def memo_key(path):
+    """Identify the version of the output file by its stored tables,
+    as its export may be written later, or by the file itself.
+
+    :param path: str.
+    :return: tuple or None if the file does not exist.
+    """
+    if result_store is not None:
+        version = result_store.version(path)
+    else:
+        try:
+            version = os.path.getmtime(path)
+        except OSError:
+            version = None
+    return None if version is None else (path, version)
+
+
+def remember(path, plots):
+    """Memoize the plots of the output file.
+
+    :param path: str.
+    :param plots: LazyPlots or tuple.
+    :return: LazyPlots or tuple, the plots.
+    """
+    key = memo_key(path)
+    if key is not None:
+        with memo_lock:
+            memo[key] = plots
+            memo.move_to_end(key)
+            while len(memo) > MEMO_SIZE:
+                memo.popitem(last=False)
+    return plots
+
+
+def load(path, visualize):
+    """Get the memoized plots of the output file, or visualize it.
+
+    :param path: str.
+    :param visualize: function, accepting the path and returning the
+        plots.
+    :return: LazyPlots or tuple.
+    """
+    key = memo_key(path)
+    with memo_lock:
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+    return remember(path, visualize(path))
+
+
+def load_download(filename, visualize):
+    """Get the plots of the output file in the downloads folder, as
+    addressed by the page.
+
+    :param filename: str, the path of the file in the downloads folder.
+    :param visualize: function, accepting the path and returning the
+        plots.
+    :return: LazyPlots or tuple, or None if there is no such file.
+    """
+    path = safe_join(DOWNLOADS_DIR, filename)
+    if path is None or os.path.isdir(path) or memo_key(path) is None:
+        return None
+    return load(path, visualize)
@@ -9,6 +9,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly import offline
 from plotly.subplots import make_subplots
+from lazy_plots import LazyPlots
 
 color_palette = ['#B175E1', '#18A381', '#3595F0', '#ED5564', '#5E33BF',
                  '#003F51', '#A39300', '#EC40DB', '#C8582A', '#1E48DD',
@@ -32,20 +33,21 @@ def word_wrap(x, width):
 
 def visualize_data(df, query):
     """Create a number of html div object with various grant data
-    visualizations with Plotly.
+    visualizations with Plotly, building the first one at once and the
+    others on demand.
 
     :param df: pd.DataFrame.
     :param query: str.
-    :return: tuple[str]
+    :return: LazyPlots.
     """
 
-    return (
-        visualize_top_sources(df, query),
-        visualize_top_publishers(df, query),
-        visualize_top_authors(df, query),
-        visualize_refs_by_years(df, query),
-        visualize_top_refs_by_citations(df, query)
-    )
+    return LazyPlots((
+        lambda: visualize_top_sources(df, query),
+        lambda: visualize_top_publishers(df, query),
+        lambda: visualize_top_authors(df, query),
+        lambda: visualize_refs_by_years(df, query),
+        lambda: visualize_top_refs_by_citations(df, query)
+    ))
 
 
 def visualize_top_sources(df, query):
@@ -82,7 +84,7 @@ def visualize_top_sources(df, query):
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_publishers(df, query):
@@ -128,7 +130,7 @@ def visualize_top_publishers(df, query):
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_authors(df, query):
@@ -166,7 +168,7 @@ def visualize_top_authors(df, query):
     fig.update_yaxes(title_text=None, showgrid=True, gridcolor='#9D9D9C')
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_refs_by_years(df, query):
@@ -206,7 +208,7 @@ def visualize_refs_by_years(df, query):
     fig.update_yaxes(title_text=None, showgrid=True, gridcolor='#9D9D9C')
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_refs_by_citations(df, query):
@@ -283,14 +285,14 @@ def visualize_top_refs_by_citations(df, query):
         secondary_y=True
     )
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
-def visualize_excel(file: str) -> tuple:
+def visualize_excel(file: str) -> LazyPlots:
     """Return graphs objects from previously saved Excel file.
 
     :param file:
-    :return: tuple[str].
+    :return: LazyPlots.
     """
     with open(file, 'r', encoding='utf-8') as f:
         top = pd.read_csv(file, nrows=1, header=None)
@@ -11,6 +11,7 @@ which you would like to analyze for its focusing or collaborating
 cities.
 """
 
+import os
 import threading
 import urllib.parse
 import time
@@ -22,6 +23,8 @@ import requests
 import pandas as pd
 import plotly.express as px
 
+API_URL = os.environ.get('CLARIVATE_API_URL', 'https://api.clarivate.com')
+
 
 # The cities are to be stored in a list. If there is an existing organizational profile mentioned in the "our_org"
 # field, the program will store the list of cities associated with this org to keep them separate from the
@@ -138,26 +141,33 @@ def analyze_cities(records, our_org, cities, our_org_cities):
                 pass
 
 
-# This function sends the main API requests to retrieve the data
-def wos_api_request(i, search_query, records, requests_required):
+# This function sends the main API requests to retrieve the data, and returns the records of a single page
+def wos_api_request(i, search_query, requests_required):
     subsequent_response = requests.get(
-        f'https://api.clarivate.com/api/wos?databaseId=WOS&usrQuery={urllib.parse.quote(search_query)}&'
+        f'{API_URL}/api/wos?databaseId=WOS&usrQuery={urllib.parse.quote(search_query)}&'
         f'count=10&firstRecord={i}1', headers={'X-APIKey': app.apikey_window.get()}
     )
     data = subsequent_response.json()
     try:
-        for wos_record in data['Data']['Records']['records']['REC']:
-            records.append(wos_record)
+        records = data['Data']['Records']['records']['REC']
     # This is to prevent certain occasional connection problems
     except (requests.exceptions.ConnectionError, requests.exceptions.JSONDecodeError, KeyError):
         print(f'Resending WoS API request #{i + 1}')
         time.sleep(1)
-        wos_api_request(i, search_query, records, requests_required)
+        return wos_api_request(i, search_query, requests_required)
     print(f"{((i + 1) * 100) / requests_required:.1f}% complete")
     progress = ((i + 1) / requests_required) * 100
     app.progress_bar.config(value=progress)
     app.style.configure('Clarivate.Horizontal.TProgressbar', text=f'{progress:.1f}%')
     app.root.update_idletasks()
+    return records
+
+
+# This generator yields the pages of the records one by one, so that each of them is analyzed as soon as it arrives,
+# and only a single page of the raw records is kept in memory at any moment
+def wos_api_pages(search_query, requests_required):
+    for i in range(requests_required):
+        yield wos_api_request(i, search_query, requests_required)
 
 
 # Formatting the text lines for the function below
@@ -196,7 +206,7 @@ def unhide_symbols():
 def validate_api_key():
     user_apikey = app.apikey_window.get()
     validation_request = requests.get(
-        'https://api.clarivate.com/api/wos?databaseId=WOS&usrQuery=AU=Garfield&count=0&firstRecord=1',
+        f'{API_URL}/api/wos?databaseId=WOS&usrQuery=AU=Garfield&count=0&firstRecord=1',
         headers={'X-APIKey': user_apikey}
     )
     if validation_request.status_code == 200:
@@ -214,7 +224,7 @@ def validate_search():
         user_apikey = app.apikey_window.get()
         search_query = app.search_query_window.get("1.0", "end-1c")
         validation_request = requests.get(
-            f'https://api.clarivate.com/api/wos?databaseId=WOS&usrQuery={urllib.parse.quote(search_query)}&'
+            f'{API_URL}/api/wos?databaseId=WOS&usrQuery={urllib.parse.quote(search_query)}&'
             f'count=0&firstRecord=1', headers={'X-APIKey': user_apikey})
         if validation_request.status_code == 200:
             validation_data = validation_request.json()
@@ -241,7 +251,7 @@ def validate_affiliation():
     if validate_api_key():
         user_apikey = app.apikey_window.get()
         search_query = f'OG={app.our_org_window.get()}'
-        validation_request = requests.get(f'https://api.clarivate.com/api/wos?databaseId=WOS&'
+        validation_request = requests.get(f'{API_URL}/api/wos?databaseId=WOS&'
                                           f'usrQuery={urllib.parse.quote(search_query)}&count=0&firstRecord=1',
                                           headers={'X-APIKey': user_apikey})
         if validation_request.status_code == 200:
@@ -284,18 +294,16 @@ def main_function():
 
     # This is the initial API request
     initial_request = requests.get(
-        f'https://api.clarivate.com/api/wos?databaseId=WOS&usrQuery={urllib.parse.quote(search_query)}&count=0&'
+        f'{API_URL}/api/wos?databaseId=WOS&usrQuery={urllib.parse.quote(search_query)}&count=0&'
         f'firstRecord=1', headers={'X-APIKey': app.apikey_window.get()}
     )
     data = initial_request.json()
     requests_required = ((data['QueryResult']['RecordsFound'] - 1) // 10) + 1
-    records = []
 
     # From the first response, extracting the total number of records found and calculating the number of requests
     # required. The program can take up to a few dozen minutes, depending on the number of records being analyzed
-    for i in range(requests_required):
-        wos_api_request(i, search_query, records, requests_required)
-    analyze_cities(records, our_org, cities, our_org_cities)
+    for records in wos_api_pages(search_query, requests_required):
+        analyze_cities(records, our_org, cities, our_org_cities)
     output(our_org, search_query, app.exclude_collaborations.get(), cities, our_org_cities)
     app.search_button.config(state='active', text='Run')
     complete_message = f"Calculation complete. Please check the cities - {search_query} - {date.today()}.xlsx " \
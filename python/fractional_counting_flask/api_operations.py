@@ -3,8 +3,21 @@ Retrieve data from Web of Science Core Collection with Web of Science
 Expanded API.
 """
 
-import urllib.parse
-import requests
+import api_client
+
+
+def search_wos(apikey, query):
+    """Run the search query on the server side once, or reuse the recent
+    run of the same search query, e.g. by its validation.
+
+    :param apikey: str.
+    :param query: str.
+    :return: api_client.QuerySession.
+    """
+    return api_client.open_query(
+        apikey,
+        {'databaseId': 'WOS', 'usrQuery': query}
+    )
 
 
 def validate_search_query(apikey, query):
@@ -15,59 +28,23 @@ def validate_search_query(apikey, query):
     :param query: str.
     :return: int.
     """
-    test_request = requests.get(
-        url=f'https://api.clarivate.com/api/wos/?databaseId=WOS&usrQuery='
-            f'{urllib.parse.quote(query)}&count=0&firstRecord=1',
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-    if test_request.status_code == 200:
-        test_json = test_request.json()
-
-        return (test_request.status_code,
-                test_json['QueryResult']['RecordsFound'])
+    query_session = search_wos(apikey, query)
+    if query_session.status_code == 200:
+        return query_session.status_code, query_session.records_found
 
-    return (test_request.status_code,
-            test_request.json()['message'].split(':')[-1])
+    return query_session.status_code, query_session.message
 
 
-def retrieve_wos_metadata(apikey, search_query, first_record=1):
+def retrieve_wos_metadata(query_session, first_record=1, parsers=()):
     """Retrieve Web of Science full record metadata through Web of
-    Science Expanded API.
+    Science Expanded API by the query ID of the search, limited to the
+    fields read by the parsers.
 
-    :param apikey: str.
-    :param search_query: str.
+    :param query_session: api_client.QuerySession.
     :param first_record: int.
+    :param parsers: tuple.
     :return: dict.
     """
-    params = {
-        'databaseId': 'WOS',
-        'usrQuery': search_query,
-        'count': 100,
-        'firstRecord': first_record,
-    }
-    try:
-        result = requests.get(
-            url='https://api.clarivate.com/api/wos',
-            params=params,
-            headers={'X-ApiKey': apikey},
-            timeout=16
-        ).json()
-
-    # In case of hyper-authored papers in API response resulting in enormous JSON size
-    except (requests.ReadTimeout, requests.ConnectionError, requests.JSONDecodeError):
-        result = {'Data': {'Records': {'records': {'REC': []}}}}
-        params['count'] = 10
-        for i in range(10):
-            first_record += i*10
-            request = requests.get(
-                url='https://api.clarivate.com/api/wos',
-                params=params,
-                headers={'X-ApiKey': apikey},
-                timeout=64
-            )
-
-            rec_json = request.json()['Data']['Records']['records']['REC']
-            result['Data']['Records']['records']['REC'].extend(rec_json)
-
-    return result
+    # The page is split in case of hyper-authored papers in API response
+    # resulting in enormous JSON size
+    return query_session.records(first_record, parsers=parsers)
@@ -6,40 +6,25 @@ approach that retrieves data using Web of Science Expanded API.
 Main app file: manage Flask interface actions and rendering.
 """
 
-import json
-import state
-import time
+import jobs
+import plotly_js
+import result_store
 
-from flask import Flask, render_template, request, Response
-from data_processing import run_button
+from flask import Flask, render_template, request
+from data_processing import run_button, split_org_names
 from api_operations import validate_search_query
 from visualizations import visualize_excel
 from apikeys import EXPANDED_APIKEY
 
 
 app = Flask(__name__)
+app.register_blueprint(jobs.blueprint)
+app.register_blueprint(plotly_js.blueprint)
+app.register_blueprint(result_store.blueprint)
 
 plots_list = []
 
 
-@app.route("/stream")
-def stream():
-    def generate():
-        last_progress = -1
-        last_task = ""
-        while True:
-            if (state.progress != last_progress) or (state.current_task != last_task):
-                data = {
-                    "task": state.current_task,
-                    "progress": state.progress
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_progress = state.progress
-                last_task = state.current_task
-            time.sleep(0.2)
-    return Response(generate(), mimetype="text/event-stream")
-
-
 @app.route(rule="/", methods=['POST', 'GET'])
 def start_menu():
     """Manage Flask interface actions and rendering.
@@ -72,31 +57,18 @@ def search_section(button, search_query, org_name):
     """
     if search_query != '' and button == 'validate':
         return render_validation_results(search_query, org_name)
-    if search_query != '' and button == 'run':
-        plots_list.clear()
-        org_name_quoted = False
-        if org_name[0] == org_name[-1] == '"':
-            org_name_quoted = True
-            org_name = org_name[1:-1]
-        safe_filename, plots = run_button(EXPANDED_APIKEY, search_query, org_name)
-        for plot in plots:
-            plots_list.append(plot)
-        if org_name_quoted:
-            return render_template(
-                'index.html',
-                filename=safe_filename,
-                search_query=search_query,
-                org_name=f'"{org_name}"',
-                plot=plots_list[0],
-                index=0
-            )
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'run',
+            search_query=search_query,
+            org_name=org_name,
+            refresh=button == 'refresh'
+        )
         return render_template(
             'index.html',
-            filename=safe_filename,
+            job_id=job_id,
             search_query=search_query,
-            org_name=org_name,
-            plot=plots_list[0],
-            index=0
+            org_name=org_name
         )
     return render_template('index.html', search_query='')
 
@@ -110,7 +82,11 @@ def render_validation_results(search_query, org_name):
     result: render_template.
     """
     response_1 = validate_search_query(EXPANDED_APIKEY, search_query)
-    response_2 = validate_search_query(EXPANDED_APIKEY, f'OG={org_name}')
+    response_2 = validate_search_query(
+        EXPANDED_APIKEY,
+        ' OR '.join(f'OG={org.strip()}' for org in org_name.split(';')
+                    if org.strip())
+    )
     if response_1[0] == 200 and (response_2[0] == 200 and response_2[1] != 0):
         return render_template(
             'index.html',
@@ -179,5 +155,45 @@ def load_file_section(file):
     return render_template('index.html', plot=plots_list[0], index=0)
 
 
+def render_run_results(job):
+    """Render the results of the finished 'Run' job, or its error.
+
+    :param job: dict.
+    :return: render_template.
+    """
+    if job['status'] == 'failed':
+        return render_template(
+            'index.html',
+            error_message_1=job['error'],
+            **job['params']
+        )
+    plots_list.clear()
+    for plot in job['result']['plots']:
+        plots_list.append(plot)
+    return render_template(
+        'index.html',
+        filename=job['result']['filename'],
+        plot=plots_list[0],
+        index=0,
+        **job['params']
+    )
+
+
+@jobs.task('run', render=render_run_results)
+def run_job(search_query, org_name):
+    """Run the retrieval and the analysis in a background job.
+
+    :param search_query: str.
+    :param org_name: str, one or several organizations separated by
+        semicolons, each in double quotes for the exact match.
+    :return: dict.
+    """
+    org_names = split_org_names(org_name)
+    if not org_names:
+        raise ValueError('Please enter the affiliation name')
+    safe_filename, plots = run_button(EXPANDED_APIKEY, search_query, org_names)
+    return {'filename': safe_filename, 'plots': plots}
+
+
 if __name__ == '__main__':
     app.run(debug=True)
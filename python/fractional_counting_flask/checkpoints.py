@@ -0,0 +1,165 @@
+"""
+Checkpoints of the long retrieval loops, so that a job interrupted by a
+network failure, a crash or the restart of the app resumes from the last
+completed page instead of retrieving everything again.
+
+The result of every completed page of a loop is saved to its own file in
+the CHECKPOINT_DIR folder of the loop, keyed by the parameters of the
+search and the number of records found, as the QueryID changes when the
+search is run again, or by the documents of the per-document loops, and
+by the page, i.e. its offset or document. The next run of the same loop
+reads the saved pages instead of requesting them, unless they were saved
+before the job refreshing its results was submitted. The checkpoints of
+a job are deleted when it is finished, unless another running job with
+the same search uses them, and the ones left by the failed jobs after
+CHECKPOINT_RETENTION.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+import zlib
+import state
+
+CHECKPOINT_DIR = os.path.join('jobs', 'checkpoints')
+CHECKPOINT_RETENTION = 24 * 60 * 60
+
+# How many running jobs use each checkpoint folder
+users = {}
+users_lock = threading.Lock()
+
+
+def digest(value):
+    """Hash the key of a loop or a page into a file name.
+
+    :param value: any JSON-serializable value.
+    :return: str.
+    """
+    serialized = json.dumps(value, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:32]
+
+
+class Checkpoint:
+    """The completed pages of a retrieval loop."""
+
+    def __init__(self, name, *key):
+        """Open the checkpoint of the loop, creating it if necessary.
+
+        :param name: str, the name of the loop.
+        :param key: the values identifying the loop, e.g. the search.
+        """
+        self.folder = os.path.join(CHECKPOINT_DIR, digest([name, *key]))
+        job = state.current()
+        with users_lock:
+            os.makedirs(self.folder, exist_ok=True)
+            if job.job_id is None:
+                return
+            folders = job.get('checkpoint folders', set)
+            if self.folder not in folders:
+                folders.add(self.folder)
+                users[self.folder] = users.get(self.folder, 0) + 1
+
+    def load(self, page):
+        """Read the saved result of the page.
+
+        :param page: the page, e.g. its firstRecord value.
+        :return: the result, or None if the page is not completed.
+        """
+        fresh_since = state.current().fresh_since
+        try:
+            with open(os.path.join(self.folder, digest(page)), 'rb') as f:
+                if fresh_since is not None and \
+                        os.fstat(f.fileno()).st_mtime < fresh_since:
+                    return None
+                return pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            print(f'Oops, the checkpoint of page {page} is damaged - '
+                  f'retrieving it again...')
+            return None
+
+    def save(self, page, result):
+        """Save the result of the completed page.
+
+        :param page: the page, e.g. its firstRecord value.
+        :param result: any picklable value but None.
+        """
+        file = os.path.join(self.folder, digest(page))
+        temporary = f'{file}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(zlib.compress(pickle.dumps(result), 1))
+        os.replace(temporary, file)
+
+    def fetch(self, page, request_page):
+        """Get the result of the page from the checkpoint, or request it
+        and save it.
+
+        :param page: the page, e.g. its firstRecord value.
+        :param request_page: function accepting the page.
+        :return: the result of the page.
+        """
+        result = self.load(page)
+        if result is None:
+            result = request_page(page)
+            self.save(page, result)
+        return result
+
+
+def resumable(request_page, name, *key):
+    """Wrap the function requesting the pages of a loop, e.g. for
+    fetch_pages, so that the pages completed by an earlier run of the
+    same loop are read from its checkpoint.
+
+    :param request_page: function accepting a single page argument.
+    :param name: str, the name of the loop.
+    :param key: the values identifying the loop, e.g. the search.
+    :return: function.
+    """
+    checkpoint = Checkpoint(name, *key)
+    return lambda page: checkpoint.fetch(page, request_page)
+
+
+def begin():
+    """Delete the checkpoints left too long ago by the failed jobs,
+    before the job run in the calling thread opens its own."""
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return
+    with users_lock:
+        for folder in os.scandir(CHECKPOINT_DIR):
+            if folder.path in users:
+                continue
+            try:
+                if folder.stat().st_mtime < \
+                        time.time() - CHECKPOINT_RETENTION:
+                    shutil.rmtree(folder.path, ignore_errors=True)
+            except OSError:
+                pass
+
+
+def release(delete=False):
+    """Stop using the checkpoints opened by the job run in the calling
+    thread, deleting the ones no other running job uses if requested.
+
+    :param delete: bool, whether the results of the job are saved.
+    """
+    folders = state.current().get('checkpoint folders', set)
+    with users_lock:
+        for folder in folders:
+            users[folder] -= 1
+            if users[folder] == 0:
+                del users[folder]
+                if delete:
+                    shutil.rmtree(folder, ignore_errors=True)
+        folders.clear()
+
+
+def discard():
+    """Delete the checkpoints opened by the job run in the calling
+    thread, once its results are saved, unless another running job
+    uses them."""
+    release(delete=True)
@@ -2,272 +2,346 @@
 Manage all the data operations: the main function that gets executed
 after the 'run' button is pressed, data retrieval through the APIs
 and parsing the required metadata fields.
+
+The records are flattened into a table of the links between their
+authors and addresses, and the output of the organizations is counted
+from it with several counting schemes at once:
+- full (whole) counting: every document affiliated with the
+  organization counts as 1;
+- complete-normalized (author-level fractional) counting: every author
+  has an equal share of the document, split equally between the
+  author's addresses;
+- straight counting: the document counts as 1 for the organizations of
+  its first author only.
 """
 
 from datetime import date
+import checkpoints
+import result_store
 import state
+import numpy as np
 import pandas as pd
-from api_operations import retrieve_wos_metadata
+from api_client import (
+    check_annual_quota,
+    fetch_pages,
+    retry_budget,
+    start_job,
+    view_fields
+)
+from api_operations import retrieve_wos_metadata, search_wos
 from visualizations import visualize_data
 
 
-def run_button(apikey, search_query, org_name):
+def run_button(apikey, search_query, org_names):
     """When the 'Run' button is pressed, manage all the API operations,
     data processing, and visualizations
 
     :param apikey: str.
     :param search_query: str.
-    :param org_name: str.
+    :param org_names: list[str], one or several organizations counted in
+        the same pass over the records.
     :return: str, tuple.
     """
 
-    records = []
+    start_job()
 
-    state.progress = 0
-    state.current_task = "Retrieving Web of Science Documents"
+    state.update(0, "Retrieving Web of Science Documents")
 
-    # Send initial API call to get the number of requests to paginate
-    initial_json = retrieve_wos_metadata(apikey, search_query)
-    records.extend(initial_json['Data']['Records']['records']['REC'])
-    total_results = initial_json['QueryResult']['RecordsFound']
+    # Run the search to get the number of requests to paginate, and check
+    # it against the annual quota before any records are retrieved
+    query_session = search_wos(apikey, search_query)
+    total_results = query_session.records_found
     requests_required = ((total_results - 1) // 100) + 1
     max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
+    initial_json = retrieve_wos_metadata(
+        query_session, parsers=(flatten_records,)
+    )
+    # Every page is flattened as soon as it arrives, and only its compact
+    # tables are kept rather than its records
+    pages = [flatten_records(initial_json['Data']['Records']['records']['REC'])]
 
     # Send actual API calls
-    for i in range(1, max_requests):
-        subsequent_json = retrieve_wos_metadata(apikey, search_query, 100*i+1)
-
-        records.extend(subsequent_json['Data']['Records']['records']['REC'])
-        state.progress = (i + 1) / max_requests * 100
+    subsequent_pages = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: flatten_page(query_session, first_record),
+            'flattened records',
+            query_session.params, query_session.records_found
+        ),
+        [100*i+1 for i in range(1, max_requests)]
+    )
+    for i, page in enumerate(subsequent_pages, start=1):
+        pages.append(page)
+        state.update((i + 1) / max_requests * 100)
 
     # Calculate fractions
-    frac_counts = count_fractions(records, org_name)
+    documents, links = concat_pages(pages)
+    frac_counts = count_fractions(documents, links, org_names)
 
     # Create dataframes and output file name
-    df2, safe_filename = output(frac_counts, search_query, org_name)
+    df2, safe_filename = output(frac_counts, search_query, org_names)
 
     # Create the plot
-    plots = visualize_data(df2, search_query, org_name)
+    plots = visualize_data(df2, search_query, '; '.join(org_names))
+
+    state.update(0, "")
 
-    state.progress = 0
-    state.current_task = ""
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return f'{safe_filename}.xlsx', plots
 
 
-def count_fractions(records, our_org):
-    """Extract the publication year from the document, check if there
-    is one or multiple affiliations in it, and launch one of two
-    address analysis functions based on that, then append the results
-    to the frac_count list.
+def org_name_index(org_names):
+    """Map the lowercase names of the organizations to their positions,
+    so that the names in the records are lowered and matched once.
 
-    :param records: list.
-    :param our_org: str.
+    :param org_names: list[str].
+    :return: dict[str, int].
     """
-    result = []
-    for record in records:
-        pub_info = record['static_data']['summary']['pub_info']
-        addresses = record['static_data']['fullrecord_metadata']['addresses']
-        if 'early_access_year' in pub_info:
-            pub_year = pub_info['early_access_year']
-        else:
-            pub_year = pub_info['pubyear']
-        if addresses['count'] == 1:
-            doc_level_fraction, our_authors_input = \
-                single_address_doc_check(record, our_org)
-        else:
-            doc_level_fraction, our_authors_input = \
-                multiaddress_doc_check(record, our_org)
-        result.append({
-            'UT': record['UID'],
-            'Publication_year': pub_year,
-            'Our_authors': our_authors_input,
-            'Fractional_value': doc_level_fraction})
-
-    return result
-
+    return {org.lower(): i for i, org in enumerate(org_names)}
 
-def single_address_doc_check(paper, our_org):
-    """When there is only one affiliation in the paper. Call the
-    function for calculating the author numbers and count our
-    organization's fractional output for a given document.
 
-    :param paper: dict.
-    :param our_org: str.
-    :return: float, list.
-    """
+def as_list(value):
+    """Wrap the single element of a record field into a list, as the
+    API returns the fields with one element as that element.
 
-    address_dict = paper['static_data']['fullrecord_metadata']['addresses']
-    authors = authors_check(paper['static_data']['summary']['names'])
-    if not authors:
-        return 0, 0
-    our_authors = 0
-    if 'address_name' in address_dict:
-        for org in (
-                address_dict['address_name']['address_spec']['organizations']
-                ['organization']
-        ):
-            if 'content' in org:
-                if org['content'].lower() == our_org.lower():
-                    if 'names' in address_dict['address_name']:
-                        our_authors = address_dict['address_name']['names']['count']
-    doc_level_fraction = our_authors / authors
-
-    return doc_level_fraction, our_authors
-
-
-def authors_check(authors_json):
-    """Calculate the number of the authors in the document
-
-    :param authors_json: dict.
-    :return: int.
+    :param value: dict or list.
+    :return: list.
     """
+    return [value] if isinstance(value, dict) else value
 
-    if isinstance(authors_json['name'], dict):
-        if authors_json['name']['role'] == "author":
-            return 1
-        return 0
-
-    return sum(person['role'] == 'author' for person in authors_json['name'])
 
+@view_fields('pub_info', 'names', 'addresses')
+def flatten_records(records):
+    """Flatten the records into a table of the documents, and a compact
+    columnar table of the links between their authors and addresses,
+    with a row for every author, address and preferred organization
+    name of the address. The addresses without any preferred name have
+    a missing Organization, and the organizations of the addresses
+    without any linked authors have the seq_no 0.
 
-def multiaddress_doc_check(paper, our_org):
-    """Check for a rare case when the number of authors in the document
-    is 0, launch the standard_case_address_check function, calculate
-    the fractional counting value for the document from the
-    total_au_input and authors values returned by that function.
-
-    :param paper: dict.
-    :param our_org: str.
-    :return fractional_counting_paper: float.
-    :return our_authors: int.
+    :param records: list.
+    :return: pd.DataFrame, pd.DataFrame, the documents and the links.
     """
+    uts, pub_years, authors_counts, first_authors = [], [], [], []
+    # The authors linked to every address, and how many of them there are
+    address_documents, address_numbers, address_authors = [], [], []
+    link_authors = []
+    org_documents, org_addresses, org_names = [], [], []
+    for document, record in enumerate(records):
+        pub_info = record['static_data']['summary']['pub_info']
+        names = record['static_data']['summary']['names']
+        addresses = record['static_data']['fullrecord_metadata']['addresses']
+        if 'early_access_year' in pub_info:
+            pub_year = pub_info['early_access_year']
+        else:
+            pub_year = pub_info['pubyear']
+        authors = [int(person['seq_no']) for person in as_list(names['name'])
+                   if person['role'] == 'author']
+        uts.append(record['UID'])
+        pub_years.append(pub_year)
+        authors_counts.append(len(authors))
+        first_authors.append(min(authors, default=0))
+        if 'address_name' not in addresses:
+            continue
+        for affiliation in as_list(addresses['address_name']):
+            address_spec = affiliation['address_spec']
+            addr_no = int(address_spec['addr_no'])
+            if 'organizations' in address_spec:
+                for org in as_list(address_spec['organizations']['organization']):
+                    if org['pref'] == 'Y' and 'content' in org:
+                        org_documents.append(document)
+                        org_addresses.append(addr_no)
+                        org_names.append(org['content'])
+            if 'names' in affiliation:
+                seq_numbers = [
+                    int(person['seq_no'])
+                    for person in as_list(affiliation['names']['name'])
+                    if person['role'] == 'author'
+                ]
+                address_documents.append(document)
+                address_numbers.append(addr_no)
+                address_authors.append(len(seq_numbers))
+                link_authors.extend(seq_numbers)
+
+    documents = pd.DataFrame({
+        'UT': uts,
+        'Publication_year': pub_years,
+        'Authors': np.array(authors_counts, dtype=np.int32),
+        'First_author': np.array(first_authors, dtype=np.int32)
+    })
+    links = pd.DataFrame({
+        'document': np.repeat(np.array(address_documents, dtype=np.int32),
+                              address_authors),
+        'seq_no': np.array(link_authors, dtype=np.int32),
+        'addr_no': np.repeat(np.array(address_numbers, dtype=np.int32),
+                             address_authors)
+    }).drop_duplicates()
+    # The share of each address in the author's input to the document
+    links['share'] = 1 / links.groupby(
+        ['document', 'seq_no'], sort=False
+    )['addr_no'].transform('size')
+    address_orgs = pd.DataFrame({
+        'document': np.array(org_documents, dtype=np.int32),
+        'addr_no': np.array(org_addresses, dtype=np.int32),
+        'Organization': pd.Categorical(org_names)
+    }).drop_duplicates()
+    links = links.merge(address_orgs, how='outer', on=['document', 'addr_no'])
+    links = links.fillna({'seq_no': 0, 'share': 0}).astype(
+        {'seq_no': np.int32, 'share': np.float64}
+    )
 
-    authors = authors_check(paper['static_data']['summary']['names'])
-    # A rare case with no authors (i.e., only the "group author")
-    if authors == 0:
-        doc_level_fraction = 0
-        our_authors_input = 0
-    else:
-        total_au_input, authors, our_authors_input = \
-            address_check(paper, authors, our_org)
-        doc_level_fraction = total_au_input / authors
-
-    return doc_level_fraction, our_authors_input
+    return documents, links
 
 
-def address_check(paper, authors, our_org):
-    """Figure out who of the authors are affiliated with our
-    organization, launch the standard_case_affiliation_check function,
-    calculate the total author input value from individual author input
-    values returned by it.
+def flatten_page(query_session, first_record):
+    """Retrieve a page of the records and flatten it in the worker
+    thread, so that its JSON is dropped as soon as it is parsed.
 
-    :param paper: dict.
-    :param authors: int.
-    :param our_org: str.
-    :return: float, int, int.
+    :param query_session: api_client.QuerySession.
+    :param first_record: int.
+    :return: pd.DataFrame, pd.DataFrame, see flatten_records.
     """
-
-    our_authors_seq_numbers = set()
-    doc_level_fraction = 0
-    addresses = paper['static_data']['fullrecord_metadata']['addresses']
-    if 'address_name' in addresses:
-        for affiliation in addresses['address_name']:
-            if 'organizations' in affiliation['address_spec']:
-                for org in affiliation['address_spec']['organizations']['organization']:
-                    for seq_no in fetch_seq_numbers(affiliation, org, our_org):
-                        our_authors_seq_numbers.add(seq_no)
-
-    our_authors = len(our_authors_seq_numbers)
-    names = paper['static_data']['summary']['names']
-    addresses = paper['static_data']['fullrecord_metadata']['addresses']
-    if names['count'] == 1:
-        if "addr_no" in names['name']:
-            au_affils = str(names['name']['addr_no']).split(' ')
-            doc_level_fraction = affiliation_check(addresses, au_affils, our_org)
-
-    else:
-        for author in our_authors_seq_numbers:
-            au_affils = str(names['name'][int(author)-1]['addr_no']).split(' ')
-            doc_level_fraction += affiliation_check(addresses, au_affils, our_org)
-
-    return doc_level_fraction, authors, our_authors
+    page_json = retrieve_wos_metadata(
+        query_session, first_record, parsers=(flatten_records,)
+    )
+    return flatten_records(page_json['Data']['Records']['records']['REC'])
 
 
-def fetch_seq_numbers(affiliation, org, our_org):
-    """Get the sequence number of our organization's authors.
+def concat_pages(pages):
+    """Join the tables of the flattened pages into the tables of all the
+    records, numbering the documents in the order of the pages.
 
-    :params affiliation: dict.
-    :params org: dict.
-    :params our_org: str.
-    :return: list.
+    :param pages: list[tuple[pd.DataFrame, pd.DataFrame]].
+    :return: pd.DataFrame, pd.DataFrame, see flatten_records.
     """
+    # The organizations stay categorical if all the pages share the names
+    organizations = pd.Index([]).append(
+        [links['Organization'].cat.categories for _, links in pages]
+    ).unique()
+    offset = 0
+    for documents, links in pages:
+        links['document'] += offset
+        links['Organization'] = links['Organization'].cat.set_categories(
+            organizations
+        )
+        offset += len(documents)
+
+    return (pd.concat([documents for documents, _ in pages], ignore_index=True),
+            pd.concat([links for _, links in pages], ignore_index=True))
+
+
+def count_fractions(documents, links, our_orgs):
+    """Count the output of our organizations in every document with all
+    the counting schemes at once: the number of their authors, the
+    complete-normalized fractional value and the straight counting
+    value. The preferred organization names are lowered and matched
+    once for each distinct name rather than for every link.
+
+    With a single organization, every document of the search is
+    counted for it. With several of them, a document is only counted
+    for the organizations it is affiliated with.
+
+    :param documents: pd.DataFrame, see flatten_records.
+    :param links: pd.DataFrame, see flatten_records.
+    :param our_orgs: list[str].
+    :return: pd.DataFrame.
+    """
+    org_index = org_name_index(our_orgs)
+    name_codes = np.array(
+        [org_index.get(name.lower(), -1)
+         for name in links['Organization'].cat.categories] + [-1],
+        dtype=np.int32
+    )
+    # The missing names have the code -1, i.e. the last one
+    org = name_codes[links['Organization'].cat.codes.to_numpy()]
+    ours = links.loc[org >= 0, ['document', 'seq_no', 'addr_no', 'share']]
+    ours['org'] = org[org >= 0]
+    ours = ours.drop_duplicates(['document', 'seq_no', 'addr_no', 'org'])
+
+    authors = ours[ours['seq_no'] > 0]
+    counts = authors.groupby(['document', 'org']).agg(
+        Our_authors=('seq_no', 'nunique'),
+        share=('share', 'sum')
+    )
+    first_author = documents['First_author'].to_numpy()[
+        authors['document'].to_numpy()
+    ]
+    counts['Straight_value'] = (
+        authors[authors['seq_no'].to_numpy() == first_author]
+        .groupby(['document', 'org']).size()
+    )
+    affiliated = ours.groupby(['document', 'org']).size().index
+    if len(our_orgs) == 1:
+        affiliated = pd.MultiIndex.from_product(
+            [documents.index, [0]], names=['document', 'org']
+        )
+    counts = counts.reindex(affiliated, fill_value=0).fillna(0)
+
+    result = documents.iloc[counts.index.get_level_values('document')]
+    result = result.reset_index(drop=True)
+    authors_counts = result['Authors'].to_numpy()
+    if len(our_orgs) > 1:
+        result.insert(2, 'Organization', np.array(our_orgs, dtype=object)[
+            counts.index.get_level_values('org')
+        ])
+    result['Our_authors'] = counts['Our_authors'].to_numpy()
+    result['Fractional_value'] = np.divide(
+        counts['share'].to_numpy(), authors_counts,
+        out=np.zeros(len(result)), where=authors_counts > 0
+    )
+    result['Straight_value'] = (counts['Straight_value'].to_numpy() > 0
+                                ).astype(int)
 
-    name_match = (org['pref'] == 'Y' and org['content'].lower() ==
-                  our_org.lower())
-
-    if 'names' in affiliation:
-        if name_match and affiliation['names']['count'] == 1 and \
-                affiliation['names']['name']['role'] == 'author':
-
-            return [affiliation['names']['name']['seq_no']]
-
-        if name_match and affiliation['names']['count'] > 1:
-
-            return [
-                our_author['seq_no'] for our_author in
-                affiliation['names']['name'] if our_author['role'] == 'author'
-            ]
-
-    return []
+    return result.drop(columns=['Authors', 'First_author'])
 
 
-def affiliation_check(addresses_json, au_affils, our_org):
-    """For every affiliation, check if it's our organization's
-    affiliation, and calculate the individual author's inputs (or, in
-    other words, their fractional values of the document).
+def split_org_names(org_name):
+    """Split the Affiliation field into the distinct organizations,
+    separated by semicolons and optionally in double quotes for the
+    exact match.
 
-    :param addresses_json: dict.
-    :param au_affils: list.
-    :param our_org: str.
-    :return au_input: float.
+    :param org_name: str.
+    :return: list[str].
     """
+    org_names = {}
+    for org in org_name.split(';'):
+        org = org.strip()
+        if len(org) > 1 and org[0] == org[-1] == '"':
+            org = org[1:-1]
+        if org:
+            org_names.setdefault(org.lower(), org)
+    return list(org_names.values())
 
-    our_input = 0
-    for c_1 in au_affils:
-        if 'address_name' in addresses_json:
-            affiliation = addresses_json['address_name'][int(c_1) - 1]
-            if 'organizations' in affiliation['address_spec']:
-                for org in affiliation['address_spec']['organizations']['organization']:
-                    if org['pref'] == 'Y' and org['content'].lower() == our_org.lower():
-                        our_input += 1 / len(au_affils)
 
-    return our_input
-
-
-def output(frac_counts, search_query, org_name):
+def output(frac_counts, search_query, org_names):
     """Create dataframes, create a safe filename and save data into an
-    Excel file.
+    Excel file. With several organizations, the tables are in the long
+    format, with a row for every organization.
 
-    :param frac_counts: list[dict].
+    :param frac_counts: pd.DataFrame, see count_fractions.
     :param search_query: str.
-    :param org_name: str.
+    :param org_names: list[str].
     :return: pd.DataFrame, str.
 
     """
     # Creating dataframes
-    df = pd.DataFrame(frac_counts)
-    df2 = (df[['UT', 'Publication_year']].groupby('Publication_year').count())
-    df2.rename(columns={'UT': 'Whole Counting'}, inplace=True)
-    df2['Fractional Counting'] = (df[['Fractional_value', 'Publication_year']].
-                                  groupby('Publication_year').sum())
+    df = frac_counts
+    groups = (['Publication_year'] if len(org_names) == 1
+              else ['Organization', 'Publication_year'])
+    df2 = df.groupby(groups).agg(**{
+        'Whole Counting': ('UT', 'count'),
+        'Fractional Counting': ('Fractional_value', 'sum'),
+        'Straight Counting': ('Straight_value', 'sum')
+    })
     df2.reset_index(inplace=True)
     df3 = pd.DataFrame(
-        {'Search Query': [search_query], 'Affiliation': [org_name]},
+        {'Search Query': [search_query], 'Affiliation': ['; '.join(org_names)]},
         index=None
     )
 
-    # Save results to an Excel file
+    # Save results, exported to an Excel file in the background
     safe_search_query = search_query.replace('"', '').replace('*', '')
     filename = f'fractional counting - {safe_search_query} - {date.today()}'
     if len(filename) > 218:
@@ -275,9 +349,10 @@ def output(frac_counts, search_query, org_name):
     else:
         safe_filename = filename
 
-    with pd.ExcelWriter(f'downloads/{safe_filename}.xlsx') as writer:
-        df.to_excel(writer, sheet_name='Document-level Data', index=False)
-        df2.to_excel(writer, sheet_name='Annual Dynamics', index=False)
-        df3.to_excel(writer, sheet_name='Query Parameters', index=False)
+    result_store.save(f'downloads/{safe_filename}.xlsx', {
+        'Document-level Data': df,
+        'Annual Dynamics': df2,
+        'Query Parameters': df3
+    })
 
     return df2, safe_filename
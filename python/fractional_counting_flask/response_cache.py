@@ -0,0 +1,281 @@
+"""
+A persistent on-disk cache of the API responses, so that re-running the
+same search, or validating it and then running it, does not download
+the same pages again.
+
+The compressed JSON bodies are stored in an SQLite database under
+CACHE_DIR, keyed by the hash of the request URL and its sorted
+parameters. The pages retrieved by a QueryID are also keyed by the
+parameters of the search that created it, as the server numbers the
+QueryIDs of its sessions anew, e.g. after a restart, and are not cached
+without them. Each endpoint has its own time to live, and the least
+recently used responses are evicted when the cache grows above
+CACHE_MAX_BYTES. Each thread keeps its own connection to the database,
+which is written in the WAL mode so that the threads retrieving the
+pages concurrently do not wait for each other's reads, and the size of
+the cache is counted once and then kept up to date by the stores. In
+the offline mode, the responses are only read from the cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+import requests
+
+CACHE_DIR = 'cache'
+CACHE_MAX_BYTES = 1024 ** 3
+
+# 'normal' to read and write the cache, 'offline' to only read from it
+# without sending any API calls, 'off' to bypass it completely
+CACHE_MODE = 'normal'
+
+DAY = 24 * 60 * 60
+
+# Time to live in seconds, by the last matching segment of the URL path
+CACHE_TTLS = {
+    'wos': 7 * DAY,
+    'references': 30 * DAY,
+    'citing': DAY,
+    'recordids': DAY,
+    'query': DAY,
+    'wos-researcher': DAY,
+}
+
+# Searches returning only the number of records found go stale sooner
+COUNT_ONLY_TTL = DAY
+
+# The endpoints retrieving the pages of a search by its QueryID
+QUERY_ID_ENDPOINTS = ('query', 'recordids')
+
+local = threading.local()
+# Guards the creation of the database and the size of the cache
+lock = threading.Lock()
+created = False
+# The bytes of the cached responses, None until counted
+total_size = None
+
+
+def connect():
+    """Get the connection of the calling thread to the cache database,
+    creating the database on the first use.
+
+    :return: sqlite3.Connection.
+    """
+    global created
+    connection = getattr(local, 'connection', None)
+    if connection is not None:
+        return connection
+    with lock:
+        if not created:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+        connection = sqlite3.connect(
+            os.path.join(CACHE_DIR, 'responses.sqlite3'),
+            timeout=30
+        )
+        if not created:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, '
+                'body BLOB NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'stored REAL NOT NULL, '
+                'expires REAL NOT NULL, '
+                'used REAL NOT NULL)'
+            )
+            created = True
+    local.connection = connection
+    return connection
+
+
+def cache_key(url, params, search=None):
+    """Calculate the content address of the request.
+
+    :param url: str.
+    :param params: dict or None.
+    :param search: dict or None, the parameters of the search that
+        created the QueryID of the url.
+    :return: str.
+    """
+    request = [url, sorted((params or {}).items())]
+    if search is not None:
+        request.append(sorted(search.items()))
+    request = json.dumps(request, default=str)
+    return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+
+def endpoint(url):
+    """Find the endpoint of the request, i.e. the last segment of the
+    URL path with a time to live.
+
+    :param url: str.
+    :return: str or None.
+    """
+    for segment in reversed(urlparse(url).path.split('/')):
+        if segment in CACHE_TTLS:
+            return segment
+    return None
+
+
+def is_cacheable(url, search):
+    """Check if the response can be cached: a page retrieved by a
+    QueryID only with the search that created the QueryID.
+
+    :param url: str.
+    :param search: dict or None.
+    :return: bool.
+    """
+    return search is not None or endpoint(url) not in QUERY_ID_ENDPOINTS
+
+
+def time_to_live(url, params):
+    """Find the time to live for the endpoint of the request.
+
+    :param url: str.
+    :param params: dict or None.
+    :return: int.
+    """
+    if params and params.get('count') == 0:
+        return COUNT_ONLY_TTL
+    return CACHE_TTLS.get(endpoint(url), DAY)
+
+
+def load(url, params, search=None, stored_after=None):
+    """Return the cached response for the request, if there is one
+    that has not expired yet.
+
+    :param url: str.
+    :param params: dict or None.
+    :param search: dict or None, the parameters of the search that
+        created the QueryID of the url.
+    :param stored_after: float or None, to skip the responses stored
+        before this time.
+    :return: requests.Response or None.
+    """
+    if CACHE_MODE == 'off' or not is_cacheable(url, search):
+        return None
+    key = cache_key(url, params, search)
+    connection = connect()
+    with connection:
+        row = connection.execute(
+            'SELECT body FROM responses WHERE key = ? AND expires > ? '
+            'AND stored >= ?',
+            (key, time.time(), stored_after or 0)
+        ).fetchone()
+        if row is not None:
+            connection.execute(
+                'UPDATE responses SET used = ? WHERE key = ?',
+                (time.time(), key)
+            )
+    if row is None:
+        return None
+    return build_response(url, 200, zlib.decompress(row[0]))
+
+
+def store(url, params, response, search=None):
+    """Save a successful response into the cache, evicting the least
+    recently used ones if the cache has grown too big.
+
+    :param url: str.
+    :param params: dict or None.
+    :param response: requests.Response.
+    :param search: dict or None, the parameters of the search that
+        created the QueryID of the url.
+    """
+    if CACHE_MODE != 'normal' or response.status_code != 200 or \
+            not is_cacheable(url, search):
+        return
+    global total_size
+    key = cache_key(url, params, search)
+    body = zlib.compress(response.content)
+    now = time.time()
+    connection = connect()
+    with lock:
+        if total_size is None:
+            total_size = cached_size(connection)
+    with connection:
+        replaced = connection.execute(
+            'SELECT size FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        connection.execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+            (key, body, len(body), now, now + time_to_live(url, params),
+             now)
+        )
+    with lock:
+        total_size += len(body) - (replaced[0] if replaced else 0)
+        if total_size > CACHE_MAX_BYTES:
+            with connection:
+                total_size = evict(connection)
+
+
+def cached_size(connection):
+    """Count the bytes of the cached responses.
+
+    :param connection: sqlite3.Connection.
+    :return: int.
+    """
+    return connection.execute(
+        'SELECT COALESCE(SUM(size), 0) FROM responses'
+    ).fetchone()[0]
+
+
+def evict(connection):
+    """Delete the expired responses, then the least recently used ones
+    until the cache fits into CACHE_MAX_BYTES.
+
+    :param connection: sqlite3.Connection.
+    :return: int, the bytes of the responses left.
+    """
+    connection.execute(
+        'DELETE FROM responses WHERE expires <= ?', (time.time(),)
+    )
+    size = cached_size(connection)
+    if size <= CACHE_MAX_BYTES:
+        return size
+    for key, response_size in connection.execute(
+            'SELECT key, size FROM responses ORDER BY used').fetchall():
+        connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+        size -= response_size
+        if size <= CACHE_MAX_BYTES:
+            break
+    return size
+
+
+def offline_miss(url):
+    """Build the response returned in the offline mode for the requests
+    missing from the cache.
+
+    :param url: str.
+    :return: requests.Response.
+    """
+    return build_response(
+        url,
+        504,
+        json.dumps({
+            'message': 'Offline mode: the response is not in the cache'
+        }).encode('utf-8')
+    )
+
+
+def build_response(url, status_code, content):
+    """Wrap the response body into a requests.Response object, so that
+    the cached responses can be used as the real ones.
+
+    :param url: str.
+    :param status_code: int.
+    :param content: bytes.
+    :return: requests.Response.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    response._content = content
+    return response
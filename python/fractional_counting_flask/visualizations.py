@@ -4,10 +4,10 @@ objects.
 """
 
 import textwrap
-import pandas as pd
 import plotly.graph_objects as go
 from plotly import offline
 from plotly.subplots import make_subplots
+import result_store
 
 color_palette = ['#B175E1', '#18A381', '#3595F0', '#ED5564', '#5E33BF',
                  '#003F51', '#A39300', '#EC40DB', '#C8582A', '#1E48DD',
@@ -31,7 +31,8 @@ def word_wrap(x, width):
 
 def visualize_data(df, query, org_name):
     """Create a number of html div objects with - currently only one -
-    data visualizations with Plotly.
+    data visualizations with Plotly: the comparison of the organizations
+    if several of them were counted, or the output of the only one.
 
     :param df: pd.DataFrame.
     :param query: str.
@@ -39,6 +40,10 @@ def visualize_data(df, query, org_name):
     :return: tuple[str]
     """
 
+    if 'Organization' in df.columns:
+        return (
+            visualize_organizations_comparison(df, query),
+        )
     return (
         visualize_fractional_counts(df, query, org_name),
     )
@@ -120,18 +125,81 @@ def visualize_fractional_counts(df2, query, org):
     )
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
+
+
+def visualize_organizations_comparison(df2, query):
+    """Create a grouped bar plot comparing the annual fractional research
+    output of the organizations, with their whole counting output and
+    average fractional values on hover.
+
+    :param df2: pd.DataFrame.
+    :param query: str.
+    :return: str.
+    """
+
+    fig = go.Figure()
+    for i, (org, df_org) in enumerate(df2.groupby('Organization', sort=False)):
+        fig.add_trace(
+            go.Bar(
+                x=df_org['Publication_year'],
+                y=df_org['Fractional Counting'],
+                customdata=list(zip(
+                    df_org['Whole Counting'],
+                    df_org['Fractional Counting'] / df_org['Whole Counting']
+                )),
+                hovertemplate=(
+                    'Fractional Counting: %{y:.2f}<br>'
+                    'Whole Counting: %{customdata[0]}<br>'
+                    'Average Fractional Value: %{customdata[1]:.0%}'
+                ),
+                name=word_wrap(org, 30),
+                marker={'color': color_palette[i % len(color_palette)]}
+            )
+        )
+
+    fig.update_traces(marker={'line': {'width': 3, 'color': 'white'}})
+
+    plot_title = 'Fractional Research Output Comparison of the Organizations'
+    plot_subtitle = f'Search query: {query}'
+
+    fig.update_layout(
+        {'plot_bgcolor': '#FFFFFF', 'paper_bgcolor': '#FFFFFF'},
+        barmode='group',
+        font_color='#646363',
+        font_size=18,
+        title_font_color='#646363',
+        title=f'{plot_title}<br><sup>{plot_subtitle}</sup>',
+        legend_title_text=None,
+        legend={
+            'yanchor': 'bottom',
+            'y': -0.4,
+            'xanchor': 'center',
+            'x': 0.5,
+            'orientation': 'h'
+        }
+    )
+    fig.update_yaxes(
+        title_text='Fractional Counting',
+        showgrid=True,
+        gridcolor='#9D9D9C'
+    )
+    fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
+
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_excel(file):
-    """Return graphs objects from previously saved Excel file.
+    """Return graphs objects from previously saved results, read from
+    their stored tables or the Excel file.
 
     :param file: str.
     :return: tuple[str].
     """
 
-    df = pd.read_excel(file, sheet_name='Annual Dynamics')
-    query = pd.read_excel(file, sheet_name='Query Parameters')['Search Query'][0]
-    org = pd.read_excel(file, sheet_name='Query Parameters')['Affiliation'][0]
+    sheets = result_store.load(file, ('Annual Dynamics', 'Query Parameters'))
+    df = sheets['Annual Dynamics']
+    query = sheets['Query Parameters']['Search Query'][0]
+    org = sheets['Query Parameters']['Affiliation'][0]
 
     return visualize_data(df, query, org)
@@ -0,0 +1,437 @@
+"""
+A local mock of the Web of Science APIs used by the apps and scripts of
+this repository: Expanded API (searches, query pages, record IDs,
+citing records and cited references), Researcher API and Starter API.
+
+It serves synthetic records (see fixtures.py), including the
+hyper-authored ones, or replays the responses recorded into the
+response cache of any of the apps. The latency, bandwidth, rate limits
+and injected errors are configurable, so that the apps can be tested
+and benchmarked without an API key or quota.
+
+Run it with: python app.py [port], then point the apps to it with the
+CLARIVATE_API_URL environment variable, e.g.
+CLARIVATE_API_URL=http://127.0.0.1:5050
+"""
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from flask import Flask, Response, request
+import fixtures
+
+PORT = 5050
+
+# Seconds added to every response, and to every record in it
+LATENCY = float(os.environ.get('MOCK_LATENCY', 0))
+LATENCY_PER_RECORD = float(os.environ.get('MOCK_LATENCY_PER_RECORD', 0))
+# Bytes per second for sending the response bodies, 0 for no limit
+BODY_RATE = int(os.environ.get('MOCK_BODY_RATE', 0))
+# The per-second and annual quotas of the API key, 0 requests per second
+# for no limit
+REQUESTS_PER_SECOND = int(os.environ.get('MOCK_REQUESTS_PER_SECOND', 0))
+RECORDS_PER_YEAR = int(os.environ.get('MOCK_RECORDS_PER_YEAR', 10 ** 7))
+RESEARCHER_REQUESTS_PER_DAY = int(
+    os.environ.get('MOCK_RESEARCHER_REQUESTS_PER_DAY', 10 ** 5)
+)
+# The share of the requests failing with these statuses
+ERROR_429_RATE = float(os.environ.get('MOCK_ERROR_429_RATE', 0))
+ERROR_500_RATE = float(os.environ.get('MOCK_ERROR_500_RATE', 0))
+# How long the query IDs can be used to retrieve the pages, in seconds
+QUERY_ID_LIFETIME = int(os.environ.get('MOCK_QUERY_ID_LIFETIME', 60 * 60))
+# The response cache to replay the recorded responses from, and the
+# host they were recorded from
+RECORDINGS = os.environ.get('MOCK_RECORDINGS')
+RECORDED_HOST = os.environ.get('MOCK_RECORDED_HOST',
+                               'https://api.clarivate.com')
+
+MAX_COUNT = {'expanded': 100, 'researcher': 50, 'starter': 50}
+
+app = Flask(__name__)
+
+lock = threading.Lock()
+query_ids = {}
+# The parameters of the replayed searches, by their recorded QueryID
+replayed_searches = {}
+request_times = []
+quota = {'records': RECORDS_PER_YEAR,
+         'researcher': RESEARCHER_REQUESTS_PER_DAY}
+
+
+def error(status, message):
+    """Build an error response in the format of the API.
+
+    :param status: int.
+    :param message: str.
+    :return: Response.
+    """
+    return Response(json.dumps({'message': message}), status=status,
+                    mimetype='application/json')
+
+
+def pace():
+    """Count the request against the per-second quota.
+
+    :return: int, the requests left for the current second, or -1 if
+        the quota is already exceeded.
+    """
+    with lock:
+        now = time.monotonic()
+        while request_times and request_times[0] <= now - 1:
+            request_times.pop(0)
+        if REQUESTS_PER_SECOND and len(request_times) >= REQUESTS_PER_SECOND:
+            return -1
+        request_times.append(now)
+        return max(REQUESTS_PER_SECOND - len(request_times), 0)
+
+
+def stream(body):
+    """Send the response body at BODY_RATE bytes per second.
+
+    :param body: bytes.
+    :return: generator of bytes.
+    """
+    chunk_size = max(BODY_RATE // 10, 1)
+    for i in range(0, len(body), chunk_size):
+        yield body[i:i + chunk_size]
+        time.sleep(chunk_size / BODY_RATE)
+
+
+def respond(payload, api='expanded', records=0):
+    """Send the payload with the latency, the bandwidth and the quota
+    headers of the mock settings.
+
+    :param payload: dict, list or bytes.
+    :param api: str, 'expanded', 'researcher' or 'starter'.
+    :param records: int, the number of records in the payload.
+    :return: Response.
+    """
+    time.sleep(LATENCY + LATENCY_PER_RECORD * records)
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = json.dumps(payload).encode('utf-8')
+    response = Response(stream(body) if BODY_RATE else body,
+                        mimetype='application/json')
+    with lock:
+        if api == 'expanded':
+            quota['records'] = max(quota['records'] - records, 0)
+            if REQUESTS_PER_SECOND:
+                response.headers['X-REQ-ReqPerSec-Remaining'] = str(max(
+                    REQUESTS_PER_SECOND - len(request_times), 0
+                ))
+            response.headers['X-REC-AmtPerYear-Remaining'] = str(
+                quota['records']
+            )
+        elif api == 'researcher':
+            quota['researcher'] = max(quota['researcher'] - 1, 0)
+            response.headers['X-RateLimit-Remaining-Day'] = str(
+                quota['researcher']
+            )
+    return response
+
+
+def cache_key(url, params, search=None):
+    """Calculate the key of the request in the response cache of the
+    apps, the same as response_cache.cache_key does.
+
+    :param url: str.
+    :param params: dict.
+    :param search: dict or None, the parameters of the search that
+        created the QueryID of the url.
+    :return: str.
+    """
+    recorded_request = [url, sorted(params.items())]
+    if search is not None:
+        recorded_request.append(sorted(search.items()))
+    recorded_request = json.dumps(recorded_request, default=str)
+    return hashlib.sha256(recorded_request.encode('utf-8')).hexdigest()
+
+
+def replay():
+    """Find the recorded response for the request, if there is one. The
+    pages retrieved by a QueryID are recorded with the parameters of
+    their search, so the replayed searches are remembered by their
+    QueryID.
+
+    :return: bytes or None.
+    """
+    if not RECORDINGS:
+        return None
+    url = f'{RECORDED_HOST}{request.path}'
+    params = request.args.to_dict()
+    typed_params = {key: int(value) if value.isdigit() else value
+                    for key, value in params.items()}
+    with lock:
+        search = replayed_searches.get(request.path.split('/')[-1])
+    if request.path.split('/')[-2] not in ('query', 'recordids'):
+        search = None
+    connection = sqlite3.connect(RECORDINGS)
+    try:
+        for candidate in (typed_params, params):
+            row = connection.execute(
+                'SELECT body FROM responses WHERE key = ?',
+                (cache_key(url, candidate, search),)
+            ).fetchone()
+            if row is not None:
+                body = zlib.decompress(row[0])
+                remember_search(body, params)
+                return body
+    finally:
+        connection.close()
+    return None
+
+
+def remember_search(body, params):
+    """Remember the parameters of the replayed search by its QueryID.
+
+    :param body: bytes.
+    :param params: dict.
+    """
+    try:
+        query_id = json.loads(body)['QueryResult']['QueryID']
+    except (ValueError, KeyError, TypeError):
+        return
+    with lock:
+        replayed_searches[str(query_id)] = {
+            key: value for key, value in params.items()
+            if key not in ('count', 'firstRecord')
+        }
+
+
+@app.before_request
+def simulate_api():
+    """Check the API key, apply the rate limits and the injected
+    errors, and replay the recorded response if there is one."""
+    if not request.headers.get('X-ApiKey'):
+        return error(401, 'Invalid authentication credentials')
+    if pace() < 0 or random.random() < ERROR_429_RATE:
+        response = error(429, 'API rate limit exceeded')
+        response.headers['Retry-After'] = '1'
+        return response
+    if random.random() < ERROR_500_RATE:
+        return error(500, 'Server.internalError: Internal server error')
+    recorded = replay()
+    if recorded is not None:
+        if request.path.startswith('/apis/wos-researcher'):
+            return respond(recorded, api='researcher')
+        if request.path.startswith('/apis/wos-starter'):
+            return respond(recorded, api='starter')
+        return respond(recorded, records=recorded.count(b'"UID"'))
+    return None
+
+
+def int_arg(name, default, api='expanded'):
+    """Read an integer request argument.
+
+    :param name: str.
+    :param default: int.
+    :param api: str.
+    :return: int.
+    """
+    value = int(request.args.get(name, default))
+    if name in ('count', 'limit'):
+        return min(value, MAX_COUNT[api])
+    return value
+
+
+def register(result_set):
+    """Give the search a query ID to retrieve its pages later.
+
+    :param result_set: fixtures.ResultSet.
+    :return: int.
+    """
+    with lock:
+        query_id = len(query_ids) + 1
+        query_ids[query_id] = result_set, time.time()
+    return query_id
+
+
+def records_page(result_set):
+    """Build the records of the page requested by count and firstRecord,
+    limited to the viewField sections if requested.
+
+    :param result_set: fixtures.ResultSet.
+    :return: list[dict].
+    """
+    uids = result_set.uids(int_arg('firstRecord', 1), int_arg('count', 100))
+    records = [fixtures.record(uid, result_set.our_org) for uid in uids]
+    view_fields = request.args.get('viewField', '').replace('+', ' ').split()
+    if view_fields:
+        records = [fixtures.project(r, view_fields) for r in records]
+    return records
+
+
+def search_response(result_set):
+    """Build the response to a search, as returned by the /api/wos and
+    /api/wos/citing endpoints.
+
+    :param result_set: fixtures.ResultSet.
+    :return: Response.
+    """
+    records = records_page(result_set) if int_arg('count', 100) else []
+    return respond({
+        'QueryResult': {
+            'QueryID': register(result_set),
+            'RecordsSearched': fixtures.UNIVERSE,
+            'RecordsFound': result_set.total
+        },
+        'Data': {'Records': {'records': {'REC': records} if records else ''}}
+    }, records=len(records))
+
+
+def query_set(query_id):
+    """Find the records of the query ID.
+
+    :param query_id: int.
+    :return: fixtures.ResultSet or None, if it has expired.
+    """
+    with lock:
+        result_set, created = query_ids.get(query_id, (None, 0))
+    if time.time() - created > QUERY_ID_LIFETIME:
+        return None
+    return result_set
+
+
+@app.route('/api/wos')
+def wos_search():
+    """Expanded API search."""
+    query = request.args.get('usrQuery', '')
+    if '=' not in query:
+        return error(400, 'Search.invalidQuery: Invalid query: '
+                          f'{query}')
+    database = request.args.get('databaseId', 'WOS')
+    return search_response(fixtures.search(database, query))
+
+
+@app.route('/api/wos/query/<int:query_id>')
+def wos_query(query_id):
+    """Expanded API page of the records of an earlier search."""
+    result_set = query_set(query_id)
+    if result_set is None:
+        return error(400, f'Query.invalidId: Invalid QueryID: {query_id}')
+    records = records_page(result_set)
+    return respond({'Records': {'records': {'REC': records}}},
+                   records=len(records))
+
+
+@app.route('/api/wos/recordids/<int:query_id>')
+def wos_record_ids(query_id):
+    """Expanded API IDs of the records of an earlier search."""
+    result_set = query_set(query_id)
+    if result_set is None:
+        return error(400, f'Query.invalidId: Invalid QueryID: {query_id}')
+    uids = result_set.uids(int_arg('firstRecord', 1),
+                           int(request.args.get('count', 100000)))
+    return respond(uids)
+
+
+@app.route('/api/wos/citing')
+def wos_citing():
+    """Expanded API records citing a record."""
+    return search_response(fixtures.citing(
+        request.args.get('uniqueId', ''),
+        request.args.get('databaseId', 'WOS')
+    ))
+
+
+@app.route('/api/wos/references')
+def wos_references():
+    """Expanded API cited references of a record."""
+    cited_refs = fixtures.references(request.args.get('uniqueId', ''))
+    first_record = int_arg('firstRecord', 1)
+    page = cited_refs[first_record - 1:
+                      first_record - 1 + int_arg('count', 100)]
+    return respond({
+        'QueryResult': {
+            'QueryID': register(fixtures.ResultSet('WOS', len(cited_refs))),
+            'RecordsSearched': fixtures.UNIVERSE,
+            'RecordsFound': len(cited_refs)
+        },
+        'Data': page
+    }, records=len(page))
+
+
+@app.route('/apis/wos-researcher/researchers')
+def researchers():
+    """Researcher API search."""
+    query = request.args.get('q', '')
+    total = fixtures.records_found(query, fixtures.RESEARCHERS_FOUND)
+    limit = int_arg('limit', 10, 'researcher')
+    first = (int_arg('page', 1) - 1) * limit
+    return respond({
+        'metadata': {'total': total, 'page': int_arg('page', 1),
+                     'limit': limit},
+        'hits': [fixtures.researcher(i, query)
+                 for i in range(first, min(first + limit, total))]
+    }, api='researcher')
+
+
+@app.route('/apis/wos-researcher/researchers/<rid>')
+def researcher_profile(rid):
+    """Researcher API profile."""
+    return respond(fixtures.researcher_profile(rid), api='researcher')
+
+
+@app.route('/apis/wos-researcher/researchers/<rid>/documents')
+def researcher_documents(rid):
+    """Researcher API documents of a researcher."""
+    total = fixtures.researcher_documents_count(rid)
+    limit = int_arg('limit', 10, 'researcher')
+    first = (int_arg('page', 1) - 1) * limit
+    return respond({
+        'metadata': {'total': total, 'page': int_arg('page', 1),
+                     'limit': limit},
+        'hits': [fixtures.researcher_document(rid, i)
+                 for i in range(first, min(first + limit, total))]
+    }, api='researcher')
+
+
+@app.route('/apis/wos-researcher/researchers/<rid>/peer-reviews')
+def researcher_peer_reviews(rid):
+    """Researcher API peer reviews of a researcher."""
+    total = fixtures.stable_hash(rid) % 30
+    limit = int_arg('limit', 10, 'researcher')
+    first = (int_arg('page', 1) - 1) * limit
+    return respond({
+        'metadata': {'total': total, 'page': int_arg('page', 1),
+                     'limit': limit},
+        'hits': [fixtures.peer_review(rid, i)
+                 for i in range(first, min(first + limit, total))]
+    }, api='researcher')
+
+
+@app.route('/apis/wos-starter/v1/documents')
+def starter_documents():
+    """Starter API search."""
+    result_set = fixtures.search('WOS', request.args.get('q', ''))
+    limit = int_arg('limit', 10, 'starter')
+    page = int_arg('page', 1)
+    hits = [fixtures.starter_document(uid)
+            for uid in result_set.uids((page - 1) * limit + 1, limit)]
+    return respond({
+        'metadata': {'total': result_set.total, 'page': page,
+                     'limit': limit},
+        'hits': hits
+    }, api='starter')
+
+
+@app.route('/apis/wos-starter/v1/journals')
+def starter_journals():
+    """Starter API journal search."""
+    issn = request.args.get('issn', '')
+    return respond({
+        'metadata': {'total': 1, 'page': 1, 'limit': 10},
+        'hits': [fixtures.journal(issn)] if issn else []
+    }, api='starter')
+
+
+if __name__ == '__main__':
+    app.run(port=int(sys.argv[1]) if len(sys.argv) > 1 else PORT,
+            threaded=True)
@@ -0,0 +1,843 @@
+"""
+Synthetic fixtures for the mock Web of Science API server: the records
+of Web of Science Core Collection, Policy Citation Index, Derwent
+Innovations Index and Grants Index, the cited references, the
+researcher profiles and the Starter API documents.
+
+Every fixture is generated from its ID only, so the same request always
+gets the same response, and the records of different searches, their
+citing records and their cited references are linked to each other the
+same way every time.
+"""
+
+import os
+import random
+import re
+import zlib
+
+UNIVERSE = 10 ** 9
+
+RECORDS_FOUND = int(os.environ.get('MOCK_RECORDS_FOUND', 1000))
+RESEARCHERS_FOUND = int(os.environ.get('MOCK_RESEARCHERS_FOUND', 200))
+# The share of the records with HYPER_AUTHORS authors, like the papers
+# of the big physics collaborations
+HYPER_AUTHORED_SHARE = float(
+    os.environ.get('MOCK_HYPER_AUTHORED_SHARE', 0.01)
+)
+HYPER_AUTHORS = int(os.environ.get('MOCK_HYPER_AUTHORS', 2000))
+
+LAST_NAMES = [
+    'Smith', 'Garcia', 'Wang', 'Muller', 'Rossi', 'Kim', 'Silva', 'Ivanov',
+    'Tanaka', 'Nguyen', 'Kowalski', 'Dubois', 'Jensen', 'Singh', 'Cohen',
+    'Murphy', 'Novak', 'Lopez', 'Chen', 'Sato', 'Ahmed', 'Okafor',
+    'Johansson', 'Papadopoulos', 'Horvath', 'Costa', 'Yilmaz', 'Park',
+    'Fischer', 'Bianchi'
+]
+FIRST_NAMES = [
+    'Anna', 'Ben', 'Carla', 'David', 'Elena', 'Felix', 'Grace', 'Hiro',
+    'Ines', 'Jan', 'Kofi', 'Lena', 'Marco', 'Nadia', 'Omar', 'Petra',
+    'Quinn', 'Rosa', 'Sven', 'Tara'
+]
+# Name, city, state, country
+ORGANIZATIONS = [
+    ('Clarivate', 'London', None, 'England'),
+    ('University of Oxford', 'Oxford', None, 'England'),
+    ('Harvard University', 'Cambridge', 'MA', 'USA'),
+    ('Stanford University', 'Stanford', 'CA', 'USA'),
+    ('University of Tokyo', 'Tokyo', None, 'Japan'),
+    ('Tsinghua University', 'Beijing', None, 'Peoples R China'),
+    ('Max Planck Society', 'Munich', None, 'Germany'),
+    ('CNRS', 'Paris', None, 'France'),
+    ('University of Toronto', 'Toronto', 'ON', 'Canada'),
+    ('University of Melbourne', 'Parkville', 'Vic', 'Australia'),
+    ('ETH Zurich', 'Zurich', None, 'Switzerland'),
+    ('University of Sao Paulo', 'Sao Paulo', None, 'Brazil'),
+    ('Indian Institute of Science', 'Bangalore', None, 'India'),
+    ('University of Cape Town', 'Cape Town', None, 'South Africa'),
+    ('CERN', 'Geneva', None, 'Switzerland'),
+    ('The World Bank', 'Washington', 'DC', 'USA')
+]
+JOURNALS = [
+    'NATURE', 'SCIENCE', 'PHYSICAL REVIEW LETTERS', 'PLOS ONE',
+    'SCIENTOMETRICS', 'JOURNAL OF INFORMETRICS', 'CELL', 'LANCET',
+    'QUANTITATIVE SCIENCE STUDIES', 'RESEARCH POLICY'
+]
+PUBLISHERS = ['SPRINGER NATURE', 'ELSEVIER', 'WILEY', 'PUBLIC LIBRARY SCIENCE']
+WORDS = [
+    'citation', 'network', 'analysis', 'impact', 'research', 'model',
+    'quantum', 'climate', 'protein', 'policy', 'innovation', 'patent',
+    'collaboration', 'evaluation', 'dynamics', 'learning', 'data'
+]
+COUNTRY_CODES = ['US', 'EP', 'CN', 'JP', 'KR', 'DE', 'WO']
+CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY', 'CNY']
+
+# Where the viewField sections are nested in the records
+VIEW_FIELD_PATHS = {
+    'pub_info': ('static_data', 'summary'),
+    'titles': ('static_data', 'summary'),
+    'names': ('static_data', 'summary'),
+    'doctypes': ('static_data', 'summary'),
+    'publishers': ('static_data', 'summary'),
+    'addresses': ('static_data', 'fullrecord_metadata'),
+    'keywords': ('static_data', 'fullrecord_metadata'),
+    'abstracts': ('static_data', 'fullrecord_metadata'),
+    'fund_ack': ('static_data', 'fullrecord_metadata'),
+    'related_records': ('static_data', 'fullrecord_metadata'),
+    'tc_list': ('dynamic_data', 'citation_related'),
+    'identifiers': ('dynamic_data', 'cluster_related'),
+    'item': ('static_data',),
+}
+
+
+class ResultSet:
+    """The records found by a search: either an explicit list of IDs,
+    or a contiguous range of the synthetic records of the database."""
+
+    def __init__(self, database, total, offset=0, uids=None, our_org=None):
+        self.database = database
+        self.total = total
+        self.offset = offset
+        self.explicit_uids = uids
+        self.our_org = our_org
+
+    def uids(self, first_record, count):
+        """Return the IDs of a page of the records found.
+
+        :param first_record: int.
+        :param count: int.
+        :return: list[str].
+        """
+        last_record = min(first_record - 1 + count, self.total)
+        if self.explicit_uids is not None:
+            return self.explicit_uids[first_record - 1:last_record]
+        return [uid(self.database, (self.offset + i) % UNIVERSE)
+                for i in range(first_record - 1, last_record)]
+
+
+def stable_hash(text):
+    """Hash the text the same way in every process.
+
+    :param text: str.
+    :return: int.
+    """
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def uid(database, number):
+    """Build the record ID of the database.
+
+    :param database: str.
+    :param number: int.
+    :return: str.
+    """
+    prefix = 'WOS' if database in ('WOS', 'WOK') else database
+    return f'{prefix}:{number:015}'
+
+
+def number_of(record_id):
+    """Extract the number of the record from its ID.
+
+    :param record_id: str.
+    :return: int.
+    """
+    return int(re.sub(r'\D', '', record_id.split(':')[-1]) or 0)
+
+
+def records_found(query, default):
+    """Read the number of records found from the 'RECORDS=n' term of
+    the search query.
+
+    :param query: str.
+    :param default: int.
+    :return: int.
+    """
+    records_term = re.search(r'RECORDS=(\d+)', query)
+    return int(records_term.group(1)) if records_term else default
+
+
+def search(database, query):
+    """Find the records for the search query. A 'RECORDS=n' term sets
+    the number of records found, and the organization of an 'OG=' term
+    is added to the affiliations of every record found.
+
+    :param database: str.
+    :param query: str.
+    :return: ResultSet.
+    """
+    if re.match(r'\s*UT\s*=', query):
+        uids = re.findall(r'[A-Z]+:\w+', query)
+        return ResultSet(database, len(uids), uids=uids)
+    our_org = re.search(r'OG=\(?"?([^)"]+?)"?\)?(\s+(AND|OR|NOT)\s|$)',
+                        query)
+    return ResultSet(
+        database,
+        records_found(query, RECORDS_FOUND),
+        offset=stable_hash(f'{database} {query}') * 1000 % UNIVERSE,
+        our_org=our_org.group(1).strip() if our_org else None
+    )
+
+
+def times_cited(number):
+    """Calculate the citation counts of a Web of Science record, by the
+    database of the citing records.
+
+    :param number: int.
+    :return: dict.
+    """
+    rng = random.Random(f'tc {number}')
+    return {
+        'WOS': min(int(rng.paretovariate(1.2)) - 1, 300),
+        'PCI': rng.randint(1, 5) if rng.random() < 0.1 else 0,
+        'DIIDW': rng.randint(1, 5) if rng.random() < 0.05 else 0
+    }
+
+
+def citing(record_id, database):
+    """Find the records citing the record.
+
+    :param record_id: str.
+    :param database: str, WOS for Web of Science Core Collection only,
+        WOK for all the databases.
+    :return: ResultSet.
+    """
+    number = number_of(record_id)
+    citations = times_cited(number)
+    uids = [uid('WOS', (number + 1 + i * 7919) % UNIVERSE)
+            for i in range(citations['WOS'])]
+    if database == 'WOK':
+        for other_database in ('PCI', 'DIIDW'):
+            uids.extend(
+                uid(other_database, (number + i * 104729) % UNIVERSE)
+                for i in range(citations[other_database])
+            )
+    return ResultSet(database, len(uids), uids=uids)
+
+
+def references(record_id):
+    """Generate the cited references of the record. Most of them are
+    the records just before it, so that the records of a search cite
+    each other.
+
+    :param record_id: str.
+    :return: list[dict].
+    """
+    number = number_of(record_id)
+    rng = random.Random(f'refs {number}')
+    cited_refs = []
+    for i in range(rng.randint(5, 60)):
+        cited_number = (number - 1 - i * 3) % UNIVERSE
+        in_wos = rng.random() < 0.8
+        ref_rng = random.Random(cited_number)
+        cited_refs.append({
+            'UID': uid('WOS', cited_number) if in_wos else
+            f'{cited_number:09}',
+            'CitedAuthor': person_name(ref_rng),
+            'TimesCited': str(times_cited(cited_number)['WOS']),
+            'Year': str(ref_rng.randint(1950, 2023)),
+            'Page': str(ref_rng.randint(1, 999)),
+            'Volume': str(ref_rng.randint(1, 99)),
+            'CitedWork': cited_work(ref_rng),
+            'CitedTitle': title(ref_rng),
+            'DOI': f'10.{ref_rng.randint(1000, 9999)}/{cited_number}',
+            'Hot': 'No'
+        })
+    return cited_refs
+
+
+def one_or_list(items):
+    """Return a single item as is, like the API does, or else the list.
+
+    :param items: list.
+    :return: dict or list.
+    """
+    return items[0] if len(items) == 1 else items
+
+
+def person_name(rng):
+    """Pick a random person name in the 'Last, First' form.
+
+    :param rng: random.Random.
+    :return: str.
+    """
+    return f'{rng.choice(LAST_NAMES)}, {rng.choice(FIRST_NAMES)}'
+
+
+def title(rng):
+    """Generate a random document title.
+
+    :param rng: random.Random.
+    :return: str.
+    """
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))
+                    ).capitalize()
+
+
+def cited_work(rng):
+    """Pick the cited source title of a reference, from the journals
+    and from the long tail of the other cited works.
+
+    :param rng: random.Random.
+    :return: str.
+    """
+    if rng.random() < 0.5:
+        return rng.choice(JOURNALS)
+    return f'J {rng.choice(WORDS)} {rng.choice(WORDS)}'.upper()
+
+
+def researcher_id(name):
+    """Build the ResearcherID of the person name.
+
+    :param name: str.
+    :return: str.
+    """
+    name_hash = stable_hash(name)
+    return (f'{chr(65 + name_hash % 26)}-{name_hash % 10000:04}-'
+            f'{2008 + name_hash % 15}')
+
+
+def author(rng, seq_no, addr_nos):
+    """Generate an author of a Web of Science record.
+
+    :param rng: random.Random.
+    :param seq_no: int.
+    :param addr_nos: list[int].
+    :return: dict.
+    """
+    last_name = rng.choice(LAST_NAMES)
+    first_name = rng.choice(FIRST_NAMES)
+    full_name = f'{last_name}, {first_name}'
+    name = {
+        'seq_no': seq_no,
+        'role': 'author',
+        'reprint': 'Y' if seq_no == 1 else 'N',
+        'addr_no': ' '.join(str(a) for a in addr_nos) if len(addr_nos) > 1
+        else addr_nos[0],
+        'full_name': full_name,
+        'display_name': full_name,
+        'wos_standard': f'{last_name}, {first_name[0]}',
+        'first_name': first_name,
+        'last_name': last_name,
+        'daisng_id': stable_hash(full_name) % 10 ** 8,
+        'claim_status': rng.random() < 0.3
+    }
+    if rng.random() < 0.4:
+        name['data-item-ids'] = {'data-item-id': {
+            'id-type': 'PreferredRID',
+            'content': researcher_id(full_name)
+        }}
+    if rng.random() < 0.3:
+        name['orcid_id'] = (f'0000-000{stable_hash(full_name) % 10}-'
+                            f'{stable_hash(full_name) % 10000:04}-'
+                            f'{stable_hash(last_name) % 10000:04}')
+    return name
+
+
+def address(number, organization):
+    """Generate an address of a Web of Science record.
+
+    :param number: int, the addr_no value.
+    :param organization: tuple.
+    :return: dict.
+    """
+    name, city, state, country = organization
+    address_spec = {
+        'addr_no': number,
+        'full_address': ', '.join(p for p in (name, city, state, country)
+                                  if p),
+        'city': city,
+        'country': country,
+        'organizations': {'count': 2, 'organization': [
+            {'pref': 'N', 'content': name.upper()[:20]},
+            {'pref': 'Y', 'content': name}
+        ]}
+    }
+    if state:
+        address_spec['state'] = state
+    return {'address_spec': address_spec}
+
+
+def silo_tc(number):
+    """Generate the times cited counts of a record.
+
+    :param number: int.
+    :return: list[dict].
+    """
+    return [{'coll_id': database, 'local_count': count}
+            for database, count in times_cited(number).items()]
+
+
+def wos_record(record_id, our_org=None):
+    """Generate a Web of Science Core Collection record, with all the
+    fields read by any of the apps.
+
+    :param record_id: str.
+    :param our_org: str or None, the organization to add to the first
+        affiliation of the record.
+    :return: dict.
+    """
+    number = number_of(record_id)
+    rng = random.Random(number)
+    if rng.random() < HYPER_AUTHORED_SHARE:
+        authors_count = HYPER_AUTHORS
+        addresses_count = max(HYPER_AUTHORS // 10, 1)
+    else:
+        authors_count = rng.randint(1, 12)
+        addresses_count = rng.randint(1, min(authors_count, 5))
+    organizations = [rng.choice(ORGANIZATIONS)
+                     for _ in range(addresses_count)]
+    if our_org:
+        organizations[0] = next(
+            (o for o in ORGANIZATIONS if o[0].lower() == our_org.lower()),
+            (our_org, 'London', None, 'England')
+        )
+
+    addresses = [address(n, o) for n, o in enumerate(organizations, 1)]
+    address_authors = [[] for _ in addresses]
+    authors = []
+    for seq_no in range(1, authors_count + 1):
+        addr_nos = [(seq_no - 1) % addresses_count + 1]
+        if addresses_count > 1 and rng.random() < 0.2:
+            addr_nos.append(rng.randint(1, addresses_count))
+        addr_nos = sorted(set(addr_nos))
+        authors.append(author(rng, seq_no, addr_nos))
+        for addr_no in addr_nos:
+            address_authors[addr_no - 1].append(authors[-1])
+    for address_name, names in zip(addresses, address_authors):
+        address_name['names'] = {'count': len(names), 'name': one_or_list([
+            {key: value for key, value in name.items()
+             if key not in ('addr_no', 'reprint', 'display_name',
+                            'wos_standard', 'orcid_id')}
+            for name in names
+        ])}
+
+    year = rng.randint(1990, 2024)
+    pub_info = {
+        'pubyear': year,
+        'pubtype': 'Journal',
+        'vol': rng.randint(1, 300),
+        'issue': rng.randint(1, 12),
+        'sortdate': f'{year}-{rng.randint(1, 12):02}-01',
+        'has_abstract': 'Y'
+    }
+    if rng.random() < 0.1:
+        pub_info['early_access_year'] = year - 1
+    keywords = rng.sample(WORDS, rng.randint(1, 5))
+    publisher = rng.choice(PUBLISHERS)
+    return {
+        'UID': record_id,
+        'static_data': {
+            'summary': {
+                'EWUID': {'WUID': {'coll_id': 'WOS'}, 'edition': {
+                    'value': 'WOS.SCI'
+                }},
+                'pub_info': pub_info,
+                'titles': {'count': 2, 'title': [
+                    {'type': 'source', 'content': rng.choice(JOURNALS)},
+                    {'type': 'item', 'content': title(rng)}
+                ]},
+                'names': {'count': authors_count,
+                          'name': one_or_list(authors)},
+                'doctypes': {'count': 1, 'doctype': 'Article'},
+                'publishers': {'publisher': {
+                    'address_spec': {'addr_no': 1, 'full_address': 'London',
+                                     'city': 'London'},
+                    'names': {'count': 1, 'name': {
+                        'seq_no': 1,
+                        'role': 'publisher',
+                        'full_name': publisher,
+                        'display_name': publisher
+                    }}
+                }}
+            },
+            'fullrecord_metadata': {
+                'addresses': {'count': addresses_count,
+                              'address_name': one_or_list(addresses)},
+                'keywords': {'count': len(keywords),
+                             'keyword': one_or_list(keywords)},
+                'abstracts': {'count': 1, 'abstract': {'abstract_text': {
+                    'count': 1, 'p': ' '.join([title(rng)] * 5)
+                }}},
+                'category_info': {'subjects': {'subject': [
+                    {'ascatype': 'traditional', 'content': 'Physics'}
+                ]}},
+                'refs': {'count': rng.randint(5, 60)}
+            },
+            'item': {
+                'coll_id': 'WOS',
+                'keywords_plus': {'count': 2,
+                                  'keyword': rng.sample(WORDS, 2)}
+            }
+        },
+        'dynamic_data': {
+            'citation_related': {'tc_list': {'silo_tc': silo_tc(number)}},
+            'cluster_related': {'identifiers': {'identifier': [
+                {'type': 'doi', 'value': f'10.1000/{number}'},
+                {'type': 'issn', 'value': f'{number % 10000:04}-0000'}
+            ]}}
+        }
+    }
+
+
+def pci_record(record_id):
+    """Generate a Policy Citation Index document record.
+
+    :param record_id: str.
+    :return: dict.
+    """
+    number = number_of(record_id)
+    rng = random.Random(f'pci {number}')
+    authors = [{'seq_no': n, 'role': 'author',
+                'display_name': person_name(rng)}
+               for n in range(1, rng.randint(1, 4) + 1)]
+    return {
+        'UID': record_id,
+        'static_data': {'summary': {
+            'pub_info': {'pubyear': rng.randint(2000, 2024)},
+            'titles': {'count': 2, 'title': [
+                {'type': 'source', 'content': rng.choice(ORGANIZATIONS)[0]},
+                {'type': 'item', 'content': title(rng)}
+            ]},
+            'names': {'count': len(authors), 'name': one_or_list(authors)},
+            'doctypes': {'count': 1, 'doctype': rng.choice(
+                ['Report', 'Working Paper', 'Guideline']
+            )},
+            'publishers': {'publisher': {
+                'type': rng.choice(['Government', 'Think Tank', 'IGO']),
+                'address_spec': {'country': rng.choice(ORGANIZATIONS)[3]}
+            }}
+        }},
+        'dynamic_data': {
+            'citation_related': {'tc_list': {'silo_tc': silo_tc(number)}}
+        }
+    }
+
+
+def patent_record(record_id):
+    """Generate a Derwent Innovations Index patent family record.
+
+    :param record_id: str.
+    :return: dict.
+    """
+    number = number_of(record_id)
+    rng = random.Random(f'diidw {number}')
+    year = rng.randint(2000, 2024)
+    patents = []
+    for country in rng.sample(COUNTRY_CODES, rng.randint(1, 5)):
+        kind = rng.choice(['A1', 'B1', 'B2', 'A'])
+        patents.append({'BiblioPtTyp1': {
+            'dt': (year + rng.randint(0, 3)) * 10000 + 101,
+            'Pris': {'PriLat': {'PriSe': {'PriDt': f'{year}0101'}}},
+            'country': country,
+            'kind': kind
+        }})
+    names = [{'role': 'inventor', 'display_name': person_name(rng)}
+             for _ in range(rng.randint(1, 5))]
+    names.append({'role': 'assignee',
+                  'display_name': rng.choice(ORGANIZATIONS)[0].upper()})
+    return {
+        'UID': record_id,
+        'static_data': {
+            'summary': {
+                'titles': {'title': {'content': title(rng)}},
+                'names': {'count': len(names), 'name': names}
+            },
+            'item': {'PatentTyp1': one_or_list(patents)}
+        },
+        'dynamic_data': {'cluster_related': {'identifiers': {'identifier': [
+            {'type': 'patent_no',
+             'value': f'{patent["BiblioPtTyp1"]["country"]}'
+                      f'{number % 10 ** 7:07}-'
+                      f'{patent["BiblioPtTyp1"]["kind"]}'}
+            for patent in patents
+        ]}}}
+    }
+
+
+def grant_record(record_id):
+    """Generate a Grants Index record.
+
+    :param record_id: str.
+    :return: dict.
+    """
+    number = number_of(record_id)
+    rng = random.Random(f'grants {number}')
+    organization = rng.choice(ORGANIZATIONS)
+    names = [{'seq_no': 1, 'role': 'principal_investigator',
+              'full_name': person_name(rng)}]
+    names.extend({'seq_no': n, 'role': 'researcher',
+                  'full_name': person_name(rng)}
+                 for n in range(2, rng.randint(1, 4) + 1))
+    related_records = [{'uid': uid('WOS', (number + i) % UNIVERSE)}
+                       for i in range(rng.randint(0, 3))]
+    fullrecord_metadata = {
+        'fund_ack': {'grants': {'grant': {
+            'grant_source': rng.choice(['NIH', 'NSF', 'ERC', 'UKRI']),
+            'grant_agency_names': [
+                {'pref': 'Y', 'content': f'{organization[3]} Research Agency'}
+            ],
+            'grant_data': {'grantDataItem': {
+                'principalInvestigators': {'principalInvestigator': {
+                    'institution': {'pref': 'Y', 'content': organization[0]}
+                }},
+                'totalAwardAmount': rng.randint(10, 5000) * 1000,
+                'currency': rng.choice(CURRENCIES)
+            }}
+        }}},
+        'keywords': {'keyword': [{'content': keyword}
+                                 for keyword in rng.sample(WORDS, 3)]},
+        'abstracts': {'abstract': {'abstract_text': {'p': title(rng)}}}
+    }
+    if related_records:
+        fullrecord_metadata['related_records'] = {
+            'record': one_or_list(related_records)
+        }
+    year = rng.randint(2005, 2024)
+    return {
+        'UID': record_id,
+        'static_data': {
+            'summary': {
+                'pub_info': {'pubyear': year},
+                'titles': {'title': [{'type': 'item', 'content': title(rng)}]},
+                'names': {'count': len(names), 'name': one_or_list(names)},
+                'doctypes': {'doctype': 'Grant'}
+            },
+            'fullrecord_metadata': fullrecord_metadata,
+            'item': {
+                'financial_year': year,
+                'grant_agencies': {'grant_agency': {
+                    'country': organization[3]
+                }}
+            }
+        }
+    }
+
+
+def record(record_id, our_org=None):
+    """Generate the record of any of the databases by its ID.
+
+    :param record_id: str.
+    :param our_org: str or None.
+    :return: dict.
+    """
+    database = record_id.split(':')[0]
+    if database == 'PCI':
+        return pci_record(record_id)
+    if database == 'DIIDW':
+        return patent_record(record_id)
+    if database == 'GRANTS':
+        return grant_record(record_id)
+    return wos_record(record_id, our_org)
+
+
+def project(full_record, view_fields):
+    """Keep only the viewField sections of the record.
+
+    :param full_record: dict.
+    :param view_fields: list[str].
+    :return: dict.
+    """
+    projected = {'UID': full_record['UID']}
+    for view_field in view_fields:
+        source, target = full_record, projected
+        for key in VIEW_FIELD_PATHS.get(view_field, ()):
+            source = source.get(key, {})
+            target = target.setdefault(key, {})
+        if view_field in source:
+            target[view_field] = source[view_field]
+    return projected
+
+
+def researcher(index, query):
+    """Generate the short profile of a researcher found by the query.
+
+    :param index: int.
+    :param query: str.
+    :return: dict.
+    """
+    rng = random.Random(f'researcher {query} {index}')
+    full_name = person_name(rng)
+    rid = researcher_id(f'{full_name} {index}')
+    return {
+        'rid': [rid],
+        'orcids': [],
+        'fullName': full_name,
+        'primaryAffiliation': [rng.choice(ORGANIZATIONS)[0]],
+        'self': f'/researchers/{rid}',
+        'documentsCount': {'count': rng.randint(1, 300),
+                           'self': f'/researchers/{rid}/documents'},
+        'totalTimesCited': rng.randint(0, 10000),
+        'hIndex': rng.randint(0, 60)
+    }
+
+
+def researcher_profile(rid):
+    """Generate the full profile of a researcher.
+
+    :param rid: str.
+    :return: dict.
+    """
+    rng = random.Random(f'profile {rid}')
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    organization = rng.choice(ORGANIZATIONS)
+    documents_count = rng.randint(1, 300)
+    return {
+        'ids': {'rids': [rid], 'orcids': []},
+        'claimStatus': rng.random() < 0.5,
+        'name': {
+            'fullName': f'{last_name}, {first_name}',
+            'firstName': first_name,
+            'lastName': last_name,
+            'alternativeNames': [{'name': f'{last_name}, {first_name[0]}'}]
+        },
+        'metricsAllTime': {
+            'documents': {
+                'count': documents_count,
+                'self': f'/researchers/{rid}/documents',
+                'publishedYears': [
+                    {'year': year, 'numberOfDocuments': rng.randint(1, 20)}
+                    for year in range(2015, 2025)
+                ]
+            },
+            'totalTimesCited': rng.randint(0, 10000),
+            'totalTimesCitedWithoutSelf': rng.randint(0, 9000),
+            'totalCitingPublications': rng.randint(0, 8000),
+            'totalCitingWithoutSelf': rng.randint(0, 7000),
+            'hindex': rng.randint(0, 60)
+        },
+        'organization': {
+            'primaryAffiliation': [{
+                'organizationEnhancedName': organization[0],
+                'country': organization[3]
+            }],
+            'departments': ['Department of Physics'],
+            'affiliations': [{
+                'organization': organization[0],
+                'startYear': 2010,
+                'endYear': 2024,
+                'numberOfDocuments': documents_count
+            }]
+        },
+        'authorPosition': {
+            'first': {'numberOfDocuments': rng.randint(0, 50)},
+            'last': {'numberOfDocuments': rng.randint(0, 50)},
+            'corresponding': {'numberOfDocuments': rng.randint(0, 50)}
+        },
+        'subjectCategories': ['Physics, Multidisciplinary'],
+        'awards': {'highlyCitedResearcher': False}
+    }
+
+
+def researcher_documents_count(rid):
+    """Calculate the number of documents of a researcher.
+
+    :param rid: str.
+    :return: int.
+    """
+    return random.Random(f'documents {rid}').randint(1, 300)
+
+
+def researcher_document(rid, index):
+    """Generate a document of a researcher.
+
+    :param rid: str.
+    :param index: int.
+    :return: dict.
+    """
+    rng = random.Random(f'document {rid} {index}')
+    year = rng.randint(1995, 2024)
+    return {
+        'uid': uid('WOS', stable_hash(f'{rid} {index}') % UNIVERSE),
+        'title': title(rng),
+        'types': ['Article'],
+        'source': {
+            'sourceTitle': rng.choice(JOURNALS),
+            'publishYear': year,
+            'sortDate': f'{year}-01-01',
+            'volume': str(rng.randint(1, 300)),
+            'issue': str(rng.randint(1, 12))
+        },
+        'citations': [{'db': 'WOS', 'count': rng.randint(0, 500)}],
+        'identifiers': {'doi': f'10.1000/{rid}.{index}'}
+    }
+
+
+def peer_review(rid, index):
+    """Generate a peer review of a researcher.
+
+    :param rid: str.
+    :param index: int.
+    :return: dict.
+    """
+    rng = random.Random(f'review {rid} {index}')
+    return {
+        'journal': rng.choice(JOURNALS),
+        'publisher': rng.choice(PUBLISHERS),
+        'dateOfReview': str(rng.randint(2015, 2024)),
+        'verified': rng.random() < 0.8
+    }
+
+
+def starter_document(record_id):
+    """Generate a Starter API document from the Web of Science record.
+
+    :param record_id: str.
+    :return: dict.
+    """
+    full_record = wos_record(record_id)
+    summary = full_record['static_data']['summary']
+    names = summary['names']['name']
+    if isinstance(names, dict):
+        names = [names]
+    authors = []
+    for name in names[:100]:
+        starter_author = {'displayName': name['display_name'],
+                          'wosStandard': name['wos_standard']}
+        if 'data-item-ids' in name:
+            starter_author['researcherId'] = (
+                name['data-item-ids']['data-item-id']['content']
+            )
+        authors.append(starter_author)
+    titles = {t['type']: t['content'] for t in summary['titles']['title']}
+    times_cited_count = times_cited(number_of(record_id))['WOS']
+    return {
+        'uid': record_id,
+        'title': titles['item'],
+        'types': ['Article'],
+        'sourceTypes': ['Journal'],
+        'source': {
+            'sourceTitle': titles['source'],
+            'publishYear': summary['pub_info']['pubyear'],
+            'volume': str(summary['pub_info']['vol']),
+            'issue': str(summary['pub_info']['issue'])
+        },
+        'names': {'authors': authors},
+        'links': {
+            'record': f'https://www.webofscience.com/wos/woscc/full-record/'
+                      f'{record_id}',
+            'citingArticles': f'https://www.webofscience.com/wos/woscc/'
+                              f'citing-summary/{record_id}',
+            'references': f'https://www.webofscience.com/wos/woscc/'
+                          f'cited-references-summary/{record_id}'
+        },
+        'citations': [{'db': 'WOS', 'count': times_cited_count}]
+        if times_cited_count else [],
+        'identifiers': {'doi': f'10.1000/{number_of(record_id)}',
+                        'issn': f'{number_of(record_id) % 10000:04}-0000'}
+    }
+
+
+def journal(issn):
+    """Generate the Starter API journal for the ISSN.
+
+    :param issn: str.
+    :return: dict.
+    """
+    return {
+        'id': issn,
+        'name': JOURNALS[stable_hash(issn) % len(JOURNALS)],
+        'issn': issn,
+        'links': [{'type': 'jcr',
+                   'url': f'https://jcr.clarivate.com/jcr-jp/journal-profile'
+                          f'?issn={issn}'}]
+    }
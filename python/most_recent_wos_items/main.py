@@ -15,6 +15,7 @@ platform, the authors list, and the source title.
 As always, we welcome your feedback on this code.
 """
 
+import os
 import requests
 from flask import Flask
 from apikey import STARTER_APIKEY
@@ -22,15 +23,16 @@ from apikey import STARTER_APIKEY
 # Search query for which to calculate the citation report
 SEARCH_QUERY = 'OG=Clarivate'
 RECORDS_TO_DISPLAY = 5
+API_URL = os.environ.get('CLARIVATE_API_URL', 'https://api.clarivate.com')
 
-initial_request = requests.get(f'https://api.clarivate.com/apis/wos-starter/v1/documents?q={SEARCH_QUERY}'
+initial_request = requests.get(f'{API_URL}/apis/wos-starter/v1/documents?q={SEARCH_QUERY}'
                                f'&limit=50&page=1&db=WOS&sortField=LD+D', headers={'X-ApiKey': STARTER_APIKEY})
 initial_json = initial_request.json()
 for wos_document in initial_json['hits'][:RECORDS_TO_DISPLAY]:
     if 'issn' not in wos_document['identifiers']:
         wos_document['journal_link'] = None
     else:
-        journal_request = requests.get(f'https://api.clarivate.com/apis/wos-starter/v1/journals?'
+        journal_request = requests.get(f'{API_URL}/apis/wos-starter/v1/journals?'
                                        f'issn={wos_document["identifiers"]["issn"]}',
                                        headers={'X-ApiKey': STARTER_APIKEY})
         journal_json = journal_request.json()
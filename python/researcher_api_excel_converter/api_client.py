@@ -0,0 +1,852 @@
+"""
+A shared HTTP client for all the Web of Science API calls of the app:
+a single keep-alive connection pool with the common headers, timeouts
+and connection retries, so that the pages are not requested through a
+fresh TCP and TLS handshake each time, a rate governor pacing the
+requests of all the threads according to the API quota headers, a
+retry engine with exponential backoff for the failed requests, an
+adaptive page sizer for the pages with hyper-authored records, query
+sessions running each search once per job, a persistent response
+cache (see response_cache.py), and a fast JSON decoder for the heavy
+pages of records.
+"""
+
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import islice
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, TypedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import response_cache
+import state
+
+# Both JSON libraries are optional: orjson decodes the pages several
+# times faster than the standard library, and msgspec can decode them
+# into the record fields selected by viewField, skipping all the rest
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Set CLARIVATE_API_URL to send the API calls elsewhere, e.g. to the
+# local mock server in mock_wos_api
+API_HOST = os.environ.get('CLARIVATE_API_URL', 'https://api.clarivate.com')
+EXPANDED_API_URL = f'{API_HOST}/api/wos'
+RESEARCHER_API_URL = f'{API_HOST}/apis/wos-researcher'
+
+TIMEOUT = 16
+POOL_SIZE = 16
+CONNECTION_RETRIES = 3
+MAX_IN_FLIGHT = 4
+REQUESTS_PER_SECOND = 5
+
+# How many times a request is resent for each of the response statuses
+RETRY_POLICIES = {429: 10, 500: 5, 502: 5, 503: 5, 504: 5}
+RETRY_BUDGET = 100
+BACKOFF_FACTOR = 1
+BACKOFF_MAX = 64
+
+PAGE_SIZE = 100
+HEAVY_RECORD_TIMEOUT = 64
+
+# Where the viewField sections are nested in the records
+VIEW_FIELD_PATHS = {
+    'pub_info': ('static_data', 'summary'),
+    'titles': ('static_data', 'summary'),
+    'names': ('static_data', 'summary'),
+    'doctypes': ('static_data', 'summary'),
+    'publishers': ('static_data', 'summary'),
+    'addresses': ('static_data', 'fullrecord_metadata'),
+    'keywords': ('static_data', 'fullrecord_metadata'),
+    'abstracts': ('static_data', 'fullrecord_metadata'),
+    'fund_ack': ('static_data', 'fullrecord_metadata'),
+    'related_records': ('static_data', 'fullrecord_metadata'),
+    'tc_list': ('dynamic_data', 'citation_related'),
+    'identifiers': ('dynamic_data', 'cluster_related'),
+    'item': ('static_data',),
+}
+
+# How long the validated search can be reused by the run, in seconds
+QUERY_SESSION_LIFETIME = 60 * 60
+# The statuses returned for the query IDs that are no longer valid
+QUERY_EXPIRED_STATUSES = (400, 404)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a retrieval would use up the remaining annual
+    records quota of the API key."""
+
+
+class RateGovernor:
+    """A token bucket shared by all the threads sending the API calls.
+
+    Tokens are refilled at the requests_per_second rate, and the bucket
+    is drained every time the API reports in the
+    X-REQ-ReqPerSec-Remaining header that fewer requests are left in
+    the current second than the bucket holds. The remaining annual
+    quota from the X-REC-AmtPerYear-Remaining header is kept for the
+    jobs to check before they start.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.requests_per_second = requests_per_second
+        self.tokens = float(requests_per_second)
+        self.refilled = time.monotonic()
+        self.records_per_year_remaining = None
+        self.lock = threading.Lock()
+
+    def refill(self):
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.tokens + (now - self.refilled) * self.requests_per_second,
+            self.requests_per_second
+        )
+        self.refilled = now
+
+    def acquire(self):
+        """Take a token for the next request, waiting until one is
+        available."""
+        with self.lock:
+            self.refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.requests_per_second
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, headers):
+        """Synchronize the governor with the quota headers of an API
+        response.
+
+        :param headers: requests.structures.CaseInsensitiveDict.
+        """
+        per_second = headers.get('X-REQ-ReqPerSec-Remaining')
+        per_year = headers.get('X-REC-AmtPerYear-Remaining')
+        with self.lock:
+            if per_second is not None and per_second.isdigit():
+                self.refill()
+                self.tokens = min(self.tokens, int(per_second))
+            if per_year is not None and per_year.isdigit():
+                self.records_per_year_remaining = int(per_year)
+
+
+governor = RateGovernor()
+
+
+class RetryBudget:
+    """The number of retries a job is allowed to spend in total, and
+    the metrics on the retries spent so far: how many of them there
+    were for every response status, how long the failed requests took
+    and how long the job waited before resending them. Every job has a
+    budget of its own, see retry_budget.
+    """
+
+    def __init__(self, retries=RETRY_BUDGET):
+        self.lock = threading.Lock()
+        self.reset(retries)
+
+    def reset(self, retries=RETRY_BUDGET):
+        """Start counting the retries of a new job.
+
+        :param retries: int.
+        """
+        with self.lock:
+            self.retries_left = retries
+            self.retries = Counter()
+            self.failed_seconds = 0.0
+            self.waited_seconds = 0.0
+
+    def spend(self, status, failed_seconds):
+        """Take a retry from the budget for a failed request, if there
+        is any left.
+
+        :param status: int.
+        :param failed_seconds: float.
+        :return: bool.
+        """
+        with self.lock:
+            if self.retries_left <= 0:
+                return False
+            self.retries_left -= 1
+            self.retries[status] += 1
+            self.failed_seconds += failed_seconds
+            return True
+
+    def wait(self, seconds):
+        """Sleep before resending the request, counting the time.
+
+        :param seconds: float.
+        """
+        with self.lock:
+            self.waited_seconds += seconds
+        time.sleep(seconds)
+
+    def report(self):
+        """Summarize the retries of the job.
+
+        :return: str.
+        """
+        with self.lock:
+            statuses = ', '.join(
+                f'{status}: {count}' for status, count in
+                sorted(self.retries.items())
+            )
+            return (
+                f'Retries by response status - {statuses}. Time spent on '
+                f'failed requests: {self.failed_seconds:.1f} s, waiting '
+                f'before resending: {self.waited_seconds:.1f} s.'
+            )
+
+
+class PageSizer:
+    """Split the pages of records that the API fails to return in time,
+    which happens when they contain hyper-authored records with
+    enormous JSON size.
+
+    A failing window of records is bisected (100, 50, 25, ...) until
+    the heavy records are isolated and requested one by one with a
+    longer timeout. The offsets of the heavy records are remembered for
+    the rest of the job, and the size of the next windows is halved
+    after each failure and doubled back after each success, both by the
+    request they belong to, i.e. its URL and its parameters other than
+    firstRecord and count. Every job has a sizer of its own, see
+    page_sizer.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heavy_records = {}
+        self.window_sizes = {}
+
+    @staticmethod
+    def request_key(url, params):
+        """Identify the request of the pages, whatever their range of
+        records is.
+
+        :param url: str.
+        :param params: dict.
+        :return: tuple.
+        """
+        return url, tuple(sorted(
+            (name, str(value)) for name, value in params.items()
+            if name not in ('firstRecord', 'count')
+        ))
+
+    def windows(self, request, first_record, count, records_found=None):
+        """Split the requested range of records into windows of the
+        current size, with every known heavy record in a window of its
+        own. If the number of records found is known, the range ends at
+        the last of them, so that no window starts past it.
+
+        :param request: tuple, see request_key.
+        :param first_record: int.
+        :param count: int.
+        :param records_found: int or None.
+        :return: list[tuple[int, int]].
+        """
+        if records_found is not None and first_record <= records_found:
+            count = min(count, records_found - first_record + 1)
+        with self.lock:
+            window_size = self.window_sizes.get(request, PAGE_SIZE)
+            heavy_records = set(self.heavy_records.get(request, ()))
+        windows = []
+        window_start = first_record
+        for record in range(first_record, first_record + count + 1):
+            window_end = record == first_record + count
+            if window_end or record in heavy_records or \
+                    record - window_start == window_size:
+                if record > window_start:
+                    windows.append((window_start, record - window_start))
+                window_start = record
+            if record in heavy_records and not window_end:
+                windows.append((record, 1))
+                window_start = record + 1
+        return windows
+
+    def mark_heavy(self, request, record):
+        """Remember the offset of a heavy record of the request.
+
+        :param request: tuple, see request_key.
+        :param record: int.
+        """
+        with self.lock:
+            self.heavy_records.setdefault(request, set()).add(record)
+
+    def fetch(self, url, apikey, params, timeout, search=None,
+              records_found=None):
+        """Retrieve a page of records, splitting it as required.
+
+        :param url: str.
+        :param apikey: str.
+        :param params: dict.
+        :param timeout: int.
+        :param search: dict or None, see get.
+        :param records_found: int or None, see windows.
+        :return: dict.
+        """
+        request = self.request_key(url, params)
+        result = None
+        for first_record, count in self.windows(
+                request, params['firstRecord'], params['count'],
+                records_found):
+            window_json = self.fetch_window(
+                request, url, apikey, params, timeout, first_record, count,
+                search
+            )
+            result = merge_records(result, window_json)
+        return result
+
+    def fetch_window(self, request, url, apikey, params, timeout,
+                     first_record, count, search=None):
+        """Retrieve a window of records, or bisect it if the API fails
+        to return it in time.
+
+        :param request: tuple, see request_key.
+        :param url: str.
+        :param apikey: str.
+        :param params: dict.
+        :param timeout: int.
+        :param first_record: int.
+        :param count: int.
+        :param search: dict or None, see get.
+        :return: dict.
+        """
+        with self.lock:
+            if first_record in self.heavy_records.get(request, ()):
+                timeout = HEAVY_RECORD_TIMEOUT
+        try:
+            response = get(
+                url,
+                apikey,
+                params | {'firstRecord': first_record, 'count': count},
+                timeout,
+                search=search
+            )
+            response.raise_for_status()
+            result = decode(response, params.get('viewField'))
+        except (requests.Timeout, requests.ConnectionError,
+                json.JSONDecodeError):
+            if count == 1 and timeout >= HEAVY_RECORD_TIMEOUT:
+                raise
+            with self.lock:
+                self.window_sizes[request] = max(count // 2, 1)
+            if count == 1:
+                self.mark_heavy(request, first_record)
+                return self.fetch_window(
+                    request, url, apikey, params, timeout, first_record,
+                    count, search
+                )
+            half = (count + 1) // 2
+            if half == 1:
+                self.mark_heavy(request, first_record)
+            if count - half == 1:
+                self.mark_heavy(request, first_record + half)
+            return merge_records(
+                self.fetch_window(
+                    request, url, apikey, params, timeout, first_record,
+                    half, search
+                ),
+                self.fetch_window(
+                    request, url, apikey, params, timeout,
+                    first_record + half, count - half, search
+                )
+            )
+        with self.lock:
+            self.window_sizes[request] = min(
+                max(self.window_sizes.get(request, PAGE_SIZE), count) * 2,
+                PAGE_SIZE
+            )
+        return result
+
+
+class QuerySession:
+    """A search run once on the server side. The validation and the
+    run of the same search share the session, and all its pages are
+    retrieved by the QueryID through the /query and /recordids
+    endpoints instead of running the search again for each of them.
+    If the QueryID expires in the middle of a job, the search is run
+    again once and the page is retrieved by the new QueryID.
+    """
+
+    def __init__(self, apikey, params, url=EXPANDED_API_URL):
+        self.apikey = apikey
+        self.params = params
+        self.url = url
+        self.response = None
+        self.query_id = None
+        self.records_found = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.search()
+
+    @property
+    def status_code(self):
+        """The status of the search API call."""
+        return self.response.status_code
+
+    @property
+    def message(self):
+        """The error message of the search API call."""
+        return self.response.json()['message'].split(':')[-1]
+
+    def search(self):
+        """Run the search without retrieving any records, to get the
+        QueryID and the number of records found. The search is never
+        answered from the response cache, unless in the offline mode:
+        the cached QueryID may be expired or belong to another search,
+        and the cached response has no quota headers for
+        check_annual_quota.
+        """
+        self.response = get(
+            self.url,
+            self.apikey,
+            self.params | {'count': 0, 'firstRecord': 1},
+            use_cache=False
+        )
+        if self.response.status_code == 200:
+            query_result = self.response.json()['QueryResult']
+            self.query_id = query_result['QueryID']
+            self.records_found = query_result['RecordsFound']
+            self.started = time.monotonic()
+
+    def is_fresh(self):
+        """Check if the session can still be reused by a new job.
+
+        :return: bool.
+        """
+        return (self.status_code == 200 and time.monotonic() - self.started
+                < QUERY_SESSION_LIFETIME)
+
+    def refresh(self, expired_query_id):
+        """Run the search again, unless another thread has already
+        done it since the QueryID expired.
+
+        :param expired_query_id: int.
+        """
+        with self.lock:
+            if self.query_id == expired_query_id:
+                print(f'Oops, query {expired_query_id} has expired - '
+                      f'running the search again...')
+                self.search()
+                self.response.raise_for_status()
+
+    def fetch(self, endpoint, request_page):
+        """Retrieve a page of the search results by the QueryID,
+        running the search again if the QueryID has expired.
+
+        :param endpoint: str, 'query' or 'recordids'.
+        :param request_page: function accepting the endpoint URL.
+        :return: dict or list.
+        """
+        self.response.raise_for_status()
+        query_id = self.query_id
+        try:
+            return request_page(f'{EXPANDED_API_URL}/{endpoint}/{query_id}')
+        except requests.HTTPError as error:
+            if error.response.status_code not in QUERY_EXPIRED_STATUSES:
+                raise
+        self.refresh(query_id)
+        return request_page(f'{EXPANDED_API_URL}/{endpoint}/{self.query_id}')
+
+    def records(self, first_record=1, timeout=TIMEOUT, parsers=(),
+                **params):
+        """Retrieve a page of the records found, in the same shape as
+        the search results.
+
+        :param first_record: int.
+        :param timeout: int.
+        :param parsers: tuple of the functions declared with view_fields,
+            to retrieve only the record fields they read.
+        :param params: the other parameters of the page, e.g. viewField.
+        :return: dict.
+        """
+        if parsers:
+            params['viewField'] = view_field(*parsers)
+        page = self.fetch('query', lambda url: get_records(
+            url,
+            self.apikey,
+            params | {'count': PAGE_SIZE, 'firstRecord': first_record},
+            timeout,
+            search=self.params,
+            records_found=self.records_found
+        ))
+        if 'Data' not in page:
+            page = {'Data': page}
+        page.setdefault('QueryResult', {
+            'QueryID': self.query_id,
+            'RecordsFound': self.records_found
+        })
+        return page
+
+    def record_ids(self, first_record=1, timeout=TIMEOUT):
+        """Retrieve a page of the IDs of the records found.
+
+        :param first_record: int.
+        :param timeout: int.
+        :return: list.
+        """
+        def request_page(url):
+            response = get(
+                url,
+                self.apikey,
+                {'count': PAGE_SIZE, 'firstRecord': first_record},
+                timeout,
+                search=self.params
+            )
+            response.raise_for_status()
+            return decode(response)
+
+        return self.fetch('recordids', request_page)
+
+
+query_sessions = {}
+query_sessions_lock = threading.Lock()
+
+
+def retry_budget():
+    """Get the retry budget of the job run by the calling thread.
+
+    :return: RetryBudget.
+    """
+    return state.current().get('retry budget', RetryBudget)
+
+
+def page_sizer():
+    """Get the page sizer of the job run by the calling thread.
+
+    :return: PageSizer.
+    """
+    return state.current().get('page sizer', PageSizer)
+
+
+def start_job():
+    """Start a new retry budget and heavy records memory at the start
+    of every new job."""
+    job = state.current()
+    job.set('retry budget', RetryBudget())
+    job.set('page sizer', PageSizer())
+
+
+def merge_records(result, page):
+    """Append the records of the next page of the API response to the
+    previous ones.
+
+    :param result: dict or None.
+    :param page: dict.
+    :return: dict.
+    """
+    if result is None:
+        return page
+    # The pages retrieved by the QueryID have no 'Data' wrapper
+    page_records = page.get('Data', page)['Records']
+    result_records = result.get('Data', result)['Records']
+    if page_records['records']:
+        if not result_records['records']:
+            result_records['records'] = {'REC': []}
+        result_records['records']['REC'].extend(
+            page_records['records']['REC']
+        )
+    return result
+
+
+def decode(response, view_field=None):
+    """Decode the JSON body of the response with the fastest library
+    available. If the response is a page of records limited to the
+    viewField sections, and msgspec is installed, only those sections
+    are decoded, and any other fields of the records are skipped.
+
+    :param response: requests.Response.
+    :param view_field: str or None, the viewField parameter value.
+    :return: dict or list.
+    """
+    if view_field and msgspec is not None:
+        page_type = typed_page(frozenset(view_field.split()))
+        if page_type is not None:
+            try:
+                return msgspec.json.decode(response.content, type=page_type)
+            except msgspec.DecodeError:
+                pass
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+@lru_cache
+def typed_page(view_fields):
+    """Build the type of a page of records with only the viewField
+    sections in them, for msgspec to decode into plain dicts.
+
+    :param view_fields: frozenset of the viewField values.
+    :return: type or None, if any of the sections is unknown.
+    """
+    if not view_fields <= VIEW_FIELD_PATHS.keys():
+        return None
+    record_tree = {'UID': None}
+    for view_field in view_fields:
+        subtree = record_tree
+        for key in VIEW_FIELD_PATHS[view_field]:
+            subtree = subtree.setdefault(key, {})
+        subtree[view_field] = None
+    record_type = typed_dict('record', record_tree)
+    # The records are an empty string in the pages with no records
+    records_type = TypedDict('Records', {
+        'records': TypedDict('records', {
+            'REC': list[record_type]
+        }, total=False) | str
+    }, total=False)
+    return TypedDict('page', {
+        'QueryResult': Any,
+        'Data': TypedDict('Data', {'Records': records_type}, total=False),
+        'Records': records_type
+    }, total=False)
+
+
+def typed_dict(name, tree):
+    """Build a TypedDict with the nested keys of the tree, the leaves of
+    which can be of any type.
+
+    :param name: str.
+    :param tree: dict.
+    :return: type.
+    """
+    return TypedDict(name, {
+        key: Any if subtree is None else typed_dict(key, subtree)
+        for key, subtree in tree.items()
+    }, total=False)
+
+
+def create_session():
+    """Create a requests session with a connection pool big enough for
+    the concurrent requests of a run, retrying only the failed
+    connection attempts (and never the requests themselves).
+
+    :return: requests.Session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE,
+        pool_maxsize=POOL_SIZE,
+        max_retries=Retry(
+            total=None,
+            connect=CONNECTION_RETRIES,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=0.5
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+session = create_session()
+
+
+def get(url, apikey, params=None, timeout=TIMEOUT, use_cache=True,
+        search=None):
+    """Send a GET request to any of the Web of Science APIs through the
+    shared session, resending it according to RETRY_POLICIES while the
+    job has some retry budget left. The last response is returned
+    whatever its status is. The successful responses are cached on disk,
+    and the cached ones are returned without calling the API, unless
+    they were stored before the job refreshing its results was
+    submitted.
+
+    :param url: str.
+    :param apikey: str.
+    :param params: dict.
+    :param timeout: int.
+    :param use_cache: bool, False to skip reading the cached response,
+        except in the offline mode.
+    :param search: dict or None, the parameters of the search that
+        created the QueryID of the url, for the cache to tell apart the
+        pages of the different searches with the same QueryID.
+    :return: requests.Response.
+    """
+    offline = response_cache.CACHE_MODE == 'offline'
+    if use_cache or offline:
+        cached_response = response_cache.load(
+            url, params, search,
+            None if offline else state.current().fresh_since
+        )
+        if cached_response is not None:
+            return cached_response
+    if offline:
+        return response_cache.offline_miss(url)
+    budget = retry_budget()
+    attempt = 0
+    while True:
+        governor.acquire()
+        started = time.monotonic()
+        response = session.get(
+            url=url,
+            params=params,
+            headers={'X-ApiKey': apikey},
+            timeout=timeout
+        )
+        governor.update(response.headers)
+        max_retries = RETRY_POLICIES.get(response.status_code, 0)
+        if attempt >= max_retries or not budget.spend(
+                response.status_code, time.monotonic() - started):
+            response_cache.store(url, params, response, search)
+            return response
+        delay = retry_delay(attempt, response)
+        print(f'Oops, error {response.status_code} - resending in '
+              f'{delay:.1f} s...')
+        budget.wait(delay)
+        attempt += 1
+
+
+def retry_delay(attempt, response):
+    """Calculate how long to wait before resending the request: as the
+    server asks in the Retry-After header, if it does, or else an
+    exponential backoff with full jitter.
+
+    :param attempt: int.
+    :param response: requests.Response.
+    :return: float.
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None:
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+        try:
+            retry_at = parsedate_to_datetime(retry_after).timestamp()
+            return min(max(retry_at - time.time(), 0), BACKOFF_MAX)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(BACKOFF_FACTOR * 2 ** attempt, BACKOFF_MAX))
+
+
+def get_records(url, apikey, params, timeout=TIMEOUT, search=None,
+                records_found=None):
+    """Retrieve a page of Web of Science records as JSON, adaptively
+    splitting it into smaller windows if it is too heavy for the API
+    to return in time.
+
+    :param url: str.
+    :param apikey: str.
+    :param params: dict, including the count and firstRecord values.
+    :param timeout: int.
+    :param search: dict or None, see get.
+    :param records_found: int or None, the number of records of the
+        request if known, to keep the windows within them.
+    :return: dict.
+    """
+    return page_sizer().fetch(url, apikey, params, timeout, search,
+                              records_found)
+
+
+def open_query(apikey, params, url=EXPANDED_API_URL):
+    """Get the session of the search, reusing the one of the same
+    search validated or run recently, if it is still fresh and the job
+    does not refresh its results.
+
+    :param apikey: str.
+    :param params: dict, the search parameters without count and
+        firstRecord.
+    :param url: str.
+    :return: QuerySession.
+    """
+    key = (apikey, url, tuple(sorted(params.items())))
+    with query_sessions_lock:
+        for stale_key in [k for k, query_session in query_sessions.items()
+                          if not query_session.is_fresh()]:
+            del query_sessions[stale_key]
+        query_session = query_sessions.get(key)
+    if state.current().fresh_since is not None:
+        query_session = None
+    if query_session is None:
+        query_session = QuerySession(apikey, params, url)
+        if query_session.is_fresh():
+            with query_sessions_lock:
+                query_sessions[key] = query_session
+    return query_session
+
+
+def view_fields(*fields):
+    """Declare the record fields that a parser reads, e.g. 'names' or
+    'addresses', so that the API calls retrieving the records for it
+    can skip all the other fields.
+
+    :param fields: str, the viewField values.
+    :return: function.
+    """
+    def declare(parser):
+        parser.view_fields = frozenset(fields)
+        return parser
+
+    return declare
+
+
+def view_field(*parsers):
+    """Derive the viewField parameter value retrieving only the record
+    fields read by any of the parsers declared with view_fields.
+
+    :param parsers: function.
+    :return: str.
+    """
+    return ' '.join(sorted(frozenset().union(
+        *(parser.view_fields for parser in parsers)
+    )))
+
+
+def check_annual_quota(records_required):
+    """Refuse to start a retrieval that would exhaust the annual
+    records quota reported by the API.
+
+    :param records_required: int.
+    """
+    remaining = governor.records_per_year_remaining
+    if remaining is not None and records_required > remaining:
+        raise QuotaExceededError(
+            f'This search requires {records_required} records, but only '
+            f'{remaining} are left in the annual quota of the API key.'
+        )
+
+
+def fetch_pages(request_page, pages, max_in_flight=MAX_IN_FLIGHT):
+    """Send the API calls for all the pages concurrently, with at most
+    max_in_flight of them waiting for the response at any moment, and
+    yield the results strictly in the order of the pages. The threads
+    sending the API calls work for the job of the calling thread.
+
+    :param request_page: function accepting a single page argument,
+        e.g. the firstRecord value.
+    :param pages: iterable.
+    :param max_in_flight: int.
+    :return: generator.
+    """
+    job = state.current()
+
+    def request_job_page(page):
+        state.attach(job)
+        return request_page(page)
+
+    pages = iter(pages)
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        try:
+            for page in islice(pages, max_in_flight):
+                in_flight.append(executor.submit(request_job_page, page))
+            while in_flight:
+                result = in_flight.popleft().result()
+                for page in islice(pages, 1):
+                    in_flight.append(executor.submit(request_job_page, page))
+                yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
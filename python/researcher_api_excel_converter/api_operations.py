@@ -3,8 +3,8 @@ Retrieve data from Web of Science Core Collection with Web of Science
 Researcher API.
 """
 
-import urllib.parse
-import requests
+import api_client
+from api_client import RESEARCHER_API_URL
 from apikeys import RESEARCHER_APIKEY
 
 
@@ -12,11 +12,10 @@ def validate_search_query(query: str) -> tuple:
     """Check if the search query is valid, returns the number of
     documents found in the query."""
 
-    test_request = requests.get(
-        url=f'https://api.clarivate.com/apis/wos-researcher/researchers?'
-            f'q={urllib.parse.quote(query)}&page=1',
-        headers={'X-ApiKey': RESEARCHER_APIKEY},
-        timeout=16
+    test_request = api_client.get(
+        f'{RESEARCHER_API_URL}/researchers',
+        RESEARCHER_APIKEY,
+        {'q': query, 'page': 1}
     )
     if test_request.status_code == 200:
         test_json = test_request.json()
@@ -37,11 +36,10 @@ def validate_search_query(query: str) -> tuple:
 def researcher_api_request(query: str, page=1) -> dict:
     """Send an API call to the default Researcher API endpoint."""
 
-    return requests.get(
-        url=f'https://api.clarivate.com/apis/wos-researcher/researchers?q='
-            f'{urllib.parse.quote(query)}&page={page}&limit=50',
-        headers={'X-APIKey': RESEARCHER_APIKEY},
-        timeout=16
+    return api_client.get(
+        f'{RESEARCHER_API_URL}/researchers',
+        RESEARCHER_APIKEY,
+        {'q': query, 'page': page, 'limit': 50}
     ).json()
 
 
@@ -49,10 +47,9 @@ def researcher_api_profile_request(rid: str) -> dict:
     """Send an API call to the /researchers endpoint of Researcher
     API."""
 
-    return requests.get(
-        url=f'https://api.clarivate.com/apis/wos-researcher/researchers/{rid}',
-        headers={'X-APIKey': RESEARCHER_APIKEY},
-        timeout=16
+    return api_client.get(
+        f'{RESEARCHER_API_URL}/researchers/{rid}',
+        RESEARCHER_APIKEY
     ).json()
 
 
@@ -60,11 +57,10 @@ def researcher_api_doc_request(rid: str, page=1) -> dict:
     """Send an API call to the /documents endpoint of Researcher
     API."""
 
-    return requests.get(
-        url=f'https://api.clarivate.com/apis/wos-researcher/researchers/{rid}'
-            f'/documents?limit=50&page={page}',
-        headers={'X-APIKey': RESEARCHER_APIKEY},
-        timeout=16
+    return api_client.get(
+        f'{RESEARCHER_API_URL}/researchers/{rid}/documents',
+        RESEARCHER_APIKEY,
+        {'limit': 50, 'page': page}
     ).json()
 
 
@@ -72,9 +68,8 @@ def peer_review_api_request(rid: str, page=1) -> dict:
     """Send an API call to the /peer_reviews endpoint of Researcher
     API."""
 
-    return requests.get(
-        url=f'https://api.clarivate.com/apis/wos-researcher/researchers/{rid}'
-            f'/peer-reviews?page={page}',
-        headers={'X-APIKey': RESEARCHER_APIKEY},
-        timeout=16
+    return api_client.get(
+        f'{RESEARCHER_API_URL}/researchers/{rid}/peer-reviews',
+        RESEARCHER_APIKEY,
+        {'page': page}
     ).json()
@@ -5,35 +5,18 @@ Web of Science Researcher Profiles using Web of Science Researcher API.
 Main app file: manage Flask interface actions and rendering.
 """
 
-from flask import Flask, Response, render_template, request
-import time, state, json
+from flask import Flask, render_template, request
+import jobs
 from data_processing import main
 from api_operations import validate_search_query
 
 
 app = Flask(__name__)
+app.register_blueprint(jobs.blueprint)
 
 plots_list = []
 
 
-@app.route("/stream")
-def stream():
-    def generate():
-        last_progress = -1
-        last_task = ""
-        while True:
-            if (state.progress != last_progress) or (state.current_task != last_task):
-                data = {
-                    "task": state.current_task,
-                    "progress": state.progress
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_progress = state.progress
-                last_task = state.current_task
-            time.sleep(0.2)
-    return Response(generate(), mimetype="text/event-stream")
-
-
 @app.route(rule="/", methods=['POST', 'GET'])
 def start_menu() -> str:
     """Manage Flask interface actions and rendering."""
@@ -58,12 +41,17 @@ def search_section(button: str, search_query: str) -> str:
     if search_query != '' and button == 'validate':
         return render_validation_results(search_query, options)
 
-    if search_query != '' and button == 'run':
-        safe_filename = main(search_query, options)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'run',
+            search_query=search_query,
+            refresh=button == 'refresh',
+            **options
+        )
 
         return render_template(
             'index.html',
-            filename=safe_filename,
+            job_id=job_id,
             search_query=search_query,
             full_profiles=options['full_profiles'],
             documents=options['documents'],
@@ -122,5 +110,35 @@ def render_validation_results(search_query: str, options: dict) -> str:
     )
 
 
+def render_run_results(job: dict) -> str:
+    """Render the file of the finished 'Run' job, or its error."""
+
+    if job['status'] == 'failed':
+        return render_template(
+            'index.html',
+            error_message=job['error'],
+            **job['params']
+        )
+
+    return render_template(
+        'index.html',
+        filename=job['result']['filename'],
+        **job['params']
+    )
+
+
+@jobs.task('run', render=render_run_results)
+def run_job(search_query: str, full_profiles: bool, documents: bool,
+            peer_reviews: bool) -> dict:
+    """Run the retrieval in a background job."""
+
+    options = {
+        'full_profiles': full_profiles,
+        'documents': documents,
+        'peer_reviews': peer_reviews
+    }
+    return {'filename': main(search_query, options)}
+
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -4,8 +4,10 @@ mostly data processing.
 """
 
 from datetime import date
+import checkpoints
 import state
 import pandas as pd
+from api_client import fetch_pages, retry_budget, start_job
 from api_operations import (
     researcher_api_request,
     researcher_api_profile_request,
@@ -18,6 +20,8 @@ def main(query: str, options: dict) -> str:
     """When the 'Run' button is pressed, manage all the API operations
     and data processing."""
 
+    start_job()
+
     profiles = (
         retrieve_full_profiles_metadata(query)
         if options['full_profiles']
@@ -56,6 +60,9 @@ def main(query: str, options: dict) -> str:
         if options['peer_reviews']:
             df6.to_excel(writer, sheet_name='Peer Reviews', index=False)
 
+    if retry_budget().retries:
+        print(retry_budget().report())
+
     return safe_filename
 
 
@@ -93,8 +100,7 @@ def retrieve_profiles_metadata(query: str) -> list[dict]:
     """Manage API calls and parsing Researcher Profiles metadata from a
     search query."""
 
-    state.progress = 0
-    state.current_task = 'Searching profiles'
+    state.update(0, 'Searching profiles')
     profiles = []
     initial_json = researcher_api_request(query)
     for profile in initial_json['hits']:
@@ -104,11 +110,17 @@ def retrieve_profiles_metadata(query: str) -> list[dict]:
     max_requests = min(requests_required, 1000)
     print(f'Researcher API search requests required: {requests_required}.')
 
-    for i in range(1, max_requests):
-        subsequent_json = researcher_api_request(query, i+1)
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda page: researcher_api_request(query, page),
+            'profiles', query
+        ),
+        range(2, max_requests + 1)
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         for profile in subsequent_json['hits']:
             profiles.append(fetch_researchers_data(profile))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     return profiles
 
@@ -117,8 +129,7 @@ def retrieve_full_profiles_metadata(query: str) -> list[dict]:
     """Manage API calls and parsing full Researcher Profiles
     metadata."""
 
-    state.progress = 0
-    state.current_task = 'Searching profiles'
+    state.update(0, 'Searching profiles')
 
     profiles = []
     rids = []
@@ -133,20 +144,30 @@ def retrieve_full_profiles_metadata(query: str) -> list[dict]:
     print(f'Step 1. Retrieving Researcher IDs, requests required: '
           f'{requests_required}.')
 
-    for i in range(1, max_requests):
-        subsequent_rid_json = researcher_api_request(query, i+1)
+    subsequent_rid_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda page: researcher_api_request(query, page),
+            'profiles', query
+        ),
+        range(2, max_requests + 1)
+    )
+    for i, subsequent_rid_json in enumerate(subsequent_rid_jsons, start=1):
         for profile in subsequent_rid_json['hits']:
             rids.append(profile['rid'][0])
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     # Getting their full profile metadata
-    state.progress = 0
-    state.current_task = 'Retrieving profiles'
-    for i, rid in enumerate(rids):
-        full_profile_json = researcher_api_profile_request(rid)
+    state.update(0, 'Retrieving profiles')
+    full_profile_jsons = fetch_pages(
+        checkpoints.resumable(
+            researcher_api_profile_request, 'full profiles', rids
+        ),
+        rids
+    )
+    for i, full_profile_json in enumerate(full_profile_jsons):
         profiles.append(fetch_full_researchers_data(full_profile_json))
 
-        state.progress = (i + 1) / len(rids) * 100
+        state.update((i + 1) / len(rids) * 100)
 
     return profiles
 
@@ -155,13 +176,23 @@ def retrieve_documents_metadata(profiles: list[dict]) -> pd.DataFrame:
     """Break down the list into individual researchers, and launch
     the function to get their individual documents lists."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving documents metadata'
+    state.update(0, 'Retrieving documents metadata')
     documents = []
 
-    for i, profile in enumerate(profiles):
-        documents.extend(get_individual_researchers_docs_list(profile))
-        state.progress = (i + 1) / len(profiles) * 100
+    profiles_by_rid = {profile['primary_rid']: profile for profile in profiles}
+    rids = [profile['primary_rid'] for profile in profiles]
+    profiles_docs = fetch_pages(
+        checkpoints.resumable(
+            lambda rid: get_individual_researchers_docs_list(
+                profiles_by_rid[rid]
+            ),
+            'documents', rids
+        ),
+        rids
+    )
+    for i, profile_docs in enumerate(profiles_docs):
+        documents.extend(profile_docs)
+        state.update((i + 1) / len(profiles) * 100)
 
     return pd.DataFrame(documents)
 
@@ -178,12 +209,11 @@ def get_individual_researchers_docs_list(profile: dict) -> list[dict]:
     requests_required = (total_docs - 1) // 50 + 1
     max_requests = min(requests_required, 1000)
 
-    for i in range(1, max_requests):
-        subsequent_doc_json = researcher_api_doc_request(
-            profile['primary_rid'],
-            i + 1
-        )
-
+    subsequent_doc_jsons = fetch_pages(
+        lambda page: researcher_api_doc_request(profile['primary_rid'], page),
+        range(2, max_requests + 1)
+    )
+    for subsequent_doc_json in subsequent_doc_jsons:
         for doc in subsequent_doc_json['hits']:
             docs.append(fetch_documents_metadata(profile['primary_rid'], doc))
 
@@ -194,13 +224,23 @@ def retrieve_peer_reviews_metadata(profiles: list[dict]) -> pd.DataFrame:
     """Break down the list into individual researchers, and launch
     the function to get their individual documents lists."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving peer reviews metadata'
+    state.update(0, 'Retrieving peer reviews metadata')
     peer_reviews = []
 
-    for i, profile in enumerate(profiles):
-        peer_reviews.extend(get_individual_peer_reviews_list(profile))
-        state.progress = (i + 1) / len(profiles) * 100
+    profiles_by_rid = {profile['primary_rid']: profile for profile in profiles}
+    rids = [profile['primary_rid'] for profile in profiles]
+    profiles_peer_reviews = fetch_pages(
+        checkpoints.resumable(
+            lambda rid: get_individual_peer_reviews_list(
+                profiles_by_rid[rid]
+            ),
+            'peer reviews', rids
+        ),
+        rids
+    )
+    for i, profile_peer_reviews in enumerate(profiles_peer_reviews):
+        peer_reviews.extend(profile_peer_reviews)
+        state.update((i + 1) / len(profiles) * 100)
 
     return pd.DataFrame(peer_reviews)
 
@@ -222,11 +262,11 @@ def get_individual_peer_reviews_list(profile: dict) -> list[dict]:
     requests_required = (total_peer_reviews - 1) // 50 + 1
     max_requests = min(requests_required, 1000)
 
-    for i in range(1, max_requests):
-        subsequent_peer_review_json = peer_review_api_request(
-            profile['primary_rid'],
-            i + 1
-        )
+    subsequent_peer_review_jsons = fetch_pages(
+        lambda page: peer_review_api_request(profile['primary_rid'], page),
+        range(2, max_requests + 1)
+    )
+    for subsequent_peer_review_json in subsequent_peer_review_jsons:
         for peer_review in subsequent_peer_review_json['hits']:
             peer_reviews.append(
                 fetch_peer_review_metadata(
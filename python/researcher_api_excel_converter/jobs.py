@@ -0,0 +1,381 @@
+"""
+Background jobs for the long retrievals of the app, so that the 'Run'
+button does not hold the HTTP request until the retrieval is complete,
+and several searches can run at the same time.
+
+The jobs are run by a pool of JOB_WORKERS threads, sharing the API
+client with its rate governor. Their parameters, status and results are
+stored in an SQLite database under JOBS_DIR, so that the results of the
+finished jobs survive the restarts of the app, and the queued jobs are
+run after the restart. The jobs interrupted by the restart are run once
+more, resuming their retrievals from the checkpoints (see
+checkpoints.py).
+
+A job submitted with the same kind and parameters as a job of the same
+day that is finished or still running reuses that job, unless it is
+older than RESULT_FRESHNESS or the refresh is requested: several users
+running the same searches every morning get the results at once. The
+job refreshing the results does not use the cached responses, the
+query sessions or the checkpoints from before its submission.
+
+The app registers its tasks with the task decorator, and the blueprint
+adds the endpoints to submit a job, check its status, follow its
+progress and get its result.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import inspect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from flask import Blueprint, Response, g, jsonify, request, url_for
+import checkpoints
+import state
+
+JOBS_DIR = 'jobs'
+JOB_WORKERS = 2
+# How long the finished jobs are kept, in seconds
+JOB_RETENTION = 30 * 24 * 60 * 60
+# The error of the jobs run again after the restart of the app
+RESUMED = 'Interrupted by the restart of the app, resumed'
+# How long the results of a job are reused by the identical jobs
+# submitted the same day, in seconds
+RESULT_FRESHNESS = 12 * 60 * 60
+# How often the progress stream sends a comment line while the progress
+# does not change, in seconds, so that the closed connections are found
+HEARTBEAT = 15
+
+# The task functions and their result renderers, by the job kind
+tasks = {}
+renderers = {}
+
+executor = ThreadPoolExecutor(max_workers=JOB_WORKERS,
+                              thread_name_prefix='job')
+lock = threading.Lock()
+resumed = threading.Event()
+
+blueprint = Blueprint('jobs', __name__)
+
+
+def connect():
+    """Open the jobs database, creating it if necessary.
+
+    :return: sqlite3.Connection.
+    """
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    connection = sqlite3.connect(os.path.join(JOBS_DIR, 'jobs.sqlite3'),
+                                 timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        'id TEXT PRIMARY KEY, '
+        'kind TEXT NOT NULL, '
+        'params TEXT NOT NULL, '
+        'status TEXT NOT NULL, '
+        'submitted REAL NOT NULL, '
+        'started REAL, '
+        'finished REAL, '
+        'result BLOB, '
+        'error TEXT, '
+        'refresh INTEGER NOT NULL DEFAULT 0)'
+    )
+    columns = [row['name'] for row in
+               connection.execute('PRAGMA table_info(jobs)')]
+    if 'refresh' not in columns:
+        # The database of an earlier version of the app
+        connection.execute('ALTER TABLE jobs ADD COLUMN '
+                           'refresh INTEGER NOT NULL DEFAULT 0')
+    return connection
+
+
+def execute(query, parameters=()):
+    """Run a query against the jobs database.
+
+    :param query: str.
+    :param parameters: tuple.
+    :return: list[sqlite3.Row].
+    """
+    with lock:
+        connection = connect()
+        try:
+            rows = connection.execute(query, parameters).fetchall()
+            connection.commit()
+        finally:
+            connection.close()
+    return rows
+
+
+def task(kind, render=None):
+    """Register the function as the task run by the jobs of the kind.
+
+    :param kind: str.
+    :param render: function or None, accepting the finished job and
+        returning the page with its results.
+    :return: function.
+    """
+    def register(function):
+        tasks[kind] = function
+        if render is not None:
+            renderers[kind] = render
+        return function
+    return register
+
+
+def cache_key(params):
+    """Build the key identifying the same search: the whitespace of the
+    values does not matter, and neither do the letter case and the
+    spaces around the field tags of the search query.
+
+    :param params: dict.
+    :return: str.
+    """
+    key = {}
+    for name, value in params.items():
+        if isinstance(value, str):
+            value = ' '.join(value.split())
+            if name == 'search_query':
+                value = re.sub(r' ?= ?', '=', value.casefold())
+        key[name] = value
+    return json.dumps(key, sort_keys=True)
+
+
+def find_fresh(kind, params):
+    """Find the job of the same kind and parameters submitted today and
+    within RESULT_FRESHNESS, that is finished or still running.
+
+    :param kind: str.
+    :param params: dict.
+    :return: str or None, the job ID.
+    """
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    rows = execute(
+        "SELECT id, params FROM jobs WHERE kind = ? AND submitted > ? "
+        "AND status IN ('queued', 'running', 'done') "
+        "ORDER BY submitted DESC",
+        (kind, max(today.timestamp(), time.time() - RESULT_FRESHNESS))
+    )
+    key = cache_key(params)
+    for row in rows:
+        if cache_key(json.loads(row['params'])) == key:
+            return row['id']
+    return None
+
+
+def submit(kind, refresh=False, **params):
+    """Queue a new job, or reuse the fresh results of the same job.
+
+    :param kind: str.
+    :param refresh: bool, to run the job even if fresh results exist.
+    :param params: the arguments of the task function.
+    :return: str, the job ID.
+    """
+    inspect.signature(tasks[kind]).bind(**params)
+    if not refresh:
+        job_id = find_fresh(kind, params)
+        if job_id is not None:
+            return job_id
+    job_id = uuid.uuid4().hex
+    submitted = time.time()
+    execute(
+        'INSERT INTO jobs (id, kind, params, status, submitted, refresh) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (job_id, kind, json.dumps(params), 'queued', submitted, refresh)
+    )
+    execute('DELETE FROM jobs WHERE finished < ?',
+            (time.time() - JOB_RETENTION,))
+    state.open_channel(job_id)
+    executor.submit(run, job_id, kind, params,
+                    submitted if refresh else None)
+    return job_id
+
+
+def run(job_id, kind, params, fresh_since=None):
+    """Run the job in a worker thread, and save its result or error.
+
+    :param job_id: str.
+    :param kind: str.
+    :param params: dict.
+    :param fresh_since: float or None, the submission time of the job
+        refreshing the results.
+    """
+    execute('UPDATE jobs SET status = ?, started = ? WHERE id = ?',
+            ('running', time.time(), job_id))
+    state.bind(job_id, fresh_since)
+    checkpoints.begin()
+    try:
+        result = tasks[kind](**params)
+    except Exception as error:
+        print(f'Oops, job {job_id} has failed: {error!r}')
+        execute(
+            'UPDATE jobs SET status = ?, finished = ?, error = ? '
+            'WHERE id = ?',
+            ('failed', time.time(), str(error) or repr(error), job_id)
+        )
+    else:
+        execute(
+            'UPDATE jobs SET status = ?, finished = ?, result = ?, '
+            'error = NULL WHERE id = ?',
+            ('done', time.time(), zlib.compress(json.dumps(result).encode()),
+             job_id)
+        )
+        checkpoints.discard()
+    finally:
+        checkpoints.release()
+        state.bind(None)
+        state.close_channel(job_id)
+
+
+def get(job_id):
+    """Find the job by its ID.
+
+    :param job_id: str.
+    :return: dict or None, with the decoded parameters and result.
+    """
+    rows = execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+    if not rows:
+        return None
+    job = dict(rows[0])
+    job['params'] = json.loads(job['params'])
+    if job['result'] is not None:
+        job['result'] = json.loads(zlib.decompress(job['result']))
+    return job
+
+
+def resume():
+    """Queue again the jobs left unfinished by the previous run of the
+    app: the queued ones are run, and the running ones were interrupted
+    and are run again from their checkpoints, unless they were already
+    resumed once, in case they were the cause of the crash."""
+    if resumed.is_set():
+        return
+    resumed.set()
+    execute(
+        'UPDATE jobs SET status = ?, finished = ?, error = ? '
+        'WHERE status = ? AND error IS ?',
+        ('failed', time.time(), 'Interrupted by the restart of the app',
+         'running', RESUMED)
+    )
+    execute(
+        'UPDATE jobs SET status = ?, error = ? WHERE status = ?',
+        ('queued', RESUMED, 'running')
+    )
+    for row in execute("SELECT * FROM jobs WHERE status = 'queued' "
+                       "ORDER BY submitted"):
+        if row['kind'] in tasks:
+            state.open_channel(row['id'])
+            executor.submit(run, row['id'], row['kind'],
+                            json.loads(row['params']),
+                            row['submitted'] if row['refresh'] else None)
+
+
+def describe(job):
+    """Build the public status of the job.
+
+    :param job: dict.
+    :return: dict.
+    """
+    return {
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'submitted': job['submitted'],
+        'started': job['started'],
+        'finished': job['finished'],
+        'error': job['error'],
+        'status_url': url_for('jobs.job_status', job_id=job['id']),
+        'stream_url': url_for('jobs.job_stream', job_id=job['id']),
+        'result_url': url_for('jobs.job_result', job_id=job['id'])
+    }
+
+
+@blueprint.before_app_request
+def resume_once():
+    """Resume the unfinished jobs when the app serves its first request,
+    i.e. not in the process of the Flask reloader."""
+    resume()
+
+
+@blueprint.app_context_processor
+def finished_job_time():
+    """Show on the results page when they were retrieved, as they can be
+    reused by the later runs of the same search."""
+    job = g.get('finished_job')
+    if job is None or job['status'] != 'done':
+        return {}
+    return {'retrieved_at': time.strftime('%H:%M',
+                                          time.localtime(job['finished']))}
+
+
+@blueprint.route('/jobs', methods=['POST'])
+def job_submit():
+    """Submit a job of the 'kind' value with the other request values
+    as its parameters, and the optional 'refresh' flag."""
+    params = request.get_json(silent=True) or request.form.to_dict()
+    kind = params.pop('kind', None)
+    refresh = params.pop('refresh', False) not in (False, 'false', '0', '')
+    if kind not in tasks:
+        return jsonify({'message': f'Unknown job kind: {kind}'}), 400
+    try:
+        job_id = submit(kind, refresh, **params)
+    except TypeError as error:
+        return jsonify({'message': f'Invalid job parameters: {error}'}), 400
+    return jsonify(describe(get(job_id))), 202
+
+
+@blueprint.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Return the status of the job."""
+    job = get(job_id)
+    if job is None:
+        return jsonify({'message': f'Unknown job: {job_id}'}), 404
+    return jsonify(describe(job))
+
+
+@blueprint.route('/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """Stream the progress of the job as server-sent events until the
+    job is finished or the client disconnects."""
+    job = get(job_id)
+    if job is None:
+        return jsonify({'message': f'Unknown job: {job_id}'}), 404
+    channel = state.channels.get(job_id)
+
+    def generate():
+        if channel is None:
+            # The job was finished before the subscription
+            data = {'task': '', 'progress': 100, 'finished': True}
+            yield f'data: {json.dumps(data)}\n\n'
+            return
+        version = None
+        while True:
+            change = channel.wait(version, HEARTBEAT)
+            if change is None:
+                # Writing to a closed connection ends the generator
+                yield ': heartbeat\n\n'
+                continue
+            version, data = change
+            yield f'data: {json.dumps(data)}\n\n'
+            if data['finished']:
+                return
+    return Response(generate(), mimetype='text/event-stream')
+
+
+@blueprint.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Render the page with the results of the finished job, or return
+    its status if it is not finished yet."""
+    job = get(job_id)
+    if job is None:
+        return jsonify({'message': f'Unknown job: {job_id}'}), 404
+    if job['status'] in ('queued', 'running'):
+        return jsonify(describe(job)), 409
+    if job['kind'] in renderers:
+        g.finished_job = job
+        return renderers[job['kind']](job)
+    return jsonify(describe(job) | {'result': job['result']})
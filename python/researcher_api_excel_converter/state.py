@@ -1,2 +1,168 @@
-progress = 0
-current_task = ""
\ No newline at end of file
+"""
+A small module required to track the status of the processes and update
+the progress bar on the webpage.
+
+Each job publishes its progress to its own channel, so that concurrent
+runs do not overwrite each other's progress bar. The processing
+functions call update() in the thread of the job, and the subscribers
+are woken up by the condition of the channel on every change instead of
+polling it.
+
+The thread running a job is bound to its Job, which also keeps the
+objects of the other modules that belong to the job, e.g. the retry
+budget of api_client, and whether the job refreshes its results. The
+threads retrieving the pages of the job are attached to the same Job.
+"""
+
+import threading
+
+# The channels of the unfinished jobs, by the job ID
+channels = {}
+
+lock = threading.Lock()
+local = threading.local()
+
+
+class Channel:
+    """The progress of one job, with the notification of its changes to
+    the subscribers."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.progress = 0
+        self.current_task = ""
+        self.finished = False
+        self.version = 0
+
+    def publish(self, progress, task=None, finished=False):
+        """Save the new progress and wake up the subscribers.
+
+        :param progress: float, in percent.
+        :param task: str or None to keep the current task.
+        :param finished: bool.
+        """
+        with self.condition:
+            self.progress = progress
+            if task is not None:
+                self.current_task = task
+            self.finished = self.finished or finished
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Wait until the progress changes from the version seen by the
+        subscriber, or the timeout expires.
+
+        :param version: int.
+        :param timeout: float, seconds.
+        :return: tuple, the latest version and the progress dict, or
+            None if nothing has changed.
+        """
+        with self.condition:
+            if not self.condition.wait_for(
+                    lambda: self.version != version, timeout):
+                return None
+            return self.version, {
+                "task": self.current_task,
+                "progress": self.progress,
+                "finished": self.finished
+            }
+
+
+class Job:
+    """The job run by a thread: its progress channel, the objects of
+    the other modules that belong to it, and the time since which the
+    cached responses and the checkpoints can be used, for the jobs
+    refreshing their results."""
+
+    def __init__(self, job_id=None, fresh_since=None):
+        self.job_id = job_id
+        self.fresh_since = fresh_since
+        self.channel = channels.get(job_id)
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, factory):
+        """Get the object of the job, creating it on the first use.
+
+        :param name: str.
+        :param factory: function without arguments, creating the object.
+        :return: the object.
+        """
+        with self.lock:
+            if name not in self.objects:
+                self.objects[name] = factory()
+            return self.objects[name]
+
+    def set(self, name, value):
+        """Replace the object of the job.
+
+        :param name: str.
+        :param value: the object.
+        """
+        with self.lock:
+            self.objects[name] = value
+
+
+def open_channel(job_id):
+    """Create the progress channel of the job.
+
+    :param job_id: str.
+    :return: Channel.
+    """
+    with lock:
+        return channels.setdefault(job_id, Channel())
+
+
+def close_channel(job_id):
+    """Notify the subscribers that the job is finished and forget its
+    channel.
+
+    :param job_id: str.
+    """
+    with lock:
+        channel = channels.pop(job_id, None)
+    if channel is not None:
+        channel.publish(100, "", finished=True)
+
+
+def bind(job_id, fresh_since=None):
+    """Make the calling thread run a new job, publishing its progress to
+    the channel of the job, or unbind the thread if job_id is None.
+
+    :param job_id: str or None.
+    :param fresh_since: float or None, the time before which the cached
+        responses and the checkpoints are not used, e.g. the submission
+        of the job refreshing the results.
+    """
+    local.job = None if job_id is None else Job(job_id, fresh_since)
+
+
+def attach(job):
+    """Make the calling thread work for the job run by another thread,
+    e.g. to retrieve its pages.
+
+    :param job: Job.
+    """
+    local.job = job
+
+
+def current():
+    """Get the job of the calling thread, or a new one for the calls
+    made outside of any job.
+
+    :return: Job.
+    """
+    job = getattr(local, 'job', None)
+    return Job() if job is None else job
+
+
+def update(progress, task=None):
+    """Publish the progress of the job run by the calling thread.
+
+    :param progress: float, in percent.
+    :param task: str or None to keep the current task.
+    """
+    channel = current().channel
+    if channel is not None:
+        channel.publish(progress, task)
@@ -1,7 +1,4 @@
-const evtSource = new EventSource("/stream");
-
-evtSource.onmessage = (event) => {
-  const data = JSON.parse(event.data);
+const showProgress = (data) => {
   const task = data.task || "";
   const progress = Math.floor(data.progress || 0);
 
@@ -32,4 +29,25 @@ document.addEventListener("DOMContentLoaded", () => {
             }, 50); // 50ms is usually enough
         });
     });
+});
+
+// Follow the progress of the background job of the retrieval, then show its results
+document.addEventListener("DOMContentLoaded", () => {
+    const job = document.getElementById("job");
+    if (!job) return;
+
+    // Keep the buttons inactive while the job is running
+    document.querySelectorAll("button[name='button']").forEach(b => {
+        b.disabled = true;
+    });
+
+    const evtSource = new EventSource(job.dataset.streamUrl);
+    evtSource.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        showProgress(data);
+        if (data.finished) {
+            evtSource.close();
+            window.location.href = job.dataset.resultUrl;
+        }
+    };
 });
\ No newline at end of file
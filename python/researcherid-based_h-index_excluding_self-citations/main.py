@@ -9,14 +9,23 @@ The program prints the general results but also generates a .csv file containing
 and its citation counts - both including and excluding self-citations, making it possible to
 figure out which specific documents fall out of the H-index calculation if self-citations are
 excluded.
+
+The progress is saved to the CHECKPOINT_FILE after every request, so if the program is interrupted,
+the next run for the same search query resumes from where it stopped.
 """
 
+import json
+import os
 import requests
 from apikey import APIKEY   # Your API key, it's better not to store it in the program
 
 SEARCH_QUERY = 'AI=A-5224-2009'  # Enter the WoS search query here
 
 HEADERS = {'X-APIKey': APIKEY}
+API_URL = os.environ.get('CLARIVATE_API_URL', 'https://api.clarivate.com')
+CHECKPOINT_FILE = 'h-index.checkpoint.json'
+# The only record field read by analyze_core_papers, so the full records are not requested
+VIEW_FIELD = 'tc_list'
 
 
 def analyze_core_papers(doc):
@@ -34,12 +43,39 @@ def analyze_core_papers(doc):
     return {'UT': doc['UID'], 'times_cited': times_cited, 'tc_minus_sc': times_cited}
 
 
-# A list to store all required WoS document metadata
-papers = []
+def load_checkpoint():
+    """Read the progress saved by an interrupted run of the same search query
+
+    :return: dict.
+    """
+    try:
+        with open(CHECKPOINT_FILE, encoding='utf-8') as f:
+            saved_progress = json.load(f)
+        if saved_progress['query'] == SEARCH_QUERY:
+            print(f'Resuming the interrupted run from {CHECKPOINT_FILE}')
+            return saved_progress
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError):
+        print(f'Oops, {CHECKPOINT_FILE} is damaged - starting over...')
+    return {'query': SEARCH_QUERY, 'papers': [], 'pages_done': 0, 'papers_checked': 0}
+
+
+def save_checkpoint():
+    """Save the progress, replacing the earlier checkpoint only once it is fully written"""
+    with open(f'{CHECKPOINT_FILE}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(progress, f)
+    os.replace(f'{CHECKPOINT_FILE}.tmp', CHECKPOINT_FILE)
+
+
+# The progress of the run: the list to store all required WoS document metadata, how many pages
+# of them were retrieved, and how many of them were checked for self-citations
+progress = load_checkpoint()
+papers = progress['papers']
 
 # Initial request to the API is made to figure out the total amount of requests required
 initial_response = requests.get(
-    f'https://api.clarivate.com/api/wos?databaseId=WOS&usrQuery={SEARCH_QUERY}&'
+    f'{API_URL}/api/wos?databaseId=WOS&usrQuery={SEARCH_QUERY}&'
     f'count=0&firstRecord=1',
     headers=HEADERS,
     timeout=16
@@ -53,18 +89,21 @@ if requests_required > 1:
     print(f'API requests required to get all the author papers data: {requests_required}')
 
 # Send requests to Web of Science Expanded API to get all the core papers
-for i in range(requests_required):
+for i in range(progress['pages_done'], requests_required):
     subsequent_response = requests.get(
-        f'https://api.clarivate.com/api/wos?databaseId=WOS&usrQuery={SEARCH_QUERY}&'
-        f'count=100&firstRecord={i}01',
+        f'{API_URL}/api/wos?databaseId=WOS&usrQuery={SEARCH_QUERY}&'
+        f'count=100&firstRecord={i}01&viewField={VIEW_FIELD}',
         headers=HEADERS,
         timeout=16
     )
     data = subsequent_response.json()
     for wos_record in data['Data']['Records']['records']['REC']:
         papers.append(analyze_core_papers(wos_record))
+    progress['pages_done'] = i + 1
+    save_checkpoint()
 
-# Calculate the standard H-index (which includes the self-citations).
+# Calculate the standard H-index (which includes the self-citations). The sort is stable, so the
+# papers already checked by an interrupted run stay first.
 papers.sort(reverse=True, key=lambda x: x['times_cited'])
 h_index_including_sc = len(papers)
 for paper in papers:
@@ -75,10 +114,10 @@ print(f'\nThe H-index including self-citations is: {h_index_including_sc}. '
       f'Now finding self-citations and excluding them.\n')
 
 # Check if any of the documents are referencing any other documents from the initial search query.
-for paper in papers:
+for paper in papers[progress['papers_checked']:]:
     print(f'Checking self-references in paper {papers.index(paper) + 1} of {len(papers)}')
     initial_response = requests.get(
-        f"https://api.clarivate.com/api/wos/references?databaseId=WOS&uniqueId={paper['UT']}&"
+        f"{API_URL}/api/wos/references?databaseId=WOS&uniqueId={paper['UT']}&"
         f"count=0&firstRecord=1",
         headers=HEADERS,
         timeout=16)
@@ -87,7 +126,7 @@ for paper in papers:
     requests_required = ((total_records - 1) // 100) + 1
     for i in range(requests_required):
         subsequent_cited_response = requests.get(
-            f"https://api.clarivate.com/api/wos/references?databaseId=WOS&uniqueId={paper['UT']}&"
+            f"{API_URL}/api/wos/references?databaseId=WOS&uniqueId={paper['UT']}&"
             f"count=100&firstRecord={i}01",
             headers=HEADERS,
             timeout=16)
@@ -96,7 +135,8 @@ for paper in papers:
             for cited_paper in papers:
                 if cited_reference['UID'] == cited_paper['UT']:
                     cited_paper['tc_minus_sc'] -= 1
-
+    progress['papers_checked'] += 1
+    save_checkpoint()
 
 # Calculate the H-index without self-citations
 papers.sort(reverse=True, key=lambda x: x['tc_minus_sc'])
@@ -120,3 +160,7 @@ with open('h-index.csv', 'w', encoding='utf-8') as writing:
                   "Times Cited (excluding self-citations)\n")
     for paper in papers:
         writing.writelines(f"{paper['UT']},{paper['times_cited']},{paper['tc_minus_sc']}\n")
+
+# The run is complete, so there is nothing to resume
+if os.path.exists(CHECKPOINT_FILE):
+    os.remove(CHECKPOINT_FILE)
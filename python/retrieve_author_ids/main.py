@@ -9,6 +9,7 @@ and run the code.
 The program generates a .csv file containing every document and every author affiliated with this organization
 """
 
+import os
 import urllib.parse
 import requests
 from apikey import APIKEY  # Create a separate apikey.py file in the project folder to store your API key there
@@ -17,24 +18,32 @@ OUR_ORG = 'Clarivate'  # Enter the organization that you would like to analyze f
 ADDTL_PARAMS = 'PY=2008-2022'  # Enter additional search parameters, such as publication year
 
 HEADERS = {'X-APIKey': APIKEY}
-BASEURL = "https://api.clarivate.com/api/wos"
+BASEURL = f"{os.environ.get('CLARIVATE_API_URL', 'https://api.clarivate.com')}/api/wos"
+
+
+def wos_records(requests_required):
+    """Retrieve the records page by page, and yield them one by one, so that every page is parsed as soon as it
+    arrives, and only a single page of the raw records is kept in memory at any moment.
+
+    :param requests_required: int.
+    :return: generator of dict.
+    """
+    for i in range(requests_required):
+        subsequent_response = requests.get(
+            f'{BASEURL}?databaseId=WOS&usrQuery=OG={urllib.parse.quote(OUR_ORG)} AND {ADDTL_PARAMS}&count=100&'
+            f'firstRecord={i}01', headers=HEADERS)
+        yield from subsequent_response.json()['Data']['Records']['records']['REC']
+        print(f"{(((i + 1) * 100) / requests_required):.1f}% of API requests complete")
+
 
 # Getting all the necessary records via API requests
 initial_response = requests.get(f'{BASEURL}?databaseId=WOS&usrQuery=OG={urllib.parse.quote(OUR_ORG)} '
                                 f'AND {ADDTL_PARAMS}&count=0&firstRecord=1', headers=HEADERS)
 initial_json = initial_response.json()
 requests_required = (((initial_json['QueryResult']['RecordsFound'] - 1) // 100) + 1)
-data = []
-for i in range(requests_required):
-    subsequent_response = requests.get(
-        f'{BASEURL}?databaseId=WOS&usrQuery=OG={urllib.parse.quote(OUR_ORG)} AND {ADDTL_PARAMS}&count=100&'
-        f'firstRecord={i}01', headers=HEADERS)
-    for wos_record in subsequent_response.json()['Data']['Records']['records']['REC']:
-        data.append(wos_record)
-    print(f"{(((i + 1) * 100) / requests_required):.1f}% of API requests complete")
 
 authors_list = []
-for wos_record in data:
+for wos_record in wos_records(requests_required):
     ut = wos_record['UID']
     # When there are 0 org affiliations in a particular WoS record - this can sometimes happen, and then there's no
     # author data that is linked to our organizational profile
@@ -3,8 +3,22 @@ Retrieve data from Web of Science Core Collection with Web of Science
 Expanded API.
 """
 
-import requests
-import time
+import api_client
+from api_client import EXPANDED_API_URL
+
+
+def search_wos(apikey, query):
+    """Run the search query on the server side once, or reuse the recent
+    run of the same search query, e.g. by its validation.
+
+    :param apikey: str.
+    :param query: str.
+    :return: api_client.QuerySession.
+    """
+    return api_client.open_query(
+        apikey,
+        {'databaseId': 'WOS', 'usrQuery': query}
+    )
 
 
 def validate_search_query(apikey, query):
@@ -15,54 +29,38 @@ def validate_search_query(apikey, query):
     :param query: str.
     :return: int.
     """
-    request = requests.get(
-        url=f'https://wos-api.clarivate.com/api/wos/?databaseId=WOS&usrQuery='
-            f'{query}&count=0&firstRecord=1',
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
+    query_session = search_wos(apikey, query)
 
-    if request.status_code == 200:
-        json = request.json()
-        return request.status_code, json['QueryResult']['RecordsFound']
-    return request.status_code, request.json()['message'].split(':')[-1]
+    if query_session.status_code == 200:
+        return query_session.status_code, query_session.records_found
+    return query_session.status_code, query_session.message
 
 
-def base_records_api_call(apikey, query, first_record=1):
+def base_records_api_call(query_session, first_record=1, parsers=()):
     """Retrieve Web of Science documents metadata through
-    Web of Science Expanded API.
+    Web of Science Expanded API by the query ID of the search, limited
+    to the fields read by the parsers.
 
-    :param apikey: str.
-    :param query: str.
+    :param query_session: api_client.QuerySession.
     :param first_record: int.
+    :param parsers: tuple.
     :return: dict.
     """
-    params = {
-        'databaseId': 'WOS',
-        'usrQuery': query,
-        'count': 100,
-        'firstRecord': first_record
-    }
-    request = requests.get(
-        url='https://wos-api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-
-    if request.headers['x-req-reqpersec-remaining'] == 0:
-        time.sleep(.2)
-
-    return request.json()
+    return query_session.records(first_record, parsers=parsers)
 
 
-def citing_records_api_call(apikey, ut, first_record=1):
+def citing_records_api_call(apikey, ut, first_record=1, parsers=(),
+                            records_found=None):
     """Retrieve Web of Science citing documents metadata through
-    Web of Science Expanded API.
+    Web of Science Expanded API, limited to the fields read by the
+    parsers.
 
     :param apikey: str.
     :param ut: str.
     :param first_record: int.
+    :param parsers: tuple.
+    :param records_found: int or None, the number of citing documents
+        if known from the first page.
     :return: dict.
     """
     params = {
@@ -71,14 +69,11 @@ def citing_records_api_call(apikey, ut, first_record=1):
         'count': 100,
         'firstRecord': first_record
     }
-    request = requests.get(
-        url='https://wos-api.clarivate.com/api/wos/citing/',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
+    if parsers:
+        params['viewField'] = api_client.view_field(*parsers)
+    return api_client.get_records(
+        f'{EXPANDED_API_URL}/citing',
+        apikey,
+        params,
+        records_found=records_found
     )
-
-    if int(request.headers['x-req-reqpersec-remaining']) == 0:
-        time.sleep(.2)
-
-    return request.json()
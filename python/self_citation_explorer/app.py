@@ -6,35 +6,20 @@ Main app file: manage Flask interface actions and rendering, manage the
 main function that is launched on clicking the "Run" button.
 """
 
-import json
-import state
-import time
+import jobs
+import plotly_js
+import result_store
 
-from flask import Flask, render_template, request, Response
+from flask import Flask, render_template, request
 from data_processing import run_button
 from visualizations import visualize_excel
 from api_operations import validate_search_query
 from apikeys import EXPANDED_APIKEY
 
 app = Flask(__name__)
-
-
-@app.route("/stream")
-def stream():
-    def generate():
-        last_progress = -1
-        last_task = ""
-        while True:
-            if (state.progress != last_progress) or (state.current_task != last_task):
-                data = {
-                    "task": state.current_task,
-                    "progress": state.progress
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_progress = state.progress
-                last_task = state.current_task
-            time.sleep(0.2)
-    return Response(generate(), mimetype="text/event-stream")
+app.register_blueprint(jobs.blueprint)
+app.register_blueprint(plotly_js.blueprint)
+app.register_blueprint(result_store.blueprint)
 
 
 @app.route(rule="/", methods=['POST', 'GET'])
@@ -83,13 +68,16 @@ def search_section(button, search_query):
         )
 
     # Run search query
-    if search_query != '' and button == 'run':
-        safe_filename, plot = run_button(EXPANDED_APIKEY, search_query)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'run',
+            search_query=search_query,
+            refresh=button == 'refresh'
+        )
         return render_template(
             'index.html',
-            filename=safe_filename,
-            search_query=search_query,
-            plot=plot
+            job_id=job_id,
+            search_query=search_query
         )
 
     return render_template('index.html', search_query='')
@@ -108,5 +96,36 @@ def load_file_section(file):
     return render_template('index.html', plot=plot, index=0)
 
 
+def render_run_results(job):
+    """Render the results of the finished 'Run' job, or its error.
+
+    :param job: dict.
+    :return: render_template.
+    """
+    if job['status'] == 'failed':
+        return render_template(
+            'index.html',
+            message=job['error'],
+            **job['params']
+        )
+    return render_template(
+        'index.html',
+        filename=job['result']['filename'],
+        plot=job['result']['plot'],
+        **job['params']
+    )
+
+
+@jobs.task('run', render=render_run_results)
+def run_job(search_query):
+    """Run the retrieval and the analysis in a background job.
+
+    :param search_query: str.
+    :return: dict.
+    """
+    safe_filename, plot = run_button(EXPANDED_APIKEY, search_query)
+    return {'filename': safe_filename, 'plot': plot}
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5003)
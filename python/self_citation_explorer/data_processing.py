@@ -5,10 +5,23 @@ self-citations, and convert them into Pandas dataframes for
 visualizing.
 """
 
+import checkpoints
+import result_store
 import state
 from datetime import date
 import pandas as pd
-from api_operations import base_records_api_call, citing_records_api_call
+from api_client import (
+    check_annual_quota,
+    fetch_pages,
+    retry_budget,
+    start_job,
+    view_fields
+)
+from api_operations import (
+    base_records_api_call,
+    citing_records_api_call,
+    search_wos
+)
 from visualizations import visualize_data
 
 
@@ -21,6 +34,8 @@ def run_button(apikey, search_query):
     :return: str, str.
     """
 
+    start_job()
+
     # Retrieving the base records and parsing their metadata
     cited_records_list = get_cited_records(apikey, search_query)
 
@@ -41,16 +56,23 @@ def run_button(apikey, search_query):
 
     # Save data to file
     safe_filename = search_query.replace('*', '').replace('"', '')
-    with pd.ExcelWriter(f'downloads/{safe_filename} - {date.today()}.xlsx') as writer:
-        df.to_excel(writer, sheet_name='Citation Links', index=False)
-        df2.to_excel(writer, sheet_name='Self-citation rates')
-        df3.to_excel(writer, sheet_name='Search query', index=False)
+    result_store.save(
+        f'downloads/{safe_filename} - {date.today()}.xlsx',
+        {
+            'Citation Links': df,
+            'Self-citation rates': df2,
+            'Search query': df3
+        },
+        index=('Self-citation rates',)
+    )
 
     # Visualise the data
     plots = visualize_data(df2, search_query)
 
-    state.progress = 0
-    state.current_task = ""
+    state.update(0, "")
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return f'{safe_filename} - {date.today()}.xlsx', plots
 
@@ -64,28 +86,35 @@ def get_cited_records(apikey, query):
     :return: list.
     """
 
-    state.progress = 0
-    state.current_task = "Retrieving Web of Science documents"
+    state.update(0, "Retrieving Web of Science documents")
 
     result = []
-    initial_json = base_records_api_call(apikey, query)
+    query_session = search_wos(apikey, query)
+    total_results = query_session.records_found
+    requests_required = ((total_results - 1) // 100) + 1
+    max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
+    initial_json = base_records_api_call(
+        query_session, parsers=(fetch_cited_metadata,)
+    )
 
     for record in initial_json['Data']['Records']['records']['REC']:
         result.append(fetch_cited_metadata(record))
-    total_results = initial_json['QueryResult']['RecordsFound']
-    requests_required = ((total_results - 1) // 100) + 1
-    max_requests = min(requests_required, 1000)
 
-    for i in range(1, max_requests):
-        first_record = int(f'{i}01')
-        subsequent_json = base_records_api_call(
-            apikey,
-            query,
-            first_record
-        )
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: base_records_api_call(
+                query_session, first_record, parsers=(fetch_cited_metadata,)
+            ),
+            'cited records',
+            query_session.params, query_session.records_found
+        ),
+        [int(f'{i}01') for i in range(1, max_requests)]
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         for record in subsequent_json['Data']['Records']['records']['REC']:
             result.append(fetch_cited_metadata(record))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     return result
 
@@ -98,39 +127,67 @@ def get_citation_links(apikey, cited_records):
     :return: list.
     """
 
-    state.progress = 0
-    state.current_task = "Retrieving citing records"
+    state.update(0, "Retrieving citing records")
 
     result = []
-    for j, cited_record in enumerate(cited_records):
-        if cited_record['times_cited'] > 0:
+    cited_records_by_ut = {
+        cited_record['cited_ut']: cited_record
+        for cited_record in cited_records if cited_record['times_cited'] > 0
+    }
+    record_links = fetch_pages(
+        checkpoints.resumable(
+            lambda cited_ut: get_record_citation_links(
+                apikey, cited_records_by_ut[cited_ut]
+            ),
+            'citation links',
+            [cited_record['cited_ut'] for cited_record in cited_records]
+        ),
+        cited_records_by_ut
+    )
+    for j, links in enumerate(record_links):
+        result.extend(links)
+        state.update((j + 1) / len(cited_records_by_ut) * 100)
 
-            initial_json = citing_records_api_call(
-                apikey,
-                cited_record['cited_ut']
-            )
+    return result
 
-            for citing_record in initial_json['Data']['Records']['records']['REC']:
-                result.append(
-                    fetch_citing_metadata(cited_record, citing_record)
-                )
-
-            total_results = initial_json['QueryResult']['RecordsFound']
-            requests_required = ((total_results - 1) // 100) + 1
-
-            if requests_required > 1:
-                for i in range(1, requests_required):
-                    first_record = int(f'{i}01')
-                    subsequent_json = citing_records_api_call(
-                        apikey,
-                        cited_record['cited_ut'],
-                        first_record
-                    )
-                    for citing_record in subsequent_json['Data']['Records']['records']['REC']:
-                        result.append(
-                            fetch_citing_metadata(cited_record, citing_record)
-                        )
-        state.progress = (j + 1) / len(cited_records) * 100
+
+def get_record_citation_links(apikey, cited_record):
+    """Retrieve all the pages of the records citing the cited record
+    and parse their citation links.
+
+    :param apikey: str.
+    :param cited_record: dict.
+    :return: list.
+    """
+
+    result = []
+    initial_json = citing_records_api_call(
+        apikey,
+        cited_record['cited_ut'],
+        parsers=(fetch_citing_metadata,)
+    )
+
+    for citing_record in initial_json['Data']['Records']['records']['REC']:
+        result.append(fetch_citing_metadata(cited_record, citing_record))
+
+    total_results = initial_json['QueryResult']['RecordsFound']
+    requests_required = ((total_results - 1) // 100) + 1
+
+    subsequent_jsons = fetch_pages(
+        lambda first_record: citing_records_api_call(
+            apikey,
+            cited_record['cited_ut'],
+            first_record,
+            parsers=(fetch_citing_metadata,),
+            records_found=total_results
+        ),
+        [int(f'{i}01') for i in range(1, requests_required)]
+    )
+    for subsequent_json in subsequent_jsons:
+        for citing_record in subsequent_json['Data']['Records']['records']['REC']:
+            result.append(
+                fetch_citing_metadata(cited_record, citing_record)
+            )
 
     return result
 
@@ -279,6 +336,7 @@ def fetch_times_cited(tc_json):
     return 0
 
 
+@view_fields('names', 'addresses', 'titles', 'tc_list')
 def fetch_cited_metadata(rec):
     """Retrieve the necessary metadata fields of cited documents from a
     deeply nested JSON, return them as a simple dict.
@@ -308,6 +366,7 @@ def fetch_cited_metadata(rec):
     }
 
 
+@view_fields('names', 'addresses', 'titles')
 def fetch_citing_metadata(cited_rec, citing_rec):
     """Retrieve the necessary metadata fields of citing documents from
     a deeply nested JSON, add them into the dict of the cited record.
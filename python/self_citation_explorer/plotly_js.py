@@ -0,0 +1,45 @@
+"""
+Serve the plotly.js library once, as a static asset cached by the
+browser, instead of inlining its ~3.5 MB into the div of every plot.
+
+The visualizations render the plots with include_plotlyjs=False, so that
+a plot is only its figure JSON and the call drawing it, and the pages
+load the library from the plotly_js_url of the blueprint.
+"""
+
+import functools
+import plotly
+from flask import Blueprint, Response, request, url_for
+from plotly import offline
+
+# The library does not change until plotly is upgraded, and its URL
+# changes with the version then
+MAX_AGE = 365 * 24 * 60 * 60
+
+blueprint = Blueprint('plotly_js', __name__)
+
+
+@functools.cache
+def plotly_js_source():
+    """Read the plotly.js library bundled with plotly once.
+
+    :return: str.
+    """
+    return offline.get_plotlyjs()
+
+
+@blueprint.app_context_processor
+def plotly_js_url():
+    """Add the URL of the library to the context of the templates."""
+    return {'plotly_js_url': url_for('plotly_js.plotly_js',
+                                     v=plotly.__version__)}
+
+
+@blueprint.route('/plotly.min.js')
+def plotly_js():
+    """Serve the library with the headers to cache it in the browser."""
+    response = Response(plotly_js_source(), mimetype='text/javascript')
+    response.cache_control.public = True
+    response.cache_control.max_age = MAX_AGE
+    response.set_etag(plotly.__version__)
+    return response.make_conditional(request)
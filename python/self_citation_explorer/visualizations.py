@@ -2,10 +2,10 @@
 Visualize the data retrieved through the API and return it to the app.
 """
 
-import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from plotly import offline
+import result_store
 
 
 def visualize_data(df2, query):
@@ -115,16 +115,22 @@ def visualize_data(df2, query):
             }
         ])
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_excel(file):
-    """Return graphs objects from previously saved Excel file.
+    """Return graphs objects from previously saved results, read from
+    their stored tables or the Excel file.
 
     :param file: str.
     :return: str.
     """
-    df = pd.read_excel(file, sheet_name='Self-citation rates', index_col=0)
-    query = pd.read_excel(file, sheet_name='Search query')['Search Query'][0]
+    sheets = result_store.load(
+        file,
+        ('Self-citation rates', 'Search query'),
+        index=('Self-citation rates',)
+    )
+    df = sheets['Self-citation rates']
+    query = sheets['Search query']['Search Query'][0]
 
     return visualize_data(df, query)
@@ -5,14 +5,24 @@ and parsing the required metadata fields.
 """
 
 from datetime import date
+import checkpoints
+import result_store
 import state
 from collections import Counter
 import pandas as pd
+from api_client import (
+    check_annual_quota,
+    fetch_pages,
+    retry_budget,
+    start_job,
+    view_fields
+)
 from api_operations import (
     base_records_api_call,
     citing_policy_docs_empty_query,
     citing_policy_ids_api_call,
     policy_docs_api_call_by_ids,
+    search,
     wos_pubyear_call,
     pci_pubyear_call
 )
@@ -26,16 +36,30 @@ def run_button_wos(search_query: str) -> tuple[str, tuple]:
     """When the 'Run' button is pressed, manage all the API operations,
     data processing, and visualizations - Scholarly Documents tab."""
 
+    start_job()
+
     # Send initial API call to get the number of requests to paginate
     base_records = retrieve_base_records(search_query)
 
     # Retrieve citing policy document ids
-    state.progress = 0
-    state.current_task = 'Retrieving citing policy doc IDs'
-    for i, record in enumerate(base_records):
-        if record['times_cited'] != 0:
-            record['citing_policy_documents'] = retrieve_citing_policy_docs_ids(record)
-            state.progress = (i + 1) / len(base_records) * 100
+    state.update(0, 'Retrieving citing policy doc IDs')
+    cited_records_by_ut = {
+        record['ut']: record
+        for record in base_records if record['times_cited'] != 0
+    }
+    citing_ids = fetch_pages(
+        checkpoints.resumable(
+            lambda ut: retrieve_citing_policy_docs_ids(
+                cited_records_by_ut[ut]
+            ),
+            'citing policy doc ids', list(cited_records_by_ut)
+        ),
+        cited_records_by_ut
+    )
+    for i, (record, citing_policy_docs_ids) in enumerate(
+            zip(cited_records_by_ut.values(), citing_ids)):
+        record['citing_policy_documents'] = citing_policy_docs_ids
+        state.update((i + 1) / len(cited_records_by_ut) * 100)
 
     # Retrieve policy documents metadata
     complete_policy_docs_list = []
@@ -57,16 +81,19 @@ def run_button_wos(search_query: str) -> tuple[str, tuple]:
     safe_search_query = (search_query.replace("*", "").replace("?", "")
                          .replace('"', ''))
     safe_filename = f'{safe_search_query} - {date.today()}.xlsx'
-    with pd.ExcelWriter(f'downloads/woscc/{safe_filename}') as writer:
-        df.to_excel(writer, sheet_name='Base Records', index=False)
-        df2.to_excel(writer, sheet_name='Citing Policy Documents', index=False)
-        df3.to_excel(writer, sheet_name='Search Query', index=False)
+    result_store.save(f'downloads/woscc/{safe_filename}', {
+        'Base Records': df,
+        'Citing Policy Documents': df2,
+        'Search Query': df3
+    })
 
     # Create the plot
     plots = visualize_wos_data(df, df2, search_query)
 
-    state.progress = 0
-    state.current_task = ''
+    state.update(0, '')
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return safe_filename, plots
 
@@ -75,6 +102,8 @@ def run_button_trends(search_query: str) -> tuple[str, tuple]:
     """When the 'Run' button is pressed, manage all the API operations,
     data processing, and visualizations - Trends tab."""
 
+    start_job()
+
     # Retrieve trends data
     wos_years, pci_years = retrieve_trends_data(search_query)
 
@@ -89,15 +118,18 @@ def run_button_trends(search_query: str) -> tuple[str, tuple]:
     safe_search_query = (search_query.replace("*", "").replace("?", "")
                          .replace('"', '').replace("/", ''))
     safe_filename = f'{safe_search_query} - {date.today()}.xlsx'
-    with pd.ExcelWriter(f'downloads/trends/{safe_filename}') as writer:
-        df.to_excel(writer, sheet_name='Trends', index=False)
-        df2.to_excel(writer, sheet_name='Search Query', index=False)
+    result_store.save(f'downloads/trends/{safe_filename}', {
+        'Trends': df,
+        'Search Query': df2
+    })
 
     # Create the plot
     plots = visualize_trends_data(df, search_query)
 
-    state.progress = 0
-    state.current_task = ''
+    state.update(0, '')
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return safe_filename, plots
 
@@ -106,20 +138,33 @@ def retrieve_base_records(search_query: str) -> list:
     """Receive a search query, return the list of Web of Science Core
     Collection documents in it."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving Web of Science documents'
+    state.update(0, 'Retrieving Web of Science documents')
     records = []
-    initial_json = base_records_api_call(search_query)
-    records.extend(fetch_base_record_metadata(initial_json))
-    total_results = initial_json['QueryResult']['RecordsFound']
+    query_session = search('WOS', search_query)
+    total_results = query_session.records_found
     requests_required = ((total_results - 1) // 100) + 1
     max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
+    initial_json = base_records_api_call(
+        query_session, parsers=(fetch_base_record_metadata,)
+    )
+    records.extend(fetch_base_record_metadata(initial_json))
 
     # Send actual API calls to get the base documents metadata
-    for i in range(1, max_requests):
-        subsequent_json = base_records_api_call(search_query, 100*i+1)
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: base_records_api_call(
+                query_session, first_record,
+                parsers=(fetch_base_record_metadata,)
+            ),
+            'base records',
+            query_session.params, query_session.records_found
+        ),
+        [100*i+1 for i in range(1, max_requests)]
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         records.extend(fetch_base_record_metadata(subsequent_json))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     return records
 
@@ -128,15 +173,22 @@ def retrieve_policy_docs_from_ids(doc_ids: list) -> list:
     """Manage API calls and parsing policy documents metadata from a
     list of their IDs."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving citing policy doc metadata'
+    state.update(0, 'Retrieving citing policy doc metadata')
     policy_docs_metadata = []
     requests_required = ((len(doc_ids) - 1) // 100) + 1
-    for i in range(requests_required):
-        policy_json = policy_docs_api_call_by_ids(doc_ids[i*100:(i+1)*100])
+    policy_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda doc_ids_batch: policy_docs_api_call_by_ids(
+                doc_ids_batch, parsers=(fetch_policy_docs_metadata,)
+            ),
+            'citing policy documents', doc_ids
+        ),
+        [doc_ids[i*100:(i+1)*100] for i in range(requests_required)]
+    )
+    for i, policy_json in enumerate(policy_jsons):
         for policy_doc in policy_json['Data']['Records']['records']['REC']:
             policy_docs_metadata.append(fetch_policy_docs_metadata(policy_doc))
-        state.progress = (i + 1) / requests_required * 100
+        state.update((i + 1) / requests_required * 100)
 
     return policy_docs_metadata
 
@@ -157,10 +209,10 @@ def retrieve_wos_trend(search_query: str) -> list:
     """Retrieve the number of Web of Science documents by publication
     years."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving research trend data'
+    state.update(0, 'Retrieving research trend data')
     pub_years = []
-    initial_wos_json = wos_pubyear_call(search_query)
+    query_session = search('WOS', search_query)
+    initial_wos_json = wos_pubyear_call(query_session)
     if initial_wos_json['Data']['Records']['records']:
         pub_years.extend(
             record['static_data']['summary']['pub_info']['pubyear']
@@ -171,14 +223,23 @@ def retrieve_wos_trend(search_query: str) -> list:
         requests_required = ((total_results - 1) // 100) + 1
         max_requests = min(requests_required, 1000)
 
-        for i in range(1, max_requests):
-            subsequent_wos_json = wos_pubyear_call(search_query, i * 100 + 1)
+        subsequent_wos_jsons = fetch_pages(
+            checkpoints.resumable(
+                lambda first_record: wos_pubyear_call(
+                    query_session, first_record
+                ),
+                'wos trend',
+                query_session.params, query_session.records_found
+            ),
+            [i * 100 + 1 for i in range(1, max_requests)]
+        )
+        for i, subsequent_wos_json in enumerate(subsequent_wos_jsons, start=1):
             pub_years.extend(
                 record['static_data']['summary']['pub_info']['pubyear']
                 for record
                 in subsequent_wos_json['Data']['Records']['records']['REC']
             )
-            state.progress = (i + 1) / max_requests * 100
+            state.update((i + 1) / max_requests * 100)
 
     return [{'year': k, 'wos': v} for k, v in Counter(pub_years).items()]
 
@@ -187,10 +248,10 @@ def retrieve_pci_trend(search_query: str) -> list:
     """Retrieve the number of policy documents by their publication
     years."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving policy trend data'
+    state.update(0, 'Retrieving policy trend data')
     pub_years = []
-    initial_pci_json = pci_pubyear_call(search_query)
+    query_session = search('PCI', search_query)
+    initial_pci_json = pci_pubyear_call(query_session)
     if initial_pci_json['Data']['Records']['records']:
         for record in initial_pci_json['Data']['Records']['records']['REC']:
             pub_years.append(record['static_data']['summary']['pub_info']['pubyear'])
@@ -198,15 +259,25 @@ def retrieve_pci_trend(search_query: str) -> list:
         requests_required = ((total_results - 1) // 100) + 1
         max_requests = min(requests_required, 1000)
 
-        for i in range(1, max_requests):
-            subsequent_dii_json = pci_pubyear_call(search_query, i * 100 + 1)
-            for record in subsequent_dii_json['Data']['Records']['records']['REC']:
+        subsequent_pci_jsons = fetch_pages(
+            checkpoints.resumable(
+                lambda first_record: pci_pubyear_call(
+                    query_session, first_record
+                ),
+                'pci trend',
+                query_session.params, query_session.records_found
+            ),
+            [i * 100 + 1 for i in range(1, max_requests)]
+        )
+        for i, subsequent_pci_json in enumerate(subsequent_pci_jsons, start=1):
+            for record in subsequent_pci_json['Data']['Records']['records']['REC']:
                 pub_years.append(record['static_data']['summary']['pub_info']['pubyear'])
-            state.progress = (i + 1) / max_requests * 100
+            state.update((i + 1) / max_requests * 100)
 
     return [{'year': k, 'pci': v} for k, v in Counter(pub_years).items()]
 
 
+@view_fields('pub_info', 'names', 'tc_list')
 def fetch_base_record_metadata(json: dict) -> list[dict]:
     """Fetch the UT and Times Cited fields for each of the base
     records."""
@@ -261,8 +332,13 @@ def retrieve_citing_policy_docs_ids(rec: dict) -> list[str]:
     total_citing_records = citing_data['QueryResult']['RecordsFound']
     citing_requests_required = ((total_citing_records - 1) // 100) + 1
     citing_policy_docs_ids = []
-    for i in range(citing_requests_required):
-        citing_uts = citing_policy_ids_api_call(citing_query_id, 100*i+1)
+    citing_pages = fetch_pages(
+        lambda first_record: citing_policy_ids_api_call(
+            rec, citing_query_id, first_record
+        ),
+        [100*i+1 for i in range(citing_requests_required)]
+    )
+    for citing_uts in citing_pages:
         for citing_ut in citing_uts:
             if citing_ut.split(':')[0] == 'PCI':
                 citing_policy_docs_ids.append(citing_ut)
@@ -270,6 +346,7 @@ def retrieve_citing_policy_docs_ids(rec: dict) -> list[str]:
     return citing_policy_docs_ids
 
 
+@view_fields('titles', 'doctypes', 'publishers', 'names', 'pub_info')
 def fetch_policy_docs_metadata(policy_doc: dict) -> dict:
     """Parse policy document metadata for required fields."""
 
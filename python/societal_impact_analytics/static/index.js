@@ -1,8 +1,5 @@
-// Set up the progress bars
-const evtSource = new EventSource("/stream");
-
-evtSource.onmessage = (event) => {
-  const data = JSON.parse(event.data);
+// Update the progress bars
+const showProgress = (data) => {
   const task = data.task || "";
   const progress = Math.floor(data.progress || 0);
 
@@ -25,7 +22,7 @@ evtSource.onmessage = (event) => {
 
 // Inactivate the buttons and search tabs while the data is being retrieved via the APi.
 document.addEventListener("DOMContentLoaded", () => {
-    const buttons = document.querySelectorAll("button[name='button']");
+    const buttons = document.querySelectorAll("button[name='button']:not(.graph_button)");
     const tabs = document.querySelectorAll(".search-tab-link");
 
     buttons.forEach(btn => {
@@ -47,4 +44,58 @@ document.addEventListener("DOMContentLoaded", () => {
 
         });
     });
+});
+
+// Follow the progress of the background job of the retrieval, then show its results
+document.addEventListener("DOMContentLoaded", () => {
+    const job = document.getElementById("job");
+    if (!job) return;
+
+    // Keep the buttons inactive while the job is running
+    document.querySelectorAll("button[name='button']").forEach(b => {
+        b.disabled = true;
+    });
+
+    const evtSource = new EventSource(job.dataset.streamUrl);
+    evtSource.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        showProgress(data);
+        if (data.finished) {
+            evtSource.close();
+            window.location.href = job.dataset.resultUrl;
+        }
+    };
+});
+
+// Switch the visualizations without reloading the page, fetching only the plot of the tab
+document.addEventListener("DOMContentLoaded", () => {
+    const plot = document.getElementById("plot");
+    if (!plot) return;
+    const graphButtons = document.querySelectorAll(".graph_button");
+
+    graphButtons.forEach(btn => {
+        btn.addEventListener("click", (event) => {
+            event.preventDefault();
+            fetch(btn.dataset.plotUrl)
+                .then(response => {
+                    if (!response.ok) throw new Error(response.statusText);
+                    return response.text();
+                })
+                .then(html => {
+                    plot.innerHTML = html;
+
+                    // The scripts inserted as HTML do not run, recreate them to draw the plot
+                    plot.querySelectorAll("script").forEach(oldScript => {
+                        const script = document.createElement("script");
+                        script.text = oldScript.text;
+                        oldScript.replaceWith(script);
+                    });
+                    graphButtons.forEach(b => {
+                        b.classList.toggle("graph_button--active", b === btn);
+                    });
+                })
+                // Fall back to reloading the page with the tab
+                .catch(() => btn.form.requestSubmit(btn));
+        });
+    });
 });
\ No newline at end of file
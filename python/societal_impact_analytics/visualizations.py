@@ -10,6 +10,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 from plotly import offline
+from lazy_plots import LazyPlots
+import result_store
 
 color_palette = ['#B175E1', '#18A381', '#3595F0', '#ED5564', '#5E33BF',
                  '#003F51', '#A39300', '#EC40DB', '#C8582A', '#1E48DD',
@@ -27,17 +29,18 @@ def word_wrap(x: str, width: int) -> str:
     return '<br>'.join(textwrap.wrap(str(x), width=width))
 
 
-def visualize_wos_data(df, df2, query: str) -> tuple:
+def visualize_wos_data(df, df2, query: str) -> LazyPlots:
     """Create a number of html div objects with data visualizations
-    with Plotly."""
+    with Plotly, building the first one at once and the others on
+    demand."""
 
-    return (
-        visualize_citation_report(df, df2, query),
-        visualize_cited_authors(df, query),
-        visualize_citing_authors(df2, query),
-        visualize_citing_sources(df2, query),
-        visualize_citing_source_countries(df2, query)
-    )
+    return LazyPlots((
+        lambda: visualize_citation_report(df, df2, query),
+        lambda: visualize_cited_authors(df, query),
+        lambda: visualize_citing_authors(df2, query),
+        lambda: visualize_citing_sources(df2, query),
+        lambda: visualize_citing_source_countries(df2, query)
+    ))
 
 
 def visualize_trends_data(df, query: str) -> tuple[str]:
@@ -142,7 +145,7 @@ def visualize_citation_report(df: pd.DataFrame, df2: pd.DataFrame, query: str) -
         f'<p class="metric__value">{citations_from_policy_docs / wos_documents:.2f}</p>'
         '</li>'
         '</ul>'
-        f'{offline.plot(fig, output_type='div')}'
+        f'{offline.plot(fig, output_type='div', include_plotlyjs=False)}'
     )
 
     return output
@@ -224,7 +227,7 @@ def visualize_cited_authors(df: pd.DataFrame, query: str) -> str:
     fig.update_traces(marker={'color': color_palette[0], 'sizemin': 3})
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_citing_authors(df: pd.DataFrame, query: str) -> str:
@@ -263,7 +266,7 @@ def visualize_citing_authors(df: pd.DataFrame, query: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_citing_sources(df: pd.DataFrame, query: str) -> str:
@@ -297,7 +300,7 @@ def visualize_citing_sources(df: pd.DataFrame, query: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_citing_source_countries(df: pd.DataFrame, query: str) -> str:
@@ -326,7 +329,7 @@ def visualize_citing_source_countries(df: pd.DataFrame, query: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_trends_years(df: pd.DataFrame, query: str) -> str:
@@ -401,20 +404,25 @@ def visualize_trends_years(df: pd.DataFrame, query: str) -> str:
 
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_excel(file: str) -> tuple:
-    """Return graphs objects from previously saved Excel file."""
+    """Return graphs objects from previously saved results, read from
+    their stored tables or the Excel file."""
 
     if file.split('/')[1] == 'woscc':
+        sheets = result_store.load(
+            file, ('Base Records', 'Citing Policy Documents', 'Search Query')
+        )
         return visualize_wos_data(
-            pd.read_excel(file, sheet_name='Base Records'),
-            pd.read_excel(file, sheet_name='Citing Policy Documents'),
-            pd.read_excel(file, sheet_name='Search Query')['Search Query'][0]
+            sheets['Base Records'],
+            sheets['Citing Policy Documents'],
+            sheets['Search Query']['Search Query'][0]
         )
 
+    sheets = result_store.load(file, ('Trends', 'Search Query'))
     return visualize_trends_data(
-        pd.read_excel(file, sheet_name='Trends'),
-        pd.read_excel(file, sheet_name='Search Query')['Search Query'][0]
+        sheets['Trends'],
+        sheets['Search Query']['Search Query'][0]
     )
@@ -3,36 +3,33 @@ Retrieve data from Web of Science Core Collection and Derwent
 Innovations Index through Web of Science Expanded API.
 """
 
-import requests
+import api_client
+from api_client import EXPANDED_API_URL
 from apikeys import EXPANDED_APIKEY
 
 
+def search(database: str, query: str) -> api_client.QuerySession:
+    """Run the search query in the database on the server side once, or
+    reuse the recent run of the same search query, e.g. by its
+    validation."""
+
+    return api_client.open_query(
+        EXPANDED_APIKEY,
+        {'databaseId': database, 'usrQuery': query}
+    )
+
+
 def validate_search_query_wos(query: str) -> tuple:
     """Check if the Web of Science Core Collection search query is
     valid, return the number of documents found in the query or the
     error message.
     """
 
-    params = {
-        'databaseId': 'WOS',
-        'usrQuery': query,
-        'count': 0,
-        'firstRecord': 1
-    }
-    test_request = requests.get(
-        url='https://api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': EXPANDED_APIKEY},
-        timeout=16
-    )
-    if test_request.status_code == 200:
-        test_json = test_request.json()
-
-        return (test_request.status_code,
-                test_json['QueryResult']['RecordsFound'])
+    query_session = search('WOS', query)
+    if query_session.status_code == 200:
+        return query_session.status_code, query_session.records_found
 
-    return (test_request.status_code,
-            test_request.json()['message'].split(':')[-1])
+    return query_session.status_code, query_session.message
 
 
 def validate_search_query_dii(query: str) -> tuple:
@@ -40,68 +37,23 @@ def validate_search_query_dii(query: str) -> tuple:
     returns the number of documents found in the query or the error
     message."""
 
-    params = {
-        'databaseId': 'DIIDW',
-        'usrQuery': query,
-        'count': 0,
-        'firstRecord': 1
-    }
-    test_request = requests.get(
-        url='https://api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': EXPANDED_APIKEY},
-        timeout=16
-    )
-    if test_request.status_code == 200:
-        test_json = test_request.json()
-
-        return (test_request.status_code,
-                test_json['QueryResult']['RecordsFound'])
+    query_session = search('DIIDW', query)
+    if query_session.status_code == 200:
+        return query_session.status_code, query_session.records_found
 
-    return (test_request.status_code,
-            test_request.json()['message'].split(':')[-1])
+    return query_session.status_code, query_session.message
 
 
-def base_records_api_call(search_query: str, first_record=1) -> dict:
+def base_records_api_call(query_session: api_client.QuerySession,
+                          first_record=1, parsers=()) -> dict:
     """Retrieve Web of Science base record metadata through Web of
-    Science Expanded API.
+    Science Expanded API by the query ID of the search, limited to the
+    fields read by the parsers.
     """
 
-    params = {
-        'databaseId': 'WOS',
-        'usrQuery': search_query,
-        'count': 100,
-        'firstRecord': first_record
-    }
-    try:
-        response = requests.get(
-            url='https://api.clarivate.com/api/wos',
-            params=params,
-            headers={'X-ApiKey': EXPANDED_APIKEY},
-            timeout=16
-        )
-        if response.status_code == 200:
-            result = response.json()
-        else:
-            print(f'Oops, error {response.status_code} - resending...')
-            result = base_records_api_call(search_query, first_record)
-
-    except (requests.ReadTimeout, requests.ConnectionError, requests.JSONDecodeError):
-        result = {'Data': {'Records': {'records': {'REC': []}}}}
-        params['count'] = 10
-        for i in range(10):
-            first_record += i * 10
-            request = requests.get(
-                url='https://api.clarivate.com/api/wos',
-                params=params,
-                headers={'X-ApiKey': EXPANDED_APIKEY},
-                timeout=32
-            )
-
-            rec_json = request.json()['Data']['Records']['records']['REC']
-            result['Data']['Records']['records']['REC'].extend(rec_json)
-
-    return result
+    # The page is split in case of hyper-authored papers in API response
+    # resulting in enormous JSON size
+    return query_session.records(first_record, parsers=parsers)
 
 
 def citing_patents_empty_query(rec: dict) -> dict:
@@ -116,46 +68,45 @@ def citing_patents_empty_query(rec: dict) -> dict:
         'count': 0,
         'firstRecord': 1
     }
-    response = requests.get(
-        url='https://api.clarivate.com/api/wos/citing',
-        params=params,
-        headers={'X-ApiKey': EXPANDED_APIKEY},
-        timeout=16
+    # The QueryID of a cached response may belong to another search
+    response = api_client.get(
+        f'{EXPANDED_API_URL}/citing',
+        EXPANDED_APIKEY,
+        params,
+        use_cache=False
     )
-    if response.status_code == 200:
-        result = response.json()
-    else:
-        print(f'Oops, error {response.status_code} - resending...')
-        result = citing_patents_empty_query(rec)
+    response.raise_for_status()
+    result = response.json()
 
     return result
 
 
-def citing_patents_ids_api_call(query_id: str, first_record=1) -> dict:
+def citing_patents_ids_api_call(rec: dict, query_id: str,
+                                first_record=1) -> dict:
     """Make API call to retrieve the ids of the citing patents."""
 
     params = {
         'count': 100,
         'firstRecord': first_record,
     }
-    response = requests.get(
-        f'https://api.clarivate.com/api/wos/recordids/{query_id}',
-        params=params,
-        headers={'X-APIKey': EXPANDED_APIKEY},
-        timeout=30
+    response = api_client.get(
+        f'{EXPANDED_API_URL}/recordids/{query_id}',
+        EXPANDED_APIKEY,
+        params,
+        timeout=30,
+        search={'databaseId': 'WOK', 'uniqueId': rec['ut']}
     )
-    if response.status_code == 200:
-        result = response.json()
-    else:
-        print(f'Oops, error {response.status_code} - resending...')
-        result = citing_patents_ids_api_call(query_id, first_record)
+    response.raise_for_status()
+    result = response.json()
 
     return result
 
 
-def patents_api_call_by_ids(patents_ids_batch: list, first_record=1) -> dict:
+def patents_api_call_by_ids(patents_ids_batch: list, first_record=1,
+                            parsers=()) -> dict:
     """Send API calls for patent IDs in batches of 100 via Web of
-    Science Expanded API to get the patent metadata.
+    Science Expanded API to get the patent metadata, limited to the
+    fields read by the parsers.
     """
 
     params = {
@@ -164,112 +115,44 @@ def patents_api_call_by_ids(patents_ids_batch: list, first_record=1) -> dict:
         'count': 100,
         'firstRecord': 1,
     }
-    try:
-        response = requests.get(
-            url='https://api.clarivate.com/api/wos',
-            params=params,
-            headers={'X-ApiKey': EXPANDED_APIKEY},
-            timeout=20
-        )
-        if response.status_code == 200:
-            result = response.json()
-        else:
-            print(f'Oops, error {response.status_code} - resending...')
-            result = patents_api_call_by_ids(patents_ids_batch)
-
-    except (requests.ReadTimeout, requests.ConnectionError, requests.JSONDecodeError):
-        result = {'Data': {'Records': {'records': {'REC': []}}}}
-        params['count'] = 10
-        for i in range(10):
-            first_record += i * 10
-            request = requests.get(
-                url='https://api.clarivate.com/api/wos',
-                params=params,
-                headers={'X-ApiKey': EXPANDED_APIKEY},
-                timeout=32
-            )
-
-            rec_json = request.json()['Data']['Records']['records']['REC']
-            result['Data']['Records']['records']['REC'].extend(rec_json)
-
-    return result
+    if parsers:
+        params['viewField'] = api_client.view_field(*parsers)
+    # The page is split in case of hyper-authored papers in API response
+    # resulting in enormous JSON size
+    return api_client.get_records(
+        EXPANDED_API_URL,
+        EXPANDED_APIKEY,
+        params,
+        timeout=20,
+        records_found=len(patents_ids_batch)
+    )
 
 
-def patents_api_call_by_query(search_query: str, first_record=1) -> dict:
+def patents_api_call_by_query(query_session: api_client.QuerySession,
+                              first_record=1, parsers=()) -> dict:
     """Retrieve Derwent Innovations Index patent records through Web of
-    Science Expanded API.
+    Science Expanded API by the query ID of the search, limited to the
+    fields read by the parsers.
     """
 
-    params = {
-        'databaseId': 'DIIDW',
-        'usrQuery': search_query,
-        'count': 100,
-        'firstRecord': first_record
-    }
-    response = requests.get(
-        url='https://api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': EXPANDED_APIKEY},
-        timeout=16
-    )
-    if response.status_code == 200:
-        result = response.json()
-    else:
-        print(f'Oops, error {response.status_code} - resending...')
-        result = base_records_api_call(search_query, first_record)
-
-    return result
+    return query_session.records(first_record, parsers=parsers)
 
 
-def wos_pubyear_call(search_query: str, first_record=1) -> dict:
+def wos_pubyear_call(query_session: api_client.QuerySession,
+                     first_record=1) -> dict:
     """Retrieve Web of Science Core Collection document records
-    publication metadata section through Web of Science Expanded API.
+    publication metadata section through Web of Science Expanded API by
+    the query ID of the search.
     """
 
-    params = {
-        'databaseId': 'WOS',
-        'usrQuery': search_query,
-        'count': 100,
-        'firstRecord': first_record,
-        'viewField': 'pub_info'
-    }
-    response = requests.get(
-        url='https://api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': EXPANDED_APIKEY},
-        timeout=16
-    )
-    if response.status_code == 200:
-        result = response.json()
-    else:
-        print(f'Oops, error {response.status_code} - resending...')
-        result = base_records_api_call(search_query, first_record)
-
-    return result
+    return query_session.records(first_record, viewField='pub_info')
 
 
-def dii_pubyear_call(search_query: str, first_record=1) -> dict:
+def dii_pubyear_call(query_session: api_client.QuerySession,
+                     first_record=1) -> dict:
     """Retrieve Derwent Innovations Index patent records 'item'
-    metadata section through Web of Science Expanded API.
+    metadata section through Web of Science Expanded API by the query ID
+    of the search.
     """
 
-    params = {
-        'databaseId': 'DIIDW',
-        'usrQuery': search_query,
-        'count': 100,
-        'firstRecord': first_record,
-        'viewField': 'item'
-    }
-    response = requests.get(
-        url='https://api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': EXPANDED_APIKEY},
-        timeout=16
-    )
-    if response.status_code == 200:
-        result = response.json()
-    else:
-        print(f'Oops, error {response.status_code} - resending...')
-        result = base_records_api_call(search_query, first_record)
-
-    return result
+    return query_session.records(first_record, viewField='item')
@@ -7,11 +7,12 @@ Science Expanded API.
 Main app file: manage Flask interface actions and rendering.
 """
 
-import json
-import state
-import time
+import jobs
+import lazy_plots
+import plotly_js
+import result_store
 
-from flask import Flask, render_template, request, Response
+from flask import Flask, render_template, request
 
 from api_operations import (
     validate_search_query_wos,
@@ -25,8 +26,9 @@ from data_processing import (
 from visualizations import visualize_excel
 
 app = Flask(__name__)
-
-plots_list = []
+app.register_blueprint(jobs.blueprint)
+app.register_blueprint(plotly_js.blueprint)
+app.register_blueprint(result_store.blueprint)
 
 
 @app.route(rule='/')
@@ -50,22 +52,15 @@ def trends_search() -> str:
     return render_template('trends.html')
 
 
-@app.route("/stream")
-def stream():
-    def generate():
-        last_progress = -1
-        last_task = ""
-        while True:
-            if (state.progress != last_progress) or (state.current_task != last_task):
-                data = {
-                    "task": state.current_task,
-                    "progress": state.progress
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_progress = state.progress
-                last_task = state.current_task
-            time.sleep(0.2)
-    return Response(generate(), mimetype="text/event-stream")
+@app.route(rule='/plots/<int:index>/<path:filename>')
+def plot_section(index: int, filename: str) -> str:
+    """Return the plot of the visualization tab of the results file,
+    so that the page switches the tabs without reloading everything."""
+
+    plots = lazy_plots.load_download(filename, visualize_excel)
+    if plots is None or index >= len(plots):
+        return 'No such plot', 404
+    return plots[index]
 
 
 @app.route(rule="/", methods=['POST', 'GET'])
@@ -87,20 +82,22 @@ def start_menu_wos() -> str:
     # Switching between visualizations
     if request.method == 'POST' and 'button' in request.form.keys():
         visualizations = {
-            'citation_report': plots_list[0],
-            'top_authors': plots_list[1],
-            'top_assignees_treemap': plots_list[2],
-            'top_inventors_treemap': plots_list[3],
-            'top_countries_applied': plots_list[4],
-            'top_countries_granted': plots_list[5]
+            'citation_report': 0,
+            'top_authors': 1,
+            'top_assignees_treemap': 2,
+            'top_inventors_treemap': 3,
+            'top_countries_applied': 4,
+            'top_countries_granted': 5
         }
-        if request.form['button'] in visualizations:
-            for key, value in visualizations.items():
-                if request.method == 'POST' and request.form['button'] == key:
-                    return render_template(
-                        'index.html',
-                        plot=value,
-                        index=plots_list.index(value))
+        plots_file = request.form.get('plots_file', '')
+        plots = lazy_plots.load_download(plots_file, visualize_excel)
+        if request.form['button'] in visualizations and plots is not None:
+            index = visualizations[request.form['button']]
+            return render_template(
+                'index.html',
+                plot=plots[index],
+                plots_file=plots_file,
+                index=index)
     return render_template('index.html', search_query='')
 
 
@@ -123,19 +120,21 @@ def start_menu_dii() -> str:
     # Switching between visualizations
     if request.method == 'POST' and 'button' in request.form.keys():
         visualizations = {
-            'key_metrics': plots_list[0],
-            'top_assignees_treemap': plots_list[1],
-            'top_inventors_treemap': plots_list[2],
-            'top_countries_applied': plots_list[3],
-            'top_countries_granted': plots_list[4]
+            'key_metrics': 0,
+            'top_assignees_treemap': 1,
+            'top_inventors_treemap': 2,
+            'top_countries_applied': 3,
+            'top_countries_granted': 4
         }
-        if request.form['button'] in visualizations:
-            for key, value in visualizations.items():
-                if request.method == 'POST' and request.form['button'] == key:
-                    return render_template(
-                        'dii.html',
-                        plot=value,
-                        index=plots_list.index(value))
+        plots_file = request.form.get('plots_file', '')
+        plots = lazy_plots.load_download(plots_file, visualize_excel)
+        if request.form['button'] in visualizations and plots is not None:
+            index = visualizations[request.form['button']]
+            return render_template(
+                'dii.html',
+                plot=plots[index],
+                plots_file=plots_file,
+                index=index)
     return render_template('dii.html', search_query='')
 
 
@@ -166,17 +165,17 @@ def search_section_wos(button: str, search_query: str) -> str:
     if search_query != '' and button == 'validate':
         return render_validation_results(search_query, 'WOS')
 
-    if search_query != '' and button == 'run':
-        plots_list.clear()
-        safe_filename, plots = run_button_wos(search_query)
-        plots_list.extend(plots)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'wos',
+            search_query=search_query,
+            refresh=button == 'refresh'
+        )
 
         return render_template(
             'index.html',
-            filename=safe_filename,
-            search_query=search_query,
-            plot=plots_list[0],
-            index=0
+            job_id=job_id,
+            search_query=search_query
         )
 
     return render_template('index.html', search_query='')
@@ -190,17 +189,17 @@ def search_section_dii(button: str, search_query: str) -> str:
     if search_query != '' and button == 'validate':
         return render_validation_results(search_query, 'DIIDW')
 
-    if search_query != '' and button == 'run':
-        plots_list.clear()
-        safe_filename, plots = run_button_dii(search_query)
-        plots_list.extend(plots)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'dii',
+            search_query=search_query,
+            refresh=button == 'refresh'
+        )
 
         return render_template(
             'dii.html',
-            filename=safe_filename,
-            search_query=search_query,
-            plot=plots_list[0],
-            index=0
+            job_id=job_id,
+            search_query=search_query
         )
 
     return render_template('dii.html', search_query='')
@@ -214,16 +213,16 @@ def search_section_trends(button: str, search_query: str) -> str:
     if search_query != '' and button == 'validate':
         return render_validation_results(search_query, 'BOTH')
 
-    if search_query != '' and button == 'run':
-        plots_list.clear()
-        safe_filename, plots = run_button_trends(search_query)
-        plots_list.extend(plots)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'trends',
+            search_query=search_query,
+            refresh=button == 'refresh'
+        )
         return render_template(
             'trends.html',
-            filename=safe_filename,
-            search_query=search_query[3:],
-            plot=plots_list[0],
-            index=0
+            job_id=job_id,
+            search_query=search_query[3:]
         )
     return render_template('trends.html', search_query='')
 
@@ -325,39 +324,136 @@ def load_file_section_wos(file: str) -> str:
     """Manage the actions and processes for the load file search
     section - Scholarly Documents tab."""
 
-    plots_list.clear()
     if file == '':
         return render_template('index.html', search_query='')
-    plots = visualize_excel(f'downloads/woscc/{file}')
-    plots_list.extend(plots)
+    plots = lazy_plots.load(f'downloads/woscc/{file}', visualize_excel)
 
-    return render_template('index.html', plot=plots_list[0], index=0)
+    return render_template(
+        'index.html',
+        plot=plots[0],
+        plots_file=f'woscc/{file}',
+        index=0
+    )
 
 
 def load_file_section_dii(file: str) -> str:
     """Manage the actions and processes for the load file search
     section - Inventions tab."""
 
-    plots_list.clear()
     if file == '':
         return render_template('dii.html', search_query='')
-    plots = visualize_excel(f'downloads/dii/{file}')
-    plots_list.extend(plots)
+    plots = lazy_plots.load(f'downloads/dii/{file}', visualize_excel)
 
-    return render_template('dii.html', plot=plots_list[0], index=0)
+    return render_template(
+        'dii.html',
+        plot=plots[0],
+        plots_file=f'dii/{file}',
+        index=0
+    )
 
 
 def load_file_section_trends(file: str) -> str:
     """Manage the actions and processes for the load file search
     section - Trends tab."""
 
-    plots_list.clear()
     if file == '':
         return render_template('trends.html', search_query='')
-    plots = visualize_excel(f'downloads/trends/{file}')
-    plots_list.extend(plots)
+    plots = lazy_plots.load(f'downloads/trends/{file}', visualize_excel)
+
+    return render_template(
+        'trends.html',
+        plot=plots[0],
+        plots_file=f'trends/{file}',
+        index=0
+    )
+
+
+def render_job_results(job: dict, page: str, search_query: str,
+                       folder: str) -> str:
+    """Render the results of the finished 'Run' job on the page of its
+    tab, or its error. The plots built by the job are reused, or built
+    again from its file after the restart of the app."""
+
+    if job['status'] == 'failed':
+        return render_template(
+            page,
+            error_message_1=job['error'],
+            search_query=search_query
+        )
+    plots_file = f"{folder}/{job['result']['filename']}"
+    file = f'downloads/{plots_file}'
+    try:
+        plots = lazy_plots.load(file, visualize_excel)
+    except FileNotFoundError:
+        return render_template(
+            page,
+            error_message_1=f'The {file} file of these results is not '
+                            f'found.',
+            search_query=search_query
+        )
+
+    return render_template(
+        page,
+        filename=job['result']['filename'],
+        search_query=search_query,
+        plot=plots[0],
+        plots_file=plots_file,
+        index=0
+    )
+
+
+def render_wos_results(job: dict) -> str:
+    """Render the results of the Technological Impact tab job."""
+
+    return render_job_results(
+        job, 'index.html', job['params']['search_query'], 'woscc'
+    )
+
+
+def render_dii_results(job: dict) -> str:
+    """Render the results of the Inventions tab job."""
+
+    return render_job_results(
+        job, 'dii.html', job['params']['search_query'], 'dii'
+    )
+
+
+def render_trends_results(job: dict) -> str:
+    """Render the results of the Trends tab job."""
+
+    return render_job_results(
+        job, 'trends.html', job['params']['search_query'][3:], 'trends'
+    )
+
+
+def run_job(run_button, search_query: str, folder: str) -> dict:
+    """Run the retrieval and the analysis of the tab in a background
+    job, and keep its plots for the results page."""
+
+    safe_filename, plots = run_button(search_query)
+    lazy_plots.remember(f'downloads/{folder}/{safe_filename}', plots)
+    return {'filename': safe_filename}
+
+
+@jobs.task('wos', render=render_wos_results)
+def run_wos_job(search_query: str) -> dict:
+    """Run the Technological Impact tab search in a background job."""
+
+    return run_job(run_button_wos, search_query, 'woscc')
+
+
+@jobs.task('dii', render=render_dii_results)
+def run_dii_job(search_query: str) -> dict:
+    """Run the Inventions tab search in a background job."""
+
+    return run_job(run_button_dii, search_query, 'dii')
+
+
+@jobs.task('trends', render=render_trends_results)
+def run_trends_job(search_query: str) -> dict:
+    """Run the Trends tab search in a background job."""
 
-    return render_template('trends.html', plot=plots_list[0], index=0)
+    return run_job(run_button_trends, search_query, 'trends')
 
 
 if __name__ == '__main__':
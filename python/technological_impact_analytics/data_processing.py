@@ -7,13 +7,23 @@ and parsing the required metadata fields.
 from datetime import date
 from collections import Counter
 import pandas as pd
+import checkpoints
+import result_store
 import state
+from api_client import (
+    check_annual_quota,
+    fetch_pages,
+    retry_budget,
+    start_job,
+    view_fields
+)
 from api_operations import (
     base_records_api_call,
     citing_patents_empty_query,
     citing_patents_ids_api_call,
     patents_api_call_by_ids,
     patents_api_call_by_query,
+    search,
     wos_pubyear_call,
     dii_pubyear_call
 )
@@ -28,16 +38,28 @@ def run_button_wos(search_query: str) -> tuple[str, tuple]:
     """When the 'Run' button is pressed, manage all the API operations,
     data processing, and visualizations - Scholarly Documents tab."""
 
+    start_job()
+
     # Send initial API call to get the number of requests to paginate
     base_records = retrieve_base_records(search_query)
 
     # Retrieve citing patent ids
-    state.progress = 0
-    state.current_task = 'Retrieving citing patent IDs'
-    for i, record in enumerate(base_records):
-        if record['times_cited'] != 0:
-            record['citing_inventions'] = retrieve_citing_patent_ids(record)
-            state.progress = (i + 1) / len(base_records) * 100
+    state.update(0, 'Retrieving citing patent IDs')
+    cited_records_by_ut = {
+        record['ut']: record
+        for record in base_records if record['times_cited'] != 0
+    }
+    citing_ids = fetch_pages(
+        checkpoints.resumable(
+            lambda ut: retrieve_citing_patent_ids(cited_records_by_ut[ut]),
+            'citing patent ids', list(cited_records_by_ut)
+        ),
+        cited_records_by_ut
+    )
+    for i, (record, citing_patents_ids) in enumerate(
+            zip(cited_records_by_ut.values(), citing_ids)):
+        record['citing_inventions'] = citing_patents_ids
+        state.update((i + 1) / len(cited_records_by_ut) * 100)
 
     # Retrieve patent metadata
     complete_patent_id_list = []
@@ -59,16 +81,19 @@ def run_button_wos(search_query: str) -> tuple[str, tuple]:
     safe_search_query = (search_query.replace("*", "").replace("?", "")
                          .replace('"', ''))
     safe_filename = f'{safe_search_query} - {date.today()}.xlsx'
-    with pd.ExcelWriter(f'downloads/woscc/{safe_filename}') as writer:
-        df.to_excel(writer, sheet_name='Base Records', index=False)
-        df2.to_excel(writer, sheet_name='Citing Inventions', index=False)
-        df3.to_excel(writer, sheet_name='Search Query', index=False)
+    result_store.save(f'downloads/woscc/{safe_filename}', {
+        'Base Records': df,
+        'Citing Inventions': df2,
+        'Search Query': df3
+    })
 
     # Create the plot
     plots = visualize_wos_data(df, df2, search_query)
 
-    state.progress = 0
-    state.current_task = ''
+    state.update(0, '')
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return safe_filename, plots
 
@@ -77,6 +102,8 @@ def run_button_dii(search_query: str) -> tuple[str, tuple]:
     """When the 'Run' button is pressed, manage all the API operations,
     data processing, and visualizations - Inventions tab."""
 
+    start_job()
+
     # Retrieve patent metadata
     inventions = retrieve_patents_metadata_from_search(search_query)
 
@@ -87,15 +114,18 @@ def run_button_dii(search_query: str) -> tuple[str, tuple]:
     safe_search_query = (search_query.replace("*", "").replace("?", "")
                          .replace('"', ''))
     safe_filename = f'{safe_search_query} - {date.today()}.xlsx'
-    with pd.ExcelWriter(f'downloads/dii/{safe_filename}') as writer:
-        df.to_excel(writer, sheet_name='Patent Families', index=False)
-        df2.to_excel(writer, sheet_name='Search Query', index=False)
+    result_store.save(f'downloads/dii/{safe_filename}', {
+        'Patent Families': df,
+        'Search Query': df2
+    })
 
     # Create the plot
     plots = visualize_dii_data(df, search_query)
 
-    state.progress = 0
-    state.current_task = ''
+    state.update(0, '')
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return safe_filename, plots
 
@@ -104,6 +134,8 @@ def run_button_trends(search_query: str) -> tuple[str, tuple]:
     """When the 'Run' button is pressed, manage all the API operations,
     data processing, and visualizations - Trends tab."""
 
+    start_job()
+
     # Retrieve trends data
     wos_years, dii_pubyears, dii_prtyyears = retrieve_trends_data(search_query)
 
@@ -120,15 +152,18 @@ def run_button_trends(search_query: str) -> tuple[str, tuple]:
     safe_search_query = (search_query.replace("*", "").replace("?", "")
                          .replace('"', '').replace("/", ''))
     safe_filename = f'{safe_search_query} - {date.today()}.xlsx'
-    with pd.ExcelWriter(f'downloads/trends/{safe_filename}') as writer:
-        df.to_excel(writer, sheet_name='Trends', index=False)
-        df2.to_excel(writer, sheet_name='Search Query', index=False)
+    result_store.save(f'downloads/trends/{safe_filename}', {
+        'Trends': df,
+        'Search Query': df2
+    })
 
     # Create the plot
     plots = visualize_trends_data(df, search_query)
 
-    state.progress = 0
-    state.current_task = ''
+    state.update(0, '')
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return safe_filename, plots
 
@@ -137,20 +172,33 @@ def retrieve_base_records(search_query: str) -> list:
     """Receive a search query, return the list of Web of Science Core
     Collection documents in it."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving Web of Science documents'
+    state.update(0, 'Retrieving Web of Science documents')
     records = []
-    initial_json = base_records_api_call(search_query)
-    records.extend(fetch_base_record_metadata(initial_json))
-    total_results = initial_json['QueryResult']['RecordsFound']
+    query_session = search('WOS', search_query)
+    total_results = query_session.records_found
     requests_required = ((total_results - 1) // 100) + 1
     max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
+    initial_json = base_records_api_call(
+        query_session, parsers=(fetch_base_record_metadata,)
+    )
+    records.extend(fetch_base_record_metadata(initial_json))
 
     # Send actual API calls to get the base documents metadata
-    for i in range(1, max_requests):
-        subsequent_json = base_records_api_call(search_query, 100*i+1)
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: base_records_api_call(
+                query_session, first_record,
+                parsers=(fetch_base_record_metadata,)
+            ),
+            'base records',
+            query_session.params, query_session.records_found
+        ),
+        [100*i+1 for i in range(1, max_requests)]
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         records.extend(fetch_base_record_metadata(subsequent_json))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     return records
 
@@ -159,15 +207,22 @@ def retrieve_patents_metadata_from_ids(patents_ids: list) -> list:
     """Manage API calls and parsing patent metadata from a list of
     their IDs."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving citing patent metadata'
+    state.update(0, 'Retrieving citing patent metadata')
     patents_metadata = []
     requests_required = ((len(patents_ids) - 1) // 100) + 1
-    for i in range(requests_required):
-        patents_json = patents_api_call_by_ids(patents_ids[i*100:(i+1)*100])
+    patents_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda patents_ids_batch: patents_api_call_by_ids(
+                patents_ids_batch, parsers=(fetch_patents_metadata,)
+            ),
+            'citing patents', patents_ids
+        ),
+        [patents_ids[i*100:(i+1)*100] for i in range(requests_required)]
+    )
+    for i, patents_json in enumerate(patents_jsons):
         for patent_rec in patents_json['Data']['Records']['records']['REC']:
             patents_metadata.append(fetch_patents_metadata(patent_rec))
-        state.progress = (i + 1) / requests_required * 100
+        state.update((i + 1) / requests_required * 100)
 
     return patents_metadata
 
@@ -176,22 +231,35 @@ def retrieve_patents_metadata_from_search(search_query: str) -> list:
     """Manage API calls and parsing patent metadata from a search
     query."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving patent metadata'
+    state.update(0, 'Retrieving patent metadata')
     patent_records = []
-    initial_json = patents_api_call_by_query(search_query)
-    for record in initial_json['Data']['Records']['records']['REC']:
-        patent_records.append(fetch_patents_metadata(record))
-    total_results = initial_json['QueryResult']['RecordsFound']
+    query_session = search('DIIDW', search_query)
+    total_results = query_session.records_found
     requests_required = ((total_results - 1) // 100) + 1
     max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
+    initial_json = patents_api_call_by_query(
+        query_session, parsers=(fetch_patents_metadata,)
+    )
+    for record in initial_json['Data']['Records']['records']['REC']:
+        patent_records.append(fetch_patents_metadata(record))
 
     # Send actual API calls to get the base documents metadata
-    for i in range(1, max_requests):
-        subsequent_json = patents_api_call_by_query(search_query, 100*i+1)
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: patents_api_call_by_query(
+                query_session, first_record,
+                parsers=(fetch_patents_metadata,)
+            ),
+            'patents',
+            query_session.params, query_session.records_found
+        ),
+        [100*i+1 for i in range(1, max_requests)]
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         for record in subsequent_json['Data']['Records']['records']['REC']:
             patent_records.append(fetch_patents_metadata(record))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     return patent_records
 
@@ -212,10 +280,10 @@ def retrieve_wos_trend(search_query: str) -> list:
     """Retrieve the number of Web of Science documents by publication
     years."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving research trend data'
+    state.update(0, 'Retrieving research trend data')
     pub_years = []
-    initial_wos_json = wos_pubyear_call(search_query)
+    query_session = search('WOS', search_query)
+    initial_wos_json = wos_pubyear_call(query_session)
     if initial_wos_json['Data']['Records']['records']:
         pub_years.extend(
             record['static_data']['summary']['pub_info']['pubyear']
@@ -226,14 +294,23 @@ def retrieve_wos_trend(search_query: str) -> list:
         requests_required = ((total_results - 1) // 100) + 1
         max_requests = min(requests_required, 1000)
 
-        for i in range(1, max_requests):
-            subsequent_wos_json = wos_pubyear_call(search_query, i * 100 + 1)
+        subsequent_wos_jsons = fetch_pages(
+            checkpoints.resumable(
+                lambda first_record: wos_pubyear_call(
+                    query_session, first_record
+                ),
+                'wos trend',
+                query_session.params, query_session.records_found
+            ),
+            [i * 100 + 1 for i in range(1, max_requests)]
+        )
+        for i, subsequent_wos_json in enumerate(subsequent_wos_jsons, start=1):
             pub_years.extend(
                 record['static_data']['summary']['pub_info']['pubyear']
                 for record
                 in subsequent_wos_json['Data']['Records']['records']['REC']
             )
-            state.progress = (i + 1) / max_requests * 100
+            state.update((i + 1) / max_requests * 100)
 
     return [{'year': k, 'wos': v} for k, v in Counter(pub_years).items()]
 
@@ -242,11 +319,11 @@ def retrieve_dii_trend(search_query: str) -> tuple[list, list]:
     """Retrieve the number of patent documents by their earliest priority
     and publication years."""
 
-    state.progress = 0
-    state.current_task = 'Retrieving innovation trend data'
+    state.update(0, 'Retrieving innovation trend data')
     pub_years = []
     prty_years = []
-    initial_dii_json = dii_pubyear_call(search_query)
+    query_session = search('DIIDW', search_query)
+    initial_dii_json = dii_pubyear_call(query_session)
     if initial_dii_json['Data']['Records']['records']:
         for record in initial_dii_json['Data']['Records']['records']['REC']:
             patent_typ_section = record['static_data']['item']['PatentTyp1']
@@ -256,13 +333,22 @@ def retrieve_dii_trend(search_query: str) -> tuple[list, list]:
         requests_required = ((total_results - 1) // 100) + 1
         max_requests = min(requests_required, 1000)
 
-        for i in range(1, max_requests):
-            subsequent_dii_json = dii_pubyear_call(search_query, i * 100 + 1)
+        subsequent_dii_jsons = fetch_pages(
+            checkpoints.resumable(
+                lambda first_record: dii_pubyear_call(
+                    query_session, first_record
+                ),
+                'dii trend',
+                query_session.params, query_session.records_found
+            ),
+            [i * 100 + 1 for i in range(1, max_requests)]
+        )
+        for i, subsequent_dii_json in enumerate(subsequent_dii_jsons, start=1):
             for record in subsequent_dii_json['Data']['Records']['records']['REC']:
                 patent_typ_section = record['static_data']['item']['PatentTyp1']
                 pub_years.extend(fetch_patent_pub_year(patent_typ_section))
                 prty_years.extend(fetch_earliest_priority_year(patent_typ_section))
-            state.progress = (i + 1) / max_requests * 100
+            state.update((i + 1) / max_requests * 100)
 
     return (
         [{'year': k, 'dii_pubyear': v} for k, v in Counter(pub_years).items()],
@@ -270,6 +356,7 @@ def retrieve_dii_trend(search_query: str) -> tuple[list, list]:
     )
 
 
+@view_fields('pub_info', 'names', 'tc_list')
 def fetch_base_record_metadata(json: dict) -> list[dict]:
     """Fetch the UT and Times Cited fields for each of the base
     records."""
@@ -324,8 +411,13 @@ def retrieve_citing_patent_ids(rec: dict) -> list[str]:
     total_citing_records = citing_data['QueryResult']['RecordsFound']
     citing_requests_required = ((total_citing_records - 1) // 100) + 1
     citing_patents_ids = []
-    for i in range(citing_requests_required):
-        citing_uts = citing_patents_ids_api_call(citing_query_id, 100*i+1)
+    citing_pages = fetch_pages(
+        lambda first_record: citing_patents_ids_api_call(
+            rec, citing_query_id, first_record
+        ),
+        [100*i+1 for i in range(citing_requests_required)]
+    )
+    for citing_uts in citing_pages:
         for citing_ut in citing_uts:
             if citing_ut.split(':')[0] == 'DIIDW':
                 citing_patents_ids.append(citing_ut)
@@ -333,6 +425,7 @@ def retrieve_citing_patent_ids(rec: dict) -> list[str]:
     return citing_patents_ids
 
 
+@view_fields('titles', 'names', 'item', 'identifiers')
 def fetch_patents_metadata(patent_rec: dict) -> dict:
     """Parse patent metadata for required fields."""
 
@@ -10,6 +10,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 from plotly import offline
+from lazy_plots import LazyPlots
+import result_store
 
 color_palette = ['#B175E1', '#18A381', '#3595F0', '#ED5564', '#5E33BF',
                  '#003F51', '#A39300', '#EC40DB', '#C8582A', '#1E48DD',
@@ -27,31 +29,33 @@ def word_wrap(x: str, width: int) -> str:
     return '<br>'.join(textwrap.wrap(str(x), width=width))
 
 
-def visualize_wos_data(df, df2, query: str) -> tuple:
+def visualize_wos_data(df, df2, query: str) -> LazyPlots:
     """Create a number of html div objects with data visualizations
-    with Plotly."""
-
-    return (
-        visualize_metrics(df2, query, 'WOS', df),
-        visualize_authors(df, query),
-        visualize_assignees(df2, query, 'WOS'),
-        visualize_inventors(df2, query, 'WOS'),
-        visualize_countries_applied(df2, query, 'WOS'),
-        visualize_countries_granted(df2, query, 'WOS')
-    )
+    with Plotly, building the first one at once and the others on
+    demand."""
+
+    return LazyPlots((
+        lambda: visualize_metrics(df2, query, 'WOS', df),
+        lambda: visualize_authors(df, query),
+        lambda: visualize_assignees(df2, query, 'WOS'),
+        lambda: visualize_inventors(df2, query, 'WOS'),
+        lambda: visualize_countries_applied(df2, query, 'WOS'),
+        lambda: visualize_countries_granted(df2, query, 'WOS')
+    ))
 
 
-def visualize_dii_data(df, query: str) -> tuple:
+def visualize_dii_data(df, query: str) -> LazyPlots:
     """Create a number of html div objects with data visualizations
-    with Plotly."""
-
-    return (
-        visualize_metrics(df, query, 'DIIDW'),
-        visualize_assignees(df, query, 'DIIDW'),
-        visualize_inventors(df, query, 'DIIDW'),
-        visualize_countries_applied(df, query, 'DIIDW'),
-        visualize_countries_granted(df, query, 'DIIDW')
-    )
+    with Plotly, building the first one at once and the others on
+    demand."""
+
+    return LazyPlots((
+        lambda: visualize_metrics(df, query, 'DIIDW'),
+        lambda: visualize_assignees(df, query, 'DIIDW'),
+        lambda: visualize_inventors(df, query, 'DIIDW'),
+        lambda: visualize_countries_applied(df, query, 'DIIDW'),
+        lambda: visualize_countries_granted(df, query, 'DIIDW')
+    ))
 
 
 def visualize_trends_data(df, query: str) -> tuple[str]:
@@ -102,7 +106,7 @@ def visualize_trends_data(df, query: str) -> tuple[str]:
     fig.update_yaxes(title_text=None, showgrid=True, gridcolor='#9D9D9C')
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return (offline.plot(fig, output_type='div'),)
+    return (offline.plot(fig, output_type='div', include_plotlyjs=False),)
 
 
 def visualize_metrics(df2: pd.DataFrame, query: str, db: str, df=None) -> str:
@@ -149,7 +153,7 @@ def visualize_metrics(df2: pd.DataFrame, query: str, db: str, df=None) -> str:
         f'<p class="metric__value">{quad_inventions}</p>'
         '</li>'
         '</ul>'
-        f'{offline.plot(fig, output_type='div')}'
+        f'{offline.plot(fig, output_type='div', include_plotlyjs=False)}'
     )
 
     return output
@@ -394,7 +398,7 @@ def visualize_authors(df: pd.DataFrame, query: str) -> str:
     fig.update_traces(marker={'color': color_palette[0], 'sizemin': 3})
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_assignees(df: pd.DataFrame, query: str, db: str) -> str:
@@ -439,7 +443,7 @@ def visualize_assignees(df: pd.DataFrame, query: str, db: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_inventors(df: pd.DataFrame, query: str, db: str) -> str:
@@ -484,7 +488,7 @@ def visualize_inventors(df: pd.DataFrame, query: str, db: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_countries_applied(df: pd.DataFrame, query: str, db: str) -> str:
@@ -522,7 +526,7 @@ def visualize_countries_applied(df: pd.DataFrame, query: str, db: str) -> str:
             geo=dict(showframe=False, showcoastlines=False)
         )
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_countries_granted(df: pd.DataFrame, query: str, db: str) -> str:
@@ -564,26 +568,32 @@ def visualize_countries_granted(df: pd.DataFrame, query: str, db: str) -> str:
             geo=dict(showframe=False, showcoastlines=False)
         )
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_excel(file: str) -> tuple:
-    """Return graphs objects from previously saved Excel file."""
+    """Return graphs objects from previously saved results, read from
+    their stored tables or the Excel file."""
 
     if file.split('/')[1] == 'woscc':
+        sheets = result_store.load(
+            file, ('Base Records', 'Citing Inventions', 'Search Query')
+        )
         return visualize_wos_data(
-            pd.read_excel(file, sheet_name='Base Records'),
-            pd.read_excel(file, sheet_name='Citing Inventions'),
-            pd.read_excel(file, sheet_name='Search Query')['Search Query'][0]
+            sheets['Base Records'],
+            sheets['Citing Inventions'],
+            sheets['Search Query']['Search Query'][0]
         )
 
     if file.split('/')[1] == 'dii':
+        sheets = result_store.load(file, ('Patent Families', 'Search Query'))
         return visualize_dii_data(
-            pd.read_excel(file, sheet_name='Patent Families'),
-            pd.read_excel(file, sheet_name='Search Query')['Search Query'][0]
+            sheets['Patent Families'],
+            sheets['Search Query']['Search Query'][0]
         )
 
+    sheets = result_store.load(file, ('Trends', 'Search Query'))
     return visualize_trends_data(
-        pd.read_excel(file, sheet_name='Trends'),
-        pd.read_excel(file, sheet_name='Search Query')['Search Query'][0]
+        sheets['Trends'],
+        sheets['Search Query']['Search Query'][0]
     )
@@ -5,7 +5,7 @@ API.
 """
 
 from datetime import date, datetime
-import requests
+import api_client
 
 
 def retrieve_rates_via_api():
@@ -14,9 +14,9 @@ def retrieve_rates_via_api():
 
     :return: dict.
     """
-    rates = requests.get(
+    rates = api_client.session.get(
         url='https://open.er-api.com/v6/latest/USD',
-        timeout=16
+        timeout=api_client.TIMEOUT
     ).json()['rates']
     with open('currencies.csv', 'w', encoding='utf-8') as writing:
         writing.writelines(
@@ -28,6 +28,20 @@ def retrieve_rates_via_api():
     return rates
 
 
+def search_grants(apikey, query):
+    """Run the search query on the server side once, or reuse the recent
+    run of the same search query, e.g. by its validation.
+
+    :param apikey: str.
+    :param query: str.
+    :return: api_client.QuerySession.
+    """
+    return api_client.open_query(
+        apikey,
+        {'databaseId': 'GRANTS', 'usrQuery': query}
+    )
+
+
 def validate_search_query(apikey, query):
     """Check if the search query is valid, return the number of grants
     documents found in the query.
@@ -36,45 +50,27 @@ def validate_search_query(apikey, query):
     :param query: str.
     :return: int, str.
     """
-    test_request = requests.get(
-        url=f'https://wos-api.clarivate.com/api/wos/?databaseId=GRANTS&'
-            f'usrQuery={query}&count=0&firstRecord=1',
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-    if test_request.status_code == 200:
-        test_json = test_request.json()
+    query_session = search_grants(apikey, query)
+    if query_session.status_code == 200:
         return (
-            test_request.status_code,
-            test_json['QueryResult']['RecordsFound']
+            query_session.status_code,
+            query_session.records_found
         )
     return (
-        test_request.status_code,
-        test_request.json()['message'].split(':')[-1]
+        query_session.status_code,
+        query_session.message
     )
 
 
-def retrieve_wos_metadata_via_api(apikey, query, first_record=1):
+def retrieve_wos_metadata_via_api(query_session, first_record=1,
+                                  parsers=()):
     """Retrieve Web of Science documents metadata through
-    Web of Science Expanded API.
+    Web of Science Expanded API by the query ID of the search, limited
+    to the fields read by the parsers.
 
-    :param apikey: str.
-    :param query: str.
-    :param rpp: int.
+    :param query_session: api_client.QuerySession.
     :param first_record: int.
+    :param parsers: tuple.
     :return: dict.
     """
-    params = {
-        'databaseId': 'GRANTS',
-        'usrQuery': query,
-        'count': 100,
-        'firstRecord': first_record
-    }
-    request = requests.get(
-        url='https://wos-api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-
-    return request.json()
+    return query_session.records(first_record, parsers=parsers)
@@ -5,37 +5,32 @@ Web of Science Grants Index data.
 Main app file: manage Flask interface actions and rendering.
 """
 
-import json
-import state
-import time
+import jobs
+import lazy_plots
+import plotly_js
+import result_store
 
-from flask import Flask, render_template, request, Response
+from flask import Flask, render_template, request
 from data_processing import run_button
 from visualizations import visualize_excel
 from api_operations import validate_search_query
 from apikeys import EXPANDED_APIKEY
 
 app = Flask(__name__)
+app.register_blueprint(jobs.blueprint)
+app.register_blueprint(plotly_js.blueprint)
+app.register_blueprint(result_store.blueprint)
 
-plots_list = []
 
+@app.route(rule='/plots/<int:index>/<path:filename>')
+def plot_section(index: int, filename: str) -> str:
+    """Return the plot of the visualization tab of the results file,
+    so that the page switches the tabs without reloading everything."""
 
-@app.route("/stream")
-def stream():
-    def generate():
-        last_progress = -1
-        last_task = ""
-        while True:
-            if (state.progress != last_progress) or (state.current_task != last_task):
-                data = {
-                    "task": state.current_task,
-                    "progress": state.progress
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_progress = state.progress
-                last_task = state.current_task
-            time.sleep(0.2)
-    return Response(generate(), mimetype="text/event-stream")
+    plots = lazy_plots.load_download(filename, visualize_excel)
+    if plots is None or index >= len(plots):
+        return 'No such plot', 404
+    return plots[index]
 
 
 @app.route(rule="/", methods=['POST', 'GET'])
@@ -59,20 +54,22 @@ def start_menu() -> str:
     # Switching between visualizations
     if request.method == 'POST' and 'button' in request.form.keys():
         visualizations = {
-            "grant_funding_by_year": plots_list[0],
-            "top_principal_investigators": plots_list[1],
-            "top_pi_institutions": plots_list[2],
-            "top_funders": plots_list[3],
-            "average_grant_volume_per_year": plots_list[4],
-            "top_grants_by_associated_wos_records": plots_list[5]
+            "grant_funding_by_year": 0,
+            "top_principal_investigators": 1,
+            "top_pi_institutions": 2,
+            "top_funders": 3,
+            "average_grant_volume_per_year": 4,
+            "top_grants_by_associated_wos_records": 5
         }
-        if request.form['button'] in visualizations:
-            for key, value in visualizations.items():
-                if request.method == 'POST' and request.form['button'] == key:
-                    return render_template(
-                        'index.html',
-                        plot=value,
-                        index=plots_list.index(value))
+        plots_file = request.form.get('plots_file', '')
+        plots = lazy_plots.load_download(plots_file, visualize_excel)
+        if request.form['button'] in visualizations and plots is not None:
+            index = visualizations[request.form['button']]
+            return render_template(
+                'index.html',
+                plot=plots[index],
+                plots_file=plots_file,
+                index=index)
 
     return render_template('index.html', search_query='')
 
@@ -97,15 +94,16 @@ def search_section(button: str, search_query: str) -> str:
             message=f'Request status: {response[0]}, message: {response[1]}',
             search_query=search_query
         )
-    if search_query != '' and button == 'run':
-        plots_list.clear()
-        safe_filename, plots = run_button(EXPANDED_APIKEY, search_query)
-        plots_list.extend(plots)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'run',
+            search_query=search_query,
+            refresh=button == 'refresh'
+        )
         return render_template(
             'index.html',
-            filename=safe_filename,
-            search_query=search_query,
-            plot=plots_list[0]
+            job_id=job_id,
+            search_query=search_query
         )
     return render_template('index.html', search_query='')
 
@@ -118,13 +116,55 @@ def load_file_section(file: str) -> str:
     :return: flask.render_template
     """
 
-    plots_list.clear()
     if file == '':
         return render_template('index.html', search_query='')
-    plots = visualize_excel(f'downloads/{file}')
-    plots_list.extend(plots)
+    plots = lazy_plots.load(f'downloads/{file}', visualize_excel)
+
+    return render_template(
+        'index.html',
+        plot=plots[0],
+        plots_file=file,
+        index=0
+    )
+
 
-    return render_template('index.html', plot=plots_list[0], index=0)
+def render_run_results(job: dict) -> str:
+    """Render the results of the finished 'Run' job, or its error. The
+    plots built by the job are reused, or built again from its file
+    after the restart of the app."""
+
+    if job['status'] == 'failed':
+        return render_template(
+            'index.html',
+            message=job['error'],
+            **job['params']
+        )
+    file = f"downloads/{job['result']['filename']}"
+    try:
+        plots = lazy_plots.load(file, visualize_excel)
+    except FileNotFoundError:
+        return render_template(
+            'index.html',
+            message=f'The {file} file of these results is not found.',
+            **job['params']
+        )
+    return render_template(
+        'index.html',
+        filename=job['result']['filename'],
+        plot=plots[0],
+        plots_file=job['result']['filename'],
+        **job['params']
+    )
+
+
+@jobs.task('run', render=render_run_results)
+def run_job(search_query: str) -> dict:
+    """Run the retrieval and the analysis in a background job, and keep
+    its plots for the results page."""
+
+    safe_filename, plots = run_button(EXPANDED_APIKEY, search_query)
+    lazy_plots.remember(f'downloads/{safe_filename}', plots)
+    return {'filename': safe_filename}
 
 
 if __name__ == '__main__':
@@ -5,11 +5,21 @@ return them as dictionaries.
 """
 
 from datetime import date, datetime, timedelta
+import checkpoints
+import result_store
 import state
 import pandas as pd
+from api_client import (
+    check_annual_quota,
+    fetch_pages,
+    retry_budget,
+    start_job,
+    view_fields
+)
 from api_operations import (
     retrieve_rates_via_api,
-    retrieve_wos_metadata_via_api
+    retrieve_wos_metadata_via_api,
+    search_grants
 )
 from visualizations import visualize_data
 
@@ -22,42 +32,54 @@ def run_button(apikey: str, search_query: str) -> tuple[str, tuple]:
     :param search_query: str.
     :return: str, tuple.
     """
+
+    start_job()
     grants_list = []
     usd_rates = get_usd_rates()
 
-    state.progress = 0
-    state.current_task = "Retrieving Grants Records"
+    state.update(0, "Retrieving Grants Records")
 
-    initial_json = retrieve_wos_metadata_via_api(apikey, search_query)
+    query_session = search_grants(apikey, search_query)
+    total_results = query_session.records_found
+    requests_required = ((total_results - 1) // 100) + 1
+    max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
+    initial_json = retrieve_wos_metadata_via_api(
+        query_session, parsers=(fetch_data,)
+    )
 
     for record in initial_json['Data']['Records']['records']['REC']:
         grants_list.append(fetch_data(record, usd_rates))
-    total_results = initial_json['QueryResult']['RecordsFound']
-    requests_required = ((total_results - 1) // 100) + 1
-    max_requests = min(requests_required, 1000)
-    for i in range(1, max_requests):
-        first_record = int(f'{i}01')
-        subsequent_json = retrieve_wos_metadata_via_api(
-            apikey,
-            search_query,
-            first_record
-        )
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: retrieve_wos_metadata_via_api(
+                query_session, first_record, parsers=(fetch_data,)
+            ),
+            'grants',
+            query_session.params, query_session.records_found
+        ),
+        [int(f'{i}01') for i in range(1, max_requests)]
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         for record in subsequent_json['Data']['Records']['records']['REC']:
             grants_list.append(fetch_data(record, usd_rates))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     df = pd.DataFrame(grants_list)
     safe_query = search_query.replace('*', '').replace('"', '')
     safe_filename = f'{safe_query} - {date.today()}.xlsx'
     df2 = pd.DataFrame({'Search Query': [search_query]}, index=None)
-    with pd.ExcelWriter(f'downloads/{safe_filename}') as writer:
-        df.to_excel(writer, sheet_name='Grants Data', index=False)
-        df2.to_excel(writer, sheet_name='Search Query', index=False)
+    result_store.save(f'downloads/{safe_filename}', {
+        'Grants Data': df,
+        'Search Query': df2
+    })
 
     plots = visualize_data(df, search_query)
 
-    state.progress = 0
-    state.current_task = ""
+    state.update(0, "")
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return safe_filename, plots
 
@@ -256,6 +278,8 @@ def convert_to_usd(amount, currency, rates):
     return ''
 
 
+@view_fields('names', 'titles', 'pub_info', 'doctypes', 'item', 'fund_ack',
+              'keywords', 'abstracts', 'related_records')
 def fetch_data(rec, rates):
     """Parse the JSON file retrieved by the API for required metadata
     fields.
@@ -0,0 +1,344 @@
+"""
+Store the result tables of the runs in a columnar format next to their
+Excel files, so that loading the results back does not parse the xlsx,
+which takes tens of seconds for the large sheets.
+
+Each run saves every sheet of its results as a Parquet file, or as a
+pickle of the dataframe if pyarrow is not installed, under the STORE_DIR
+subfolder of its Excel file, with a JSON manifest listing the sheets.
+The manifest is written last, so that a partly saved store is never
+read.
+
+The Excel file is an export of the stored tables: it is written by a
+background thread after the run, or only on demand by the download
+endpoint if EXCEL_EXPORT is False. The rows are streamed to the
+workbook in the write-only mode of openpyxl, whose memory use does not
+grow with the rows, and the tables longer than the sheets of Excel are
+continued on the next sheets, or saved to CSV files next to the
+workbook if they need too many sheets.
+
+The tables of the recently loaded results are cached by the path and the
+modification time of their files, so that switching between the loaded
+files does not read them again.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import os
+import threading
+import pandas as pd
+from openpyxl import Workbook
+from flask import Blueprint, abort, send_file
+from werkzeug.security import safe_join
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+# Whether the runs export their Excel files in the background
+EXCEL_EXPORT = True
+STORE_DIR = '.results'
+DOWNLOADS_DIR = 'downloads'
+MANIFEST = 'manifest.json'
+# The engine reading the Excel files of the earlier versions of the app:
+# calamine parses them several times faster than the read-only mode of
+# openpyxl
+EXCEL_ENGINE = 'openpyxl' if python_calamine is None else 'calamine'
+# How many loaded results keep their tables in memory
+CACHE_SIZE = 8
+# The rows of an Excel sheet, with its header, and how many sheets a
+# table may take in the workbook before it is exported to CSV instead
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_PARTS = 4
+# How many rows are converted to the cell values at once
+CHUNK_ROWS = 10000
+
+exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix='excel')
+export_lock = threading.Lock()
+cache = OrderedDict()
+cache_lock = threading.Lock()
+
+blueprint = Blueprint('result_store', __name__)
+
+
+def store_path(path):
+    """Find the folder of the stored tables of the Excel file.
+
+    :param path: str, the path of the Excel file.
+    :return: str.
+    """
+    folder, name = os.path.split(path)
+    return os.path.join(folder, STORE_DIR, name)
+
+
+def manifest_path(path):
+    """Find the manifest of the stored tables of the Excel file.
+
+    :param path: str, the path of the Excel file.
+    :return: str.
+    """
+    return os.path.join(store_path(path), MANIFEST)
+
+
+def write_sheet(df, file, index):
+    """Save the table in the columnar format, or as a pickle if pyarrow
+    is missing or cannot convert its columns.
+
+    :param df: pd.DataFrame.
+    :param file: str, the path without the extension.
+    :param index: bool, whether the index is part of the table.
+    :return: tuple[str], the file name and its format.
+    """
+    if pyarrow is not None:
+        try:
+            df.to_parquet(f'{file}.parquet', index=index)
+            return f'{os.path.basename(file)}.parquet', 'parquet'
+        except (TypeError, ValueError) as error:
+            print(f'Oops, the table cannot be saved to Parquet: {error}')
+    if not index:
+        df = df.reset_index(drop=True)
+    df.to_pickle(f'{file}.pkl')
+    return f'{os.path.basename(file)}.pkl', 'pickle'
+
+
+def save(path, sheets, index=()):
+    """Store the result tables of the run, and export them to the Excel
+    file in the background.
+
+    :param path: str, the path of the Excel file.
+    :param sheets: dict[str, pd.DataFrame], by the sheet name.
+    :param index: iterable of str, the sheets saved with their index.
+    """
+    with export_lock:
+        folder = store_path(path)
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(manifest_path(path)):
+            os.remove(manifest_path(path))
+        # The export of the earlier run of the same search is outdated
+        if os.path.exists(path):
+            os.remove(path)
+        manifest = {
+            'excel': os.path.basename(path),
+            'saved': datetime.datetime.now().isoformat(timespec='seconds'),
+            'sheets': []
+        }
+        for number, (name, df) in enumerate(sheets.items()):
+            file, file_format = write_sheet(
+                df, os.path.join(folder, str(number)), name in index
+            )
+            manifest['sheets'].append({
+                'name': name,
+                'file': file,
+                'format': file_format,
+                'rows': len(df),
+                'index': name in index
+            })
+        temporary = f'{manifest_path(path)}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary, manifest_path(path))
+    if EXCEL_EXPORT:
+        exporter.submit(export_excel, path)
+
+
+def read_manifest(path):
+    """Read the manifest of the stored tables of the Excel file.
+
+    :param path: str, the path of the Excel file.
+    :return: dict or None if the tables are not stored.
+    """
+    try:
+        with open(manifest_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def read_sheet(path, sheet):
+    """Read the stored table of the manifest entry.
+
+    :param path: str, the path of the Excel file.
+    :param sheet: dict.
+    :return: pd.DataFrame.
+    """
+    file = os.path.join(store_path(path), sheet['file'])
+    if sheet['format'] == 'parquet':
+        return pd.read_parquet(file)
+    return pd.read_pickle(file)
+
+
+def version(path):
+    """Identify the version of the results by the modification time of
+    their stored tables, or of the Excel file if they are not stored.
+
+    :param path: str, the path of the Excel file.
+    :return: float or None if the results do not exist.
+    """
+    for file in (manifest_path(path), path):
+        try:
+            return os.path.getmtime(file)
+        except OSError:
+            pass
+    return None
+
+
+def read_workbook(path, names=None, index=()):
+    """Read the sheets of the Excel file, opening the workbook once for
+    all of them, and join the tables continued on the next sheets.
+
+    :param path: str.
+    :param names: iterable of str or None for all the sheets.
+    :param index: iterable of str, the sheets with their index in the
+        first column.
+    :return: dict[str, pd.DataFrame], by the sheet name.
+    """
+    sheets = {}
+    continued = set()
+    with pd.ExcelFile(path, engine=EXCEL_ENGINE) as excel:
+        for name in (excel.sheet_names if names is None else names):
+            if name in continued:
+                continue
+            index_col = 0 if name in index else None
+            parts = [excel.parse(name, index_col=index_col)]
+            part = 2
+            while sheet_title(name, part) in excel.sheet_names:
+                continued.add(sheet_title(name, part))
+                parts.append(excel.parse(sheet_title(name, part),
+                                         index_col=index_col))
+                part += 1
+            if len(parts) > 1:
+                sheets[name] = pd.concat(parts,
+                                         ignore_index=name not in index)
+            else:
+                sheets[name] = parts[0]
+    return sheets
+
+
+def load(path, names=None, index=()):
+    """Read the sheets of the results from their stored tables, or from
+    the Excel file if they are not stored, e.g. for the files saved by
+    the earlier versions of the app. The recently loaded tables are
+    taken from the cache, and copied as the visualizations modify them.
+
+    :param path: str, the path of the Excel file.
+    :param names: iterable of str or None for all the sheets.
+    :param index: iterable of str, the Excel sheets with their index in
+        the first column.
+    :return: dict[str, pd.DataFrame], by the sheet name.
+    """
+    key = (path, version(path), None if names is None else tuple(names),
+           tuple(index))
+    with cache_lock:
+        sheets = cache.get(key)
+        if sheets is not None:
+            cache.move_to_end(key)
+    if sheets is None:
+        manifest = read_manifest(path)
+        if manifest is not None:
+            sheets = {
+                sheet['name']: read_sheet(path, sheet)
+                for sheet in manifest['sheets']
+                if names is None or sheet['name'] in names
+            }
+        else:
+            sheets = read_workbook(path, names, index)
+        if key[1] is not None:
+            with cache_lock:
+                cache[key] = sheets
+                while len(cache) > CACHE_SIZE:
+                    cache.popitem(last=False)
+    return {name: df.copy() for name, df in sheets.items()}
+
+
+def sheet_title(name, part):
+    """Name the sheet of the part of the table, within the 31 characters
+    allowed by Excel.
+
+    :param name: str, the name of the table.
+    :param part: int, from 1.
+    :return: str.
+    """
+    if part == 1:
+        return name[:31]
+    suffix = f' ({part})'
+    return f'{name[:31 - len(suffix)]}{suffix}'
+
+
+def write_table(workbook, name, df, index, path):
+    """Stream the rows of the table to the sheets of the workbook, or to
+    a CSV file next to it if they need more than EXCEL_MAX_PARTS sheets.
+
+    :param workbook: openpyxl.Workbook, in the write-only mode.
+    :param name: str, the name of the table.
+    :param df: pd.DataFrame.
+    :param index: bool, whether the index is part of the table.
+    :param path: str, the path of the Excel file.
+    """
+    rows = EXCEL_MAX_ROWS - 1
+    parts = max(1, -(-len(df) // rows))
+    if parts > EXCEL_MAX_PARTS:
+        csv_file = f'{os.path.splitext(path)[0]} - {name}.csv'
+        df.to_csv(csv_file, index=index)
+        sheet = workbook.create_sheet(sheet_title(name, 1))
+        sheet.append([f'The {len(df)} rows of this table do not fit in the '
+                      f'workbook, see {os.path.basename(csv_file)}'])
+        return
+    header = list(df.columns)
+    if index:
+        header.insert(0, df.index.name)
+    for part in range(parts):
+        sheet = workbook.create_sheet(sheet_title(name, part + 1))
+        sheet.append(header)
+        end = min(len(df), (part + 1) * rows)
+        for start in range(part * rows, end, CHUNK_ROWS):
+            chunk = df.iloc[start:min(start + CHUNK_ROWS, end)]
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=index, name=None):
+                sheet.append(row)
+
+
+def export_excel(path):
+    """Write the Excel file of the stored tables, unless it is already
+    written.
+
+    :param path: str, the path of the Excel file.
+    :return: str, the path of the Excel file.
+    """
+    with export_lock:
+        manifest = read_manifest(path)
+        if os.path.exists(path) or manifest is None:
+            return path
+        folder, name = os.path.split(path)
+        temporary = os.path.join(folder, f'.{name}')
+        try:
+            workbook = Workbook(write_only=True)
+            for sheet in manifest['sheets']:
+                write_table(workbook, sheet['name'], read_sheet(path, sheet),
+                            sheet['index'], path)
+            workbook.save(temporary)
+            os.replace(temporary, path)
+        except Exception as error:
+            print(f'Oops, {path} could not be exported: {error!r}')
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+    return path
+
+
+@blueprint.route('/downloads/<path:filename>')
+def download(filename):
+    """Send the Excel file of the results, exporting it first if it is
+    not exported yet."""
+    path = safe_join(DOWNLOADS_DIR, filename)
+    if path is None:
+        abort(404)
+    if not os.path.exists(path) and read_manifest(path) is None:
+        abort(404)
+    return send_file(os.path.abspath(export_excel(path)), as_attachment=True)
@@ -7,6 +7,8 @@ import textwrap
 import pandas as pd
 import plotly.express as px
 from plotly import offline
+from lazy_plots import LazyPlots
+import result_store
 
 color_palette = ['#B175E1', '#18A381', '#3595F0', '#ED5564', '#5E33BF',
                  '#003F51', '#A39300', '#EC40DB', '#C8582A', '#1E48DD',
@@ -24,9 +26,10 @@ def word_wrap(x: str, width: int) -> str:
     return '<br>'.join(textwrap.wrap(str(x), width=width))
 
 
-def visualize_data(df: pd.DataFrame, query: str) -> tuple:
+def visualize_data(df: pd.DataFrame, query: str) -> LazyPlots:
     """Create a number of html div object with various grant data
-    visualizations with Plotly.
+    visualizations with Plotly, building the first one at once and the
+    others on demand.
 
     """
 
@@ -44,17 +47,17 @@ def visualize_data(df: pd.DataFrame, query: str) -> tuple:
         df.groupby('Publication Year')['UT'].count(), on='Publication Year'
     )
 
-    return (
-        visualize_grants_by_years(grants_by_years, query),
-        visualize_top_pis(df, query),
-        visualize_top_pi_orgs(df, query),
-        visualize_top_funders(df, query),
-        visualize_average_grant_volume_by_years(
+    return LazyPlots((
+        lambda: visualize_grants_by_years(grants_by_years, query),
+        lambda: visualize_top_pis(df, query),
+        lambda: visualize_top_pi_orgs(df, query),
+        lambda: visualize_top_funders(df, query),
+        lambda: visualize_average_grant_volume_by_years(
             average_grant_volume_by_year,
             query
         ),
-        visualize_top_grants_by_associated_records(df, query)
-    )
+        lambda: visualize_top_grants_by_associated_records(df, query)
+    ))
 
 
 def visualize_grants_by_years(gby: pd.DataFrame, query: str) -> str:
@@ -82,7 +85,7 @@ def visualize_grants_by_years(gby: pd.DataFrame, query: str) -> str:
     fig.update_yaxes(title_text=None, showgrid=True, gridcolor='#9D9D9C')
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_pis(df: pd.DataFrame, query: str) -> str:
@@ -121,7 +124,7 @@ def visualize_top_pis(df: pd.DataFrame, query: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_pi_orgs(df: pd.DataFrame, query: str) -> str:
@@ -169,7 +172,7 @@ def visualize_top_pi_orgs(df: pd.DataFrame, query: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_funders(df: pd.DataFrame, query: str) -> str:
@@ -207,7 +210,7 @@ def visualize_top_funders(df: pd.DataFrame, query: str) -> str:
     )
     fig.update_layout(hoverlabel={'font_color': 'white'})
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_average_grant_volume_by_years(
@@ -252,7 +255,7 @@ def visualize_average_grant_volume_by_years(
     fig.update_yaxes(title_text=None, showgrid=True, gridcolor='#9D9D9C')
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_top_grants_by_associated_records(
@@ -289,16 +292,18 @@ def visualize_top_grants_by_associated_records(
     fig.update_yaxes(title_text=None, showgrid=True, gridcolor='#9D9D9C')
     fig.update_xaxes(title_text=None, linecolor='#9D9D9C')
 
-    return offline.plot(fig, output_type='div')
+    return offline.plot(fig, output_type='div', include_plotlyjs=False)
 
 
 def visualize_excel(file):
-    """Return graphs objects from previously saved Excel file.
+    """Return graphs objects from previously saved results, read from
+    their stored tables or the Excel file.
 
     :param file:
-    :return: tuple of str.
+    :return: LazyPlots.
     """
-    df = pd.read_excel(file, sheet_name='Grants Data')
-    query = pd.read_excel(file, sheet_name='Search Query')['Search Query'][0]
+    sheets = result_store.load(file, ('Grants Data', 'Search Query'))
+    df = sheets['Grants Data']
+    query = sheets['Search Query']['Search Query'][0]
 
     return visualize_data(df, query)
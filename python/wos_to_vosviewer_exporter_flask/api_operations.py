@@ -3,7 +3,22 @@ Retrieve data from Web of Science Core Collection with Web of Science
 Expanded API.
 """
 
-import requests
+import api_client
+from api_client import EXPANDED_API_URL
+
+
+def search_wos(apikey, query):
+    """Run the search query on the server side once, or reuse the recent
+    run of the same search query, e.g. by its validation.
+
+    :param apikey: str.
+    :param query: str.
+    :return: api_client.QuerySession.
+    """
+    return api_client.open_query(
+        apikey,
+        {'databaseId': 'WOS', 'usrQuery': query}
+    )
 
 
 def validate_search_query(apikey, query):
@@ -14,41 +29,24 @@ def validate_search_query(apikey, query):
     :param query: str.
     :return: str, str.
     """
-    test_request = requests.get(
-        url=f'https://wos-api.clarivate.com/api/wos/?databaseId=WOS&usrQuery={query}&'
-            f'count=0&firstRecord=1',
-        headers={'X-APIkey': apikey},
-        timeout=16
-    )
-    if test_request.status_code == 200:
-        return test_request.status_code, test_request.json()['QueryResult']['RecordsFound']
-    return test_request.status_code, test_request.json()['message'].split(':')[-1]
+    query_session = search_wos(apikey, query)
+    if query_session.status_code == 200:
+        return query_session.status_code, query_session.records_found
+    return query_session.status_code, query_session.message
 
 
-def retrieve_wos_metadata_via_api(apikey, query, first_record=1):
+def retrieve_wos_metadata_via_api(query_session, first_record=1,
+                                  parsers=()):
     """Retrieve Web of Science documents metadata through Web of Science
-    Expanded API.
+    Expanded API by the query ID of the search, limited to the fields
+    read by the parsers.
 
-    :param apikey: str.
-    :param query: str.
-    :param rpp: int.
+    :param query_session: api_client.QuerySession.
     :param first_record: int.
+    :param parsers: tuple.
     :return: dict.
     """
-    params = {
-        'databaseId': 'WOS',
-        'usrQuery': query,
-        'count': 100,
-        'firstRecord': first_record
-    }
-    expanded_api_request = requests.get(
-        url='https://wos-api.clarivate.com/api/wos',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
-    )
-
-    return expanded_api_request.json()
+    return query_session.records(first_record, parsers=parsers)
 
 
 def retrieve_cited_refs_via_api(apikey, ut):
@@ -63,25 +61,23 @@ def retrieve_cited_refs_via_api(apikey, ut):
         'databaseId': 'WOS',
         'uniqueId': ut,
         'count': 100,
-        'first_record': 1
+        'firstRecord': 1
     }
-    refs_request = requests.get(
-        url='https://api.clarivate.com/api/wos/references',
-        params=params,
-        headers={'X-ApiKey': apikey},
-        timeout=16
+    refs_request = api_client.get(
+        f'{EXPANDED_API_URL}/references',
+        apikey,
+        params
     )
-    refs_json = refs_request.json()
+    refs_json = api_client.decode(refs_request)
     refs_count = refs_json['QueryResult']['RecordsFound']
-    while params['first_record'] + 99 < refs_count:
-        params['first_record'] += 100
-        subsequent_request = requests.get(
-            url='https://api.clarivate.com/api/wos/references',
-            params=params,
-            headers={'X-ApiKey': apikey},
-            timeout=16
+    while params['firstRecord'] + 99 < refs_count:
+        params['firstRecord'] += 100
+        subsequent_request = api_client.get(
+            f'{EXPANDED_API_URL}/references',
+            apikey,
+            params
         )
-        subsequent_json = subsequent_request.json()
+        subsequent_json = api_client.decode(subsequent_request)
         for cited_ref in subsequent_json['Data']:
             refs_json['Data'].append(cited_ref)
     return refs_json
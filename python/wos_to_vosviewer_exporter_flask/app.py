@@ -6,34 +6,15 @@ Main app file: manage Flask interface actions and rendering, manage the
 main function that is launched on clicking the "Run" button.
 """
 
-import json
-import state
-import time
+import jobs
 
-from flask import Flask, render_template, request, Response
+from flask import Flask, render_template, request
 from apikeys import EXPANDED_APIKEY
 from api_operations import validate_search_query
 from data_processing import run_button
 
 app = Flask(__name__)
-
-
-@app.route("/stream")
-def stream():
-    def generate():
-        last_progress = -1
-        last_task = ""
-        while True:
-            if (state.progress != last_progress) or (state.current_task != last_task):
-                data = {
-                    "task": state.current_task,
-                    "progress": state.progress
-                }
-                yield f"data: {json.dumps(data)}\n\n"
-                last_progress = state.progress
-                last_task = state.current_task
-            time.sleep(0.2)
-    return Response(generate(), mimetype="text/event-stream")
+app.register_blueprint(jobs.blueprint)
 
 
 @app.route(rule='/', methods=['POST', 'GET'])
@@ -72,11 +53,16 @@ def search_section(button, search_query):
             search_query=search_query,
             cited_refs=cited_refs
         )
-    if search_query != '' and button == 'run':
-        safe_filename = run_button(EXPANDED_APIKEY, search_query, cited_refs)
+    if search_query != '' and button in ('run', 'refresh'):
+        job_id = jobs.submit(
+            'run',
+            search_query=search_query,
+            cited_refs=cited_refs,
+            refresh=button == 'refresh'
+        )
         return render_template(
             'index.html',
-            filename=safe_filename,
+            job_id=job_id,
             search_query=search_query,
             cited_refs=cited_refs
         )
@@ -87,5 +73,36 @@ def search_section(button, search_query):
     )
 
 
+def render_run_results(job):
+    """Render the file of the finished 'Run' job, or its error.
+
+    :param job: dict.
+    :return: render_template.
+    """
+    if job['status'] == 'failed':
+        return render_template(
+            'index.html',
+            message=job['error'],
+            **job['params']
+        )
+    return render_template(
+        'index.html',
+        filename=job['result']['filename'],
+        **job['params']
+    )
+
+
+@jobs.task('run', render=render_run_results)
+def run_job(search_query, cited_refs):
+    """Run the retrieval in a background job.
+
+    :param search_query: str.
+    :param cited_refs: bool.
+    :return: dict.
+    """
+    safe_filename = run_button(EXPANDED_APIKEY, search_query, cited_refs)
+    return {'filename': safe_filename}
+
+
 if __name__ == '__main__':
     app.run(debug=True)
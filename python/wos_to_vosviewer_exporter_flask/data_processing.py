@@ -2,9 +2,21 @@
 Fetch necessary metadata fields from Web of Science records.
 """
 
+import checkpoints
 import state
 from datetime import date
-from api_operations import retrieve_wos_metadata_via_api, retrieve_cited_refs_via_api
+from api_client import (
+    check_annual_quota,
+    fetch_pages,
+    retry_budget,
+    start_job,
+    view_fields
+)
+from api_operations import (
+    retrieve_cited_refs_via_api,
+    retrieve_wos_metadata_via_api,
+    search_wos
+)
 
 
 def run_button(apikey, search_query, cited_refs):
@@ -17,30 +29,37 @@ def run_button(apikey, search_query, cited_refs):
     :return: str.
     """
 
+    start_job()
+
     documents_list = []
 
-    state.progress = 0
-    state.current_task = "Retrieving Web of Science documents"
+    state.update(0, "Retrieving Web of Science documents")
 
+    query_session = search_wos(apikey, search_query)
+    total_results = query_session.records_found
+    requests_required = ((total_results - 1) // 100) + 1
+    max_requests = min(requests_required, 1000)
+    check_annual_quota(min(total_results, max_requests * 100))
     initial_json = retrieve_wos_metadata_via_api(
-        apikey,
-        search_query,
+        query_session, parsers=(fetch_expanded_metadata,)
     )
 
     for record in initial_json['Data']['Records']['records']['REC']:
         documents_list.append(fetch_expanded_metadata(record))
-    total_results = initial_json['QueryResult']['RecordsFound']
-    requests_required = ((total_results - 1) // 100) + 1
-    max_requests = min(requests_required, 1000)
-    for i in range(1, max_requests):
-        subsequent_json = retrieve_wos_metadata_via_api(
-            apikey,
-            search_query,
-            int(f'{i}01')
-        )
+    subsequent_jsons = fetch_pages(
+        checkpoints.resumable(
+            lambda first_record: retrieve_wos_metadata_via_api(
+                query_session, first_record, parsers=(fetch_expanded_metadata,)
+            ),
+            'records',
+            query_session.params, query_session.records_found
+        ),
+        [int(f'{i}01') for i in range(1, max_requests)]
+    )
+    for i, subsequent_json in enumerate(subsequent_jsons, start=1):
         for record in subsequent_json['Data']['Records']['records']['REC']:
             documents_list.append(fetch_expanded_metadata(record))
-        state.progress = (i + 1) / max_requests * 100
+        state.update((i + 1) / max_requests * 100)
 
     safe_search = search_query.replace('*', '').replace('"', '')
 
@@ -57,8 +76,10 @@ def run_button(apikey, search_query, cited_refs):
         for doc in documents_list:
             writer.write(f"{'\t'.join([str(v) for v in doc.values()])}\n")
 
-    state.progress = 0
-    state.current_task = ""
+    state.update(0, "")
+
+    if retry_budget().retries:
+        print(retry_budget().report())
 
     return f'{safe_filename}'
 
@@ -174,6 +195,8 @@ def fetch_times_cited(tc_json):
     return ''
 
 
+@view_fields('pub_info', 'names', 'addresses', 'titles', 'keywords', 'item',
+              'abstracts', 'tc_list')
 def fetch_expanded_metadata(record):
     """Parse the metadata fields required for VOSviewer that are
     available via Web of Science Expanded API
@@ -226,14 +249,21 @@ def enrich_with_cited_references(apikey, records):
     :return: list.
     """
 
-    state.progress = 0
-    state.current_task = "Retrieving Cited References metadata"
-
-    for i, record in enumerate(records):
-        cited_ref_data = retrieve_cited_refs_via_api(apikey, record['UT'])
-        record['CR'] = '; '.join(fetch_cited_refs_metadata(cited_ref) for
-                                 cited_ref in cited_ref_data['Data'])
-        state.progress = (i + 1) / len(records) * 100
+    state.update(0, "Retrieving Cited References metadata")
+
+    cited_refs = fetch_pages(
+        checkpoints.resumable(
+            lambda ut: '; '.join(
+                fetch_cited_refs_metadata(cited_ref) for cited_ref
+                in retrieve_cited_refs_via_api(apikey, ut)['Data']
+            ),
+            'cited references', [record['UT'] for record in records]
+        ),
+        [record['UT'] for record in records]
+    )
+    for i, (record, record_cited_refs) in enumerate(zip(records, cited_refs)):
+        record['CR'] = record_cited_refs
+        state.update((i + 1) / len(records) * 100)
 
     return records
 